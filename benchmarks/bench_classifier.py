@@ -0,0 +1,102 @@
+# benchmarks/bench_classifier.py
+"""
+Compare the fused single-pass intent classifier with the original
+one-regex-per-rule implementation, and with the bounded large-input mode
+(used above LARGE_INPUT_THRESHOLD characters).
+
+Usage:
+    python benchmarks/bench_classifier.py [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from functools import partial
+from typing import Callable, Dict, List
+
+from edututor.core.classifiers import classify_intent
+
+# The original rule set: one regex per rule, each scanning the full text.
+_LEGACY_PATTERNS = [
+    re.compile(
+        r"""
+        (?ix)
+        \b(write|implement|code|solve|complete|fill\ in|finish|
+           generate|produce|give|provide|paste|spit\ out|send\ me)\b
+        [^.\n\r]{0,50}
+        \b(code|function|class|program|solution|implementation|script|method)s?\b
+        |
+        \b(share|post)\b[^.\n\r]{0,30}\b(code|full\ solution|entire)\b
+        """,
+        re.IGNORECASE | re.VERBOSE,
+    ),
+    re.compile(
+        r"(?ix)\b(error|exception|traceback|stack\ trace|segmentation\ fault"
+        r"|undefined\ reference)\b"
+    ),
+    re.compile(
+        r"(?ix)\b(function|method|snippet|this\ code|this\ function|my\ function|my\ method"
+        r"|class|module)\b"
+    ),
+    re.compile(r"(?ix)\b(explain|what\ is|how\ does|teach|overview|concept|intuition)\b"),
+    re.compile(
+        r"(?ix)\b(explain|walk\ me\ through|annotate|what\ does\ this|what\ does\ this\ code)\b"
+    ),
+]
+
+
+def legacy_scan(text: str) -> None:
+    # worst case for the legacy classifier: no rule matches, every regex runs to the end
+    t = text.strip()
+    for pat in _LEGACY_PATTERNS:
+        pat.search(t)
+
+
+SAMPLES: Dict[str, str] = {
+    "prose": "The quick brown fox jumps over the lazy dog and rests under a tree. ",
+    "code": "    total = reduce(lambda a, b: a + b, values)  # sum things\n    if total > 10:\n",
+    "log": "2024-05-01 12:00:01 INFO worker-3 processed batch id=4821 in 31ms\n",
+}
+SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+
+
+def _best_of(fn: Callable[[str], object], text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(repeat: int) -> List[str]:
+    full_scan = partial(classify_intent, large_input_threshold=None)
+    bounded = partial(classify_intent, large_input_threshold=64 * 1024)
+    rows = [
+        f"{'sample':<8}{'size':>10}{'legacy ms':>12}{'fused ms':>12}{'speedup':>10}"
+        f"{'bounded ms':>12}"
+    ]
+    for name, unit in SAMPLES.items():
+        for size in SIZES:
+            text = (unit * (size // len(unit) + 1))[:size]
+            legacy = _best_of(legacy_scan, text, repeat)
+            fused = _best_of(full_scan, text, repeat)
+            large = _best_of(bounded, text, repeat)
+            rows.append(
+                f"{name:<8}{size:>10}{legacy * 1e3:>12.2f}{fused * 1e3:>12.2f}"
+                f"{legacy / fused:>9.1f}x{large * 1e3:>12.2f}"
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark intent classification.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print("\n".join(run(args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
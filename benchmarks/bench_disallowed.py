@@ -0,0 +1,110 @@
+# benchmarks/bench_disallowed.py
+"""
+Adversarial inputs for the bounded-gap "verb ... noun" disallowed rule.
+
+Each input is packed with verbs whose noun never arrives (or arrives just out
+of reach), which is the worst case for a backtracking regex. The script fits
+the growth exponent of run time against input size and exits non-zero if the
+classifier grows faster than linearly.
+
+Usage:
+    python benchmarks/bench_disallowed.py [--repeat N] [--max-exponent E]
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import re
+import sys
+import time
+from functools import partial
+from typing import Callable, Dict, List, Sequence
+
+from edututor.core.classifiers import classify_intent
+
+_LEGACY_DISALLOWED_RE = re.compile(
+    r"""
+    (?ix)
+    \b(write|implement|code|solve|complete|fill\ in|finish|
+       generate|produce|give|provide|paste|spit\ out|send\ me)\b
+    [^.\n\r]{0,50}
+    \b(code|function|class|program|solution|implementation|script|method)s?\b
+    |
+    \b(share|post)\b[^.\n\r]{0,30}\b(code|full\ solution|entire)\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+ADVERSARIAL: Dict[str, str] = {
+    # a verb at every word, never followed by a noun
+    "verbs": "give provide paste produce finish ",
+    # verb, then a noun-like word just past the gap limit or failing the boundary
+    "near_miss": "write " + "x" * 46 + " codex functional classy programs_ ",
+    # code-heavy lines full of verbs and almost-nouns
+    "code_heavy": "    result = generate(codec, classy=solve(items), fill_in=provide)\n",
+    # verb and noun always split by a sentence break
+    "breaks": "write it.code it.share it.post it.\n",
+    # partial multi-word verbs
+    "partial": "fill fill spit send fill spit send ",
+}
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def _best_of(fn: Callable[[str], object], text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth_exponent(sizes: Sequence[int], seconds: Sequence[float]) -> float:
+    """Least-squares slope of log(time) against log(size); 1.0 means linear."""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in seconds]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    num = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    den = sum((x - mx) ** 2 for x in xs)
+    return num / den
+
+
+def run(repeat: int) -> Dict[str, float]:
+    exponents: Dict[str, float] = {}
+    full_scan = partial(classify_intent, large_input_threshold=None)
+    header = f"{'input':<12}{'size':>10}{'legacy ms':>12}{'linear ms':>12}{'ns/char':>10}"
+    print(header)
+    for name, unit in ADVERSARIAL.items():
+        timings: List[float] = []
+        for size in SIZES:
+            text = (unit * (size // len(unit) + 1))[:size]
+            legacy = _best_of(_LEGACY_DISALLOWED_RE.search, text, repeat)
+            linear = _best_of(full_scan, text, repeat)
+            timings.append(linear)
+            print(
+                f"{name:<12}{size:>10}{legacy * 1e3:>12.2f}{linear * 1e3:>12.2f}"
+                f"{linear / size * 1e9:>10.1f}"
+            )
+        exponents[name] = growth_exponent(SIZES, timings)
+    return exponents
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Adversarial disallowed-rule benchmark.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-exponent", type=float, default=1.15)
+    args = parser.parse_args()
+
+    exponents = run(args.repeat)
+    worst = max(exponents, key=lambda k: exponents[k])
+    for name, exp in exponents.items():
+        print(f"growth exponent {name:<12}{exp:.2f}")
+    if exponents[worst] > args.max_exponent:
+        print(f"FAIL: {worst} grows superlinearly ({exponents[worst]:.2f})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# benchmarks/bench_sanitizer.py
+"""
+Adversarial and oversized replies for the sanitizer.
+
+Covers the inputs that made the regex sanitizer quadratic (stray and
+unterminated fences, long runs of blank lines, many "while"s on one line) next
+to ordinary prose and code replies. Both ``sanitize`` and ``StreamingSanitizer``
+(64-character chunks) are timed from 10 KB to 10 MB; the script fits the growth
+exponent of run time against input size and exits non-zero if either grows
+faster than linearly. ``--fuzz N`` also checks that N random pathological
+replies stream to the same output as ``sanitize``.
+
+Usage:
+    python benchmarks/bench_sanitizer.py [--repeat N] [--max-exponent E] [--fuzz N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from edututor.core.sanitizer import StreamingSanitizer, sanitize
+
+# name -> (head, unit repeated to the target size)
+ADVERSARIAL: Dict[str, Tuple[str, str]] = {
+    # max_tokens hit inside a block: one fence that never closes
+    "unterminated": ("Try this:\n```python\n", "x = compute(x)\n"),
+    # a paste full of fence delimiters and near-misses
+    "stray_fences": ("", "``` `` ````\n"),
+    # backticks that never pair up cleanly
+    "backticks": ("", "``a` b``` `"),
+    # every line start is followed by the rest of the blank run
+    "blank_lines": ("Hi", "\n \n\t\n"),
+    # "while" with no ":" before the end of a very long line
+    "while_line": ("", "while x and y "),
+    # ordinary replies
+    "prose": ("", "Think about the base case first. What should an empty list return?\n"),
+    "code": ("", "def step(i):\n    for j in range(i):\n        total[j] += grid[i][j]\n"),
+}
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+CHUNK = 64
+
+
+def _stream(text: str) -> str:
+    s = StreamingSanitizer()
+    out = [s.feed(text[i : i + CHUNK]) for i in range(0, len(text), CHUNK)]
+    out.append(s.close())
+    return "".join(out)
+
+
+def _best_of(fn: Callable[[str], object], text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth_exponent(sizes: Sequence[int], seconds: Sequence[float]) -> float:
+    """Least-squares slope of log(time) against log(size); 1.0 means linear."""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in seconds]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    num = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    den = sum((x - mx) ** 2 for x in xs)
+    return num / den
+
+
+def run(repeat: int) -> Dict[str, float]:
+    exponents: Dict[str, float] = {}
+    print(f"{'input':<14}{'size':>10}{'batch ms':>12}{'stream ms':>12}{'ns/char':>10}")
+    for name, (head, unit) in ADVERSARIAL.items():
+        batch: List[float] = []
+        stream: List[float] = []
+        for size in SIZES:
+            text = (head + unit * (size // len(unit) + 1))[:size]
+            batch.append(_best_of(sanitize, text, repeat))
+            stream.append(_best_of(_stream, text, repeat))
+            print(
+                f"{name:<14}{size:>10}{batch[-1] * 1e3:>12.2f}{stream[-1] * 1e3:>12.2f}"
+                f"{batch[-1] / size * 1e9:>10.1f}"
+            )
+        exponents[f"{name} batch"] = growth_exponent(SIZES, batch)
+        exponents[f"{name} stream"] = growth_exponent(SIZES, stream)
+    return exponents
+
+
+def fuzz(count: int, seed: int = 0) -> int:
+    """Random mixes of the adversarial units; returns the number of mismatches."""
+    rng = random.Random(seed)
+    units = [unit for _, unit in ADVERSARIAL.values()] + ["```", "`", "\r\n", "return ", ":x"]
+    bad = 0
+    for _ in range(count):
+        text = "".join(rng.choice(units) * rng.randint(1, 50) for _ in range(rng.randint(1, 40)))
+        if _stream(text) != sanitize(text):
+            bad += 1
+            print(f"mismatch: {text[:80]!r}...")
+    return bad
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Adversarial sanitizer benchmark.")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--max-exponent", type=float, default=1.15)
+    parser.add_argument("--fuzz", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.fuzz and fuzz(args.fuzz):
+        print("FAIL: streaming output differs from sanitize()")
+        return 1
+    exponents = run(args.repeat)
+    worst = max(exponents, key=lambda k: exponents[k])
+    for name, exp in exponents.items():
+        print(f"growth exponent {name:<20}{exp:.2f}")
+    if exponents[worst] > args.max_exponent:
+        print(f"FAIL: {worst} grows superlinearly ({exponents[worst]:.2f})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
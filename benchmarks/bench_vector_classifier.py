@@ -0,0 +1,69 @@
+# benchmarks/bench_vector_classifier.py
+"""
+Throughput of the NumPy batch backend against per-string classify_intent.
+
+The model is fitted on labels produced by classify_intent itself, so the
+agreement column shows how closely the vector backend reproduces it.
+Requires the ``analytics`` extra (NumPy).
+
+Usage:
+    python benchmarks/bench_vector_classifier.py [--rows N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from edututor.core.classifiers import classify_intent
+from edututor.core.vector_classifier import VectorIntentClassifier
+
+_TEMPLATES = [
+    "write the code for {x}",
+    "can you implement {x} for me",
+    "explain {x} in simple words",
+    "what is {x} and how does it work",
+    "what does this traceback mean: {x}Error at line 3",
+    "i got a segmentation fault in {x}",
+    "walk me through this function that does {x}",
+    "what does this snippet do with {x}",
+    "thoughts on {x}?",
+]
+_TOPICS = ["quicksort", "recursion", "a hash table", "binary search", "dynamic programming",
+           "a linked list", "closures", "graph traversal", "memoization", "heaps"]  # fmt: skip
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vector backend throughput.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [
+        rng.choice(_TEMPLATES).format(x=rng.choice(_TOPICS)) + f" #{i}" for i in range(args.rows)
+    ]
+
+    start = time.perf_counter()
+    labels = [classify_intent(t).intent for t in texts]
+    regex_s = time.perf_counter() - start
+
+    model = VectorIntentClassifier(batch_size=2048)
+    start = time.perf_counter()
+    model.fit(texts, labels)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    out = model.classify_batch(texts)
+    vector_s = time.perf_counter() - start
+
+    agree = sum(ci.intent == lab for ci, lab in zip(out, labels)) / len(labels)
+    print(f"rows                 {args.rows}")
+    print(f"classify_intent      {regex_s:8.2f}s  {args.rows / regex_s:10.0f} rows/s")
+    print(f"vector fit           {fit_s:8.2f}s")
+    print(f"vector classify      {vector_s:8.2f}s  {args.rows / vector_s:10.0f} rows/s")
+    print(f"agreement            {agree:8.2%}")
+
+
+if __name__ == "__main__":
+    main()
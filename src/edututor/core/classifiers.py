@@ -1,10 +1,25 @@
 # src/edututor/core/classifiers.py
 from __future__ import annotations
 
+import itertools
+import os
 import re
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import Optional
+from typing import (
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+)
 
 
 # ---------------------------------------------------------------------
@@ -20,72 +35,451 @@ class Intent(Enum):
     UNKNOWN = auto()
 
 
+class TextFeatures(NamedTuple):
+    """
+    Cheap measurements of the classified text, gathered by the classification
+    scan itself for all later stages (prompt building, persistence). Offsets
+    refer to ``text.strip()``.
+    """
+
+    line_count: int
+    # fraction of non-blank lines containing code punctuation ({}();<>=[])
+    code_like_ratio: float
+    # [start, end) of the first-to-last stack-trace / compiler-diagnostic line
+    traceback_span: Optional[Tuple[int, int]]
+    byte_length: int
+
+
+_EMPTY_FEATURES = TextFeatures(
+    line_count=0, code_like_ratio=0.0, traceback_span=None, byte_length=0
+)
+
+
 @dataclass(frozen=True)
 class ClassifiedIntent:
     intent: Intent
     reason: str
     # optional explicit kind hint chosen by the user via UI (concept/error/explain)
     user_hint: Optional[Intent] = None
+    # measurements of the input; not part of the classification outcome
+    features: Optional[TextFeatures] = field(default=None, compare=False)
 
 
 # ---------------------------------------------------------------------
-# Compiled regexes (module-level; compile once)
+# Vocabulary (all phrases are lowercase; multi-word phrases use one space)
 # ---------------------------------------------------------------------
-# Common phrasing we want to refuse (asks for code/solutions).
+# Common phrasing we want to refuse (asks for code/solutions):
+#   <verb> ... up to 50 chars (no sentence break) ... <noun>[s]
+#   <share verb> ... up to 30 chars (no sentence break) ... <share noun>
 # Broad but tuned to minimize false positives.
-_DISALLOWED_RE = re.compile(
-    r"""
-    (?ix)                  # case-insensitive, verbose
-    \b(
-        write|implement|code|solve|complete|fill\ in|finish|
-        generate|produce|give|provide|paste|spit\ out|send\ me
-    )\b
-    [^.\n\r]{0,50}          # up to 50 chars of gap
-    \b(
-        code|function|class|program|solution|implementation|script|method
-    )s?\b
-    |
-    \b(share|post)\b[^.\n\r]{0,30}\b(code|full\ solution|entire)\b
-    """,
-    re.IGNORECASE | re.VERBOSE,
+_DISALLOWED_VERBS = (
+    "write",
+    "implement",
+    "code",
+    "solve",
+    "complete",
+    "fill in",
+    "finish",
+    "generate",
+    "produce",
+    "give",
+    "provide",
+    "paste",
+    "spit out",
+    "send me",
+)
+_DISALLOWED_NOUNS = (
+    "code",
+    "function",
+    "class",
+    "program",
+    "solution",
+    "implementation",
+    "script",
+    "method",
 )
+_DISALLOWED_GAP = 50
+_SHARE_VERBS = ("share", "post")
+_SHARE_NOUNS = ("code", "full solution", "entire")
+_SHARE_GAP = 30
 
 # If the user supplies their own code and wants an explanation,
 # detect that as EXPLAIN_CODE.
-_EXPLAIN_RE = re.compile(
-    r"(?ix)\b(explain|walk\ me\ through|annotate|what\ does\ this|what\ does\ this\ code)\b"
+_EXPLAIN_PHRASES = (
+    "explain",
+    "walk me through",
+    "annotate",
+    "what does this",
+    "what does this code",
 )
 
-_ERROR_RE = re.compile(
-    r"(?ix)\b(error|exception|traceback|stack\ trace|segmentation\ fault|undefined\ reference)\b"
+_ERROR_PHRASES = (
+    "error",
+    "exception",
+    "traceback",
+    "stack trace",
+    "segmentation fault",
+    "undefined reference",
 )
 
-_CONCEPT_RE = re.compile(r"(?ix)\b(explain|what\ is|how\ does|teach|overview|concept|intuition)\b")
+_CONCEPT_PHRASES = ("explain", "what is", "how does", "teach", "overview", "concept", "intuition")
 
 # Code indicators: words that strongly imply "this is code / implementation"
-_CODE_INDICATORS_RE = re.compile(
-    r"""
-    (?ix)
-    \b(
-        function |
-        method |
-        snippet |
-        this\ code |
-        this\ function |
-        my\ function |
-        my\ method |
-        class |
-        module
-    )\b
-    """,
-    re.VERBOSE,
+_CODE_INDICATOR_PHRASES = (
+    "function",
+    "method",
+    "snippet",
+    "this code",
+    "this function",
+    "my function",
+    "my method",
+    "class",
+    "module",
+)
+
+
+# ---------------------------------------------------------------------
+# Fused feature scanner
+# ---------------------------------------------------------------------
+# Feature flags produced by a single pass over the input.
+_F_DISALLOWED = 1 << 0
+_F_ERROR = 1 << 1
+_F_EXPLAIN = 1 << 2
+_F_CONCEPT = 1 << 3
+_F_CODE_INDICATOR = 1 << 4
+# Set from structural signals (indentation, punctuation), not from vocabulary.
+_F_CODE_STRUCTURE = 1 << 5
+
+# Positional roles for the bounded-gap disallowed rules. Unlike feature flags,
+# these depend on where a phrase starts/ends, so no verb phrase may be a
+# word-prefix of another phrase or contain the start of a noun.
+_R_VERB = 1 << 8
+_R_NOUN = 1 << 9
+_R_SHARE_VERB = 1 << 10
+_R_SHARE_NOUN = 1 << 11
+_ROLE_MASK = _R_VERB | _R_NOUN | _R_SHARE_VERB | _R_SHARE_NOUN
+
+
+def _phrase_flags() -> Dict[str, int]:
+    flags: Dict[str, int] = {}
+    for flag, phrases in (
+        (_F_ERROR, _ERROR_PHRASES),
+        (_F_EXPLAIN, _EXPLAIN_PHRASES),
+        (_F_CONCEPT, _CONCEPT_PHRASES),
+        (_F_CODE_INDICATOR, _CODE_INDICATOR_PHRASES),
+        (_R_VERB, _DISALLOWED_VERBS),
+        (_R_NOUN, _DISALLOWED_NOUNS),
+        (_R_NOUN, tuple(n + "s" for n in _DISALLOWED_NOUNS)),
+        (_R_SHARE_VERB, _SHARE_VERBS),
+        (_R_SHARE_NOUN, _SHARE_NOUNS),
+    ):
+        for phrase in phrases:
+            flags[phrase] = flags.get(phrase, 0) | flag
+    # Only the longest phrase is reported at a position, so it also carries
+    # the feature flags of any shorter phrase it starts with.
+    for phrase in flags:
+        for prefix, prefix_flags in flags.items():
+            if phrase.startswith(prefix + " "):
+                flags[phrase] |= prefix_flags & ~_ROLE_MASK
+    return flags
+
+
+def _alternation(phrases: Iterable[str]) -> str:
+    # longest first so a phrase is never shadowed by one of its prefixes
+    return "|".join(re.escape(p) for p in sorted(set(phrases), key=len, reverse=True))
+
+
+_PHRASE_FLAGS = _phrase_flags()
+
+# One zero-width probe per word boundary, so overlapping phrases
+# ("what does this code" / "this code" / "code") are all reported. Every
+# alternative is a bounded literal, so the scan is linear in the input. It
+# runs case-sensitively over case-folded text, which lets the regex engine
+# skip positions that cannot start a phrase.
+#
+# The same scan also matches every line break. The lookaheads after it (and
+# at the start of the text) note whether the line is blank, holds code
+# punctuation, or may be a stack-trace line; case folding keeps offsets, so
+# candidates are confirmed against the original text with _TRACEBACK_LINE_RE.
+_LINE_PROBE = (
+    r"(?:(?P<blank>(?=[ \t\r\f\v]*(?:\n|\Z)))|(?P<code>(?=[^\n]*[{}();<>=\[\]])))?"
+    r"(?P<trace>(?=[ \t]*(?:traceback \(|file \"|at |caused by: |exception in thread "
+    r"|[\w.$]*(?:error|exception)|[^\s:]+:\d)))?"
+)
+# group 1 stays unset here, as it does for the line breaks in _PHRASE_RE
+_LINE_RE = re.compile(rf"(\n)?{_LINE_PROBE}")
+_PHRASE_RE = re.compile(rf"\b(?=({_alternation(_PHRASE_FLAGS)})\b)|\n{_LINE_PROBE}")
+
+# A verb and its noun may not be separated by a sentence break.
+_GAP_BREAK_RE = re.compile(r"[.\n\r]")
+
+# Characters that re.IGNORECASE treats as ASCII letters but str.lower() does not
+# map onto them (or maps onto more than one character).
+_CASE_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s", "K": "k"})
+
+
+def fold_case(text: str) -> str:
+    """Lower-case ``text`` the way the classifier's phrase patterns expect."""
+    if text.isascii():
+        return text.lower()
+    return text.translate(_CASE_FOLD).lower()
+
+
+def _within_gap(text: str, verb_end: int, noun_start: int, max_gap: int) -> bool:
+    # verb_end < 0 means no verb seen yet; the slice checked is at most max_gap long
+    if verb_end < 0 or noun_start - verb_end > max_gap:
+        return False
+    return _GAP_BREAK_RE.search(text, verb_end, noun_start) is None
+
+
+class _LineStats(NamedTuple):
+    """Per-line measurements taken by :func:`_scan_features`."""
+
+    line_count: int
+    code_like_ratio: float
+    traceback_span: Optional[Tuple[int, int]]
+
+
+def _byte_length(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def _scan_features(text: str) -> Tuple[int, _LineStats]:
+    """
+    Walk ``text`` once and return the bitwise OR of every feature flag found,
+    together with the line measurements taken on the way.
+
+    The disallowed rules ("<verb> ... <noun>" within a bounded gap) are matched
+    as a sliding window over the same phrase hits: each noun is checked against
+    the end of the most recent verb only, since a later verb always leaves a
+    shorter gap with fewer characters that could contain a sentence break.
+    Work is O(len(text)) regardless of how many verbs or nouns appear.
+    """
+    folded = fold_case(text)
+    flags = 0
+    verb_end = share_end = -1
+    lines = nonblank = code = 0
+    first = last = -1
+    for m in itertools.chain((_LINE_RE.match(folded),), _PHRASE_RE.finditer(folded)):
+        assert m is not None  # every group of _LINE_RE is optional
+        phrase, blank, code_like, trace = m.groups()
+        if phrase is None:
+            # a line starts at m.end(); the lookaheads have described it
+            lines += 1
+            if blank is not None:
+                continue
+            nonblank += 1
+            if code_like is not None:
+                code += 1
+            if trace is not None:
+                line = _TRACEBACK_LINE_RE.match(text, m.end())
+                if line is not None:
+                    if first < 0:
+                        first = line.start()
+                    last = line.end()
+            continue
+        if flags & _F_DISALLOWED:
+            continue
+        hit = _PHRASE_FLAGS[phrase]
+        flags |= hit
+        if not hit & _ROLE_MASK:
+            continue
+        start = m.start()
+        if (hit & _R_NOUN and _within_gap(folded, verb_end, start, _DISALLOWED_GAP)) or (
+            hit & _R_SHARE_NOUN and _within_gap(folded, share_end, start, _SHARE_GAP)
+        ):
+            # disallowed outranks everything else; only the lines are still measured
+            flags = (flags & ~_ROLE_MASK) | _F_DISALLOWED
+            continue
+        # a phrase like "code" is both noun and verb: test it as a noun first
+        if hit & _R_VERB:
+            verb_end = start + len(phrase)
+        if hit & _R_SHARE_VERB:
+            share_end = start + len(phrase)
+    return flags & ~_ROLE_MASK, _LineStats(
+        line_count=lines,
+        code_like_ratio=code / nonblank if nonblank else 0.0,
+        traceback_span=(first, last) if first >= 0 else None,
+    )
+
+
+# ---------------------------------------------------------------------
+# Large-input mode
+# ---------------------------------------------------------------------
+# Inputs longer than this (in characters) are classified from a bounded
+# head/tail window plus structural signals, so cost stops growing with size.
+LARGE_INPUT_THRESHOLD = 512 * 1024
+# Characters taken from each end of a large input.
+LARGE_INPUT_WINDOW = 16 * 1024
+
+_CODE_PUNCTUATION = "{}()[];:=<>"
+_CODE_LINE_RE = re.compile(r"[{}();<>=\[\]]")
+
+# One line of a stack trace or compiler diagnostic (Python, Java, JS, C/C++).
+_TRACEBACK_LINE_RE = re.compile(
+    r"^[ \t]*(?:"
+    r"Traceback \(most recent call last\):"
+    r"|File \"[^\"\n]*\", line \d+"
+    r"|at [^\s(]+ ?\([^)\n]*:\d+(?::\d+)?\)"
+    r"|at [^\s(]+:\d+:\d+"
+    r"|Caused by: "
+    r"|Exception in thread "
+    r"|[\w.$]*(?:Error|Exception)(?::|$)"
+    r"|[^\s:]+:\d+(?::\d+)?: (?:fatal )?error\b"
+    r").*$",
+    re.MULTILINE,
 )
+# Indentation buckets: none, 1-3, 4-7, 8+ columns (tabs count as 4).
+_INDENT_BUCKETS = 4
+_CODE_INDENTED_RATIO = 0.3
+_CODE_PUNCTUATION_DENSITY = 0.04
+
+
+@dataclass(frozen=True)
+class _Structure:
+    line_count: int
+    # non-blank sampled lines per indentation bucket
+    indent_histogram: Tuple[int, ...]
+    # code punctuation characters per sampled non-space character
+    punctuation_density: float
+    # fraction of non-blank sampled lines containing code punctuation
+    code_like_ratio: float
+
+    @property
+    def looks_like_code(self) -> bool:
+        sampled = sum(self.indent_histogram)
+        if not sampled:
+            return False
+        indented = sampled - self.indent_histogram[0]
+        return (
+            indented / sampled >= _CODE_INDENTED_RATIO
+            or self.punctuation_density >= _CODE_PUNCTUATION_DENSITY
+        )
+
+
+def _head_tail(text: str, window: int) -> Tuple[str, str]:
+    # cut on whitespace so no word is split into a different (matching) word
+    head = text[:window]
+    cut = max(head.rfind(" "), head.rfind("\n"))
+    if cut > 0:
+        head = head[:cut]
+    tail = text[-window:]
+    cut = min((i for i in (tail.find(" "), tail.find("\n")) if i >= 0), default=-1)
+    if cut >= 0:
+        tail = tail[cut + 1 :]
+    return head, tail
+
+
+def _structure_of(text: str, samples: Sequence[str]) -> _Structure:
+    histogram = [0] * _INDENT_BUCKETS
+    punct = chars = code_lines = 0
+    for sample in samples:
+        for line in sample.splitlines():
+            expanded = line.expandtabs(4)
+            body = expanded.lstrip()
+            if not body:
+                continue
+            indent = len(expanded) - len(body)
+            histogram[min((indent + 3) // 4, _INDENT_BUCKETS - 1)] += 1
+            chars += len(body)
+            if _CODE_LINE_RE.search(body):
+                code_lines += 1
+        punct += sum(sample.count(ch) for ch in _CODE_PUNCTUATION)
+    sampled = sum(histogram)
+    return _Structure(
+        # str.count is a C-speed memchr loop, cheap even for multi-megabyte text
+        line_count=text.count("\n") + 1,
+        indent_histogram=tuple(histogram),
+        punctuation_density=punct / chars if chars else 0.0,
+        code_like_ratio=code_lines / sampled if sampled else 0.0,
+    )
+
+
+def traceback_span(text: str, offset: int = 0) -> Optional[Tuple[int, int]]:
+    """[start, end) of the first-to-last stack-trace line in ``text``, shifted by ``offset``."""
+    first = last = None
+    for m in _TRACEBACK_LINE_RE.finditer(text):
+        if first is None:
+            first = m.start()
+        last = m.end()
+    if first is None or last is None:
+        return None
+    return offset + first, offset + last
+
+
+def _classify_large(text: str, user_hint: Optional[Intent], window: int) -> ClassifiedIntent:
+    head, tail = _head_tail(text, window)
+    head_flags, _ = _scan_features(head)
+    tail_flags, tail_lines = _scan_features(tail)
+    flags = head_flags | tail_flags
+    structure = _structure_of(text, (head, tail))
+    if structure.looks_like_code:
+        flags |= _F_CODE_STRUCTURE
+    intent, reason = _decide(flags, user_hint)
+    # tracebacks end with the exception, so the tail is where to look
+    span = tail_lines.traceback_span
+    if span is not None:
+        shift = len(text) - len(tail)
+        span = (span[0] + shift, span[1] + shift)
+    features = TextFeatures(
+        line_count=structure.line_count,
+        code_like_ratio=structure.code_like_ratio,
+        traceback_span=span,
+        byte_length=_byte_length(text),
+    )
+    return ClassifiedIntent(
+        intent,
+        f"Bounded scan of large input ({len(text)} chars, {structure.line_count} lines, "
+        f"first/last {window} chars): {reason}",
+        user_hint,
+        features,
+    )
 
 
 # ---------------------------------------------------------------------
 # Classifier
 # ---------------------------------------------------------------------
-def classify_intent(text: str, *, user_hint: Optional[Intent] = None) -> ClassifiedIntent:
+def _decide(flags: int, user_hint: Optional[Intent]) -> Tuple[Intent, str]:
+    """Apply the priority rules of :func:`classify_intent` to scanned feature flags."""
+    # 1) Disallowed patterns -> immediate refusal
+    if flags & _F_DISALLOWED:
+        return Intent.DISALLOWED, "Matched disallowed request for code/solution"
+
+    # 2) Respect explicit UI hint when plausible
+    if user_hint in (Intent.CONCEPT, Intent.ERROR, Intent.EXPLAIN_CODE):
+        return user_hint, f"User hinted {user_hint.name}"
+
+    # 3) Error-related phrasing
+    if flags & _F_ERROR:
+        return Intent.ERROR, "Matched error-related phrasing"
+
+    # 4) Code indicators: prefer EXPLAIN_CODE when code-related words present
+    #    (with or without explain phrasing).
+    if flags & _F_CODE_INDICATOR:
+        return Intent.EXPLAIN_CODE, "Matched explain-code phrasing / code indicators"
+
+    # 4b) No code vocabulary, but the text itself is shaped like code
+    if flags & _F_CODE_STRUCTURE:
+        return Intent.EXPLAIN_CODE, "Code-like structure (indentation / punctuation)"
+
+    # 5) Concept wording
+    if flags & _F_CONCEPT:
+        return Intent.CONCEPT, "Matched concept phrasing"
+
+    # 6) Generic explain-style phrasing -> default to EXPLAIN_CODE (conservative)
+    if flags & _F_EXPLAIN:
+        return Intent.EXPLAIN_CODE, "Matched explain-style phrasing"
+
+    # 7) Fallback
+    return Intent.UNKNOWN, "No pattern matched"
+
+
+def classify_intent(
+    text: str,
+    *,
+    user_hint: Optional[Intent] = None,
+    large_input_threshold: Optional[int] = LARGE_INPUT_THRESHOLD,
+) -> ClassifiedIntent:
     """
     Heuristic classifier for user intent.
 
@@ -97,51 +491,114 @@ def classify_intent(text: str, *, user_hint: Optional[Intent] = None) -> Classif
       5. Concept-like phrasing => CONCEPT.
       6. Generic explain phrasing => EXPLAIN_CODE (conservative).
       7. Fallback => UNKNOWN.
+
+    All rule inputs are collected by a single scan of the text. Inputs longer
+    than ``large_input_threshold`` characters are classified from their first
+    and last LARGE_INPUT_WINDOW characters plus structural signals (line count,
+    indentation histogram, punctuation density) instead; the returned reason
+    says so. Pass ``large_input_threshold=None`` to always scan everything.
+    The same scan fills the result's ``features``.
     """
     if text is None:
         text = ""
     t = text.strip()
     if not t:
-        return ClassifiedIntent(Intent.UNKNOWN, "Empty or whitespace-only input", user_hint)
-
-    # 1) Disallowed patterns -> immediate refusal
-    if _DISALLOWED_RE.search(t):
         return ClassifiedIntent(
-            Intent.DISALLOWED,
-            "Matched disallowed request for code/solution",
-            user_hint,
+            Intent.UNKNOWN, "Empty or whitespace-only input", user_hint, _EMPTY_FEATURES
         )
+    if large_input_threshold is not None and len(t) > large_input_threshold:
+        return _classify_large(t, user_hint, min(LARGE_INPUT_WINDOW, large_input_threshold))
+    flags, lines = _scan_features(t)
+    intent, reason = _decide(flags, user_hint)
+    features = TextFeatures(*lines, byte_length=_byte_length(t))
+    return ClassifiedIntent(intent, reason, user_hint, features)
 
-    # 2) Respect explicit UI hint when plausible
-    if user_hint in (Intent.CONCEPT, Intent.ERROR, Intent.EXPLAIN_CODE):
-        # If text is obviously disallowed, refuse regardless of hint
-        if _DISALLOWED_RE.search(t):
-            return ClassifiedIntent(
-                Intent.DISALLOWED, "Hinted intent but disallowed content", user_hint
-            )
-        return ClassifiedIntent(user_hint, f"User hinted {user_hint.name}", user_hint)
 
-    # 3) Error-related phrasing
-    if _ERROR_RE.search(t):
-        return ClassifiedIntent(Intent.ERROR, "Matched error-related phrasing", user_hint)
+# ---------------------------------------------------------------------
+# Batch classification
+# ---------------------------------------------------------------------
+# Below this many items a process pool costs more (spawn + pickling) than it saves.
+BATCH_POOL_THRESHOLD = 2048
 
-    # 4) Code indicators: prefer EXPLAIN_CODE when code-related words present.
-    #    Also treat "explain" + code indicators as EXPLAIN_CODE.
-    has_code_indicators = bool(_CODE_INDICATORS_RE.search(t))
-    if has_code_indicators or (_EXPLAIN_RE.search(t) and has_code_indicators):
-        return ClassifiedIntent(
-            Intent.EXPLAIN_CODE,
-            "Matched explain-code phrasing / code indicators",
-            user_hint,
-        )
+_BatchItem = Tuple[str, Optional[Intent]]
 
-    # 5) Concept wording
-    if _CONCEPT_RE.search(t):
-        return ClassifiedIntent(Intent.CONCEPT, "Matched concept phrasing", user_hint)
 
-    # 6) Generic explain-style phrasing -> default to EXPLAIN_CODE (conservative)
-    if _EXPLAIN_RE.search(t):
-        return ClassifiedIntent(Intent.EXPLAIN_CODE, "Matched explain-style phrasing", user_hint)
+class IntentBackend(Protocol):
+    """Alternative batch scorer, e.g. ``vector_classifier.VectorIntentClassifier``."""
 
-    # 7) Fallback
-    return ClassifiedIntent(Intent.UNKNOWN, "No pattern matched", user_hint)
+    def classify_batch(
+        self, texts: Sequence[str], hints: Optional[Sequence[Optional[Intent]]] = None
+    ) -> List[ClassifiedIntent]: ...
+
+
+def _classify_chunk(items: Sequence[_BatchItem]) -> List[ClassifiedIntent]:
+    return [classify_intent(text, user_hint=hint) for text, hint in items]
+
+
+def classify_intents_batch(
+    texts: Iterable[str],
+    hints: Optional[Iterable[Optional[Intent]]] = None,
+    *,
+    workers: Optional[int] = None,
+    chunksize: int = 512,
+    min_pool_size: int = BATCH_POOL_THRESHOLD,
+    backend: Optional[IntentBackend] = None,
+) -> Iterator[ClassifiedIntent]:
+    """
+    Classify many texts, yielding one ClassifiedIntent per input, in input order.
+
+    Results are identical to calling ``classify_intent(text, user_hint=hint)``
+    per item. ``hints`` (if given) must be the same length as ``texts``.
+
+    Batches shorter than ``min_pool_size`` (or ``workers=1``) are classified
+    in-process. Larger batches are fanned out to a process pool in chunks of
+    ``chunksize``; at most ``2 * workers`` chunks are in flight, so arbitrarily
+    long iterables (e.g. a database cursor) are streamed without being loaded
+    into memory.
+
+    If ``backend`` is given, chunks are scored by ``backend.classify_batch`` in
+    this process instead (its results follow that backend's rules).
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be >= 1")
+    workers = workers or os.cpu_count() or 1
+    if hints is None:
+        items: Iterator[_BatchItem] = ((t, None) for t in texts)
+    else:
+        items = zip(texts, hints, strict=True)
+
+    if backend is not None:
+        for chunk in _chunked(items, chunksize):
+            yield from backend.classify_batch(
+                [text for text, _ in chunk], [hint for _, hint in chunk]
+            )
+        return
+
+    # Peek far enough to decide whether the pool is worth starting.
+    head = list(itertools.islice(items, min_pool_size))
+    if workers <= 1 or len(head) < min_pool_size:
+        for text, hint in itertools.chain(head, items):
+            yield classify_intent(text, user_hint=hint)
+        return
+
+    chunks = _chunked(itertools.chain(head, items), chunksize)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future[List[ClassifiedIntent]]] = deque()
+        try:
+            for chunk in itertools.islice(chunks, 2 * workers):
+                pending.append(pool.submit(_classify_chunk, chunk))
+            while pending:
+                results = pending.popleft().result()
+                for chunk in itertools.islice(chunks, 1):
+                    pending.append(pool.submit(_classify_chunk, chunk))
+                yield from results
+        finally:
+            # consumer stopped early or a worker failed: drop queued work
+            for fut in pending:
+                fut.cancel()
+
+
+def _chunked(items: Iterable[_BatchItem], size: int) -> Iterator[List[_BatchItem]]:
+    it = iter(items)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
@@ -0,0 +1,144 @@
+# src/edututor/core/intent_cache.py
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from .classifiers import ClassifiedIntent, Intent, classify_intent, fold_case
+
+# Runs of whitespace collapse to one space, or to one newline if they contain a
+# line break (line breaks are significant to the disallowed rules).
+_LINE_BREAK_RUN_RE = re.compile(r"\s*[\n\r]\s*")
+_SPACE_RUN_RE = re.compile(r"[^\S\n\r]+")
+
+_Key = Tuple[str, Optional[Intent]]
+
+
+class _Entry(NamedTuple):
+    result: ClassifiedIntent
+    # the case-folded, stripped input ``result`` was computed from
+    source: str
+    size: int
+
+
+class IntentCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    # lookups whose input text exceeded max_entry_bytes and were never stored
+    bypassed: int
+    maxsize: int
+    currsize: int
+    currbytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses + self.bypassed
+        return self.hits / lookups if lookups else 0.0
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold and collapse whitespace the way the cache keys inputs."""
+    return _collapse_whitespace(fold_case((text or "").strip()))
+
+
+def _collapse_whitespace(folded: str) -> str:
+    return _SPACE_RUN_RE.sub(" ", _LINE_BREAK_RUN_RE.sub("\n", folded))
+
+
+def _size_bytes(s: str) -> int:
+    return len(s) if s.isascii() else len(s.encode("utf-8"))
+
+
+class IntentCache:
+    """
+    Bounded, thread-safe LRU cache in front of :func:`classify_intent`.
+
+    Inputs are keyed on their normalized text (see :func:`normalize_text`) plus
+    ``user_hint``, but the caller's own text is what gets classified. Each entry
+    remembers the input it was computed from, and it is only served to inputs
+    that differ from that one in case or surrounding whitespace, which the
+    classifier ignores; a variant spaced differently inside (the disallowed
+    rules count the characters between a verb and its noun) is classified
+    afresh and replaces the entry. A hit therefore returns what
+    :func:`classify_intent` would, with ``features`` measured on a text of the
+    same length and line layout. Entries are evicted least-recently-used first
+    when either ``maxsize`` entries or ``max_bytes`` of input text are exceeded;
+    inputs larger than ``max_entry_bytes`` are classified but never stored, so
+    one huge paste cannot flush the cache.
+
+    Instances are callable with the same signature as ``classify_intent``.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        *,
+        max_bytes: int = 4 * 1024 * 1024,
+        max_entry_bytes: int = 16 * 1024,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[_Key, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+
+    def __call__(self, text: str, *, user_hint: Optional[Intent] = None) -> ClassifiedIntent:
+        return self.classify(text, user_hint=user_hint)
+
+    def classify(self, text: str, *, user_hint: Optional[Intent] = None) -> ClassifiedIntent:
+        folded = fold_case((text or "").strip())
+        size = _size_bytes(folded)
+        if size > self.max_entry_bytes:
+            with self._lock:
+                self._bypassed += 1
+            return classify_intent(text, user_hint=user_hint)
+
+        key = (_collapse_whitespace(folded), user_hint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.source == folded:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry.result
+            self._misses += 1
+
+        # classify outside the lock; concurrent misses on one key just race to store
+        result = classify_intent(text, user_hint=user_hint)
+        with self._lock:
+            stale = self._entries.pop(key, None)
+            if stale is not None:
+                self._bytes -= stale.size
+            self._entries[key] = _Entry(result, folded, size)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+        return result
+
+    def cache_info(self) -> IntentCacheInfo:
+        with self._lock:
+            return IntentCacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                bypassed=self._bypassed,
+                maxsize=self.maxsize,
+                currsize=len(self._entries),
+                currbytes=self._bytes,
+                max_bytes=self.max_bytes,
+            )
+
+    def cache_clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._bypassed = 0
@@ -0,0 +1,586 @@
+# src/edututor/core/minifier.py
+"""
+Shrink code snippets sent for EXPLAIN_CODE before they reach the provider.
+
+Comments, blank lines, docstrings, long string/data literals and import
+boilerplate cost tokens without helping the tutor explain the code. Every kept
+line is prefixed with its original line number, so "line 42" still means the
+same thing to the learner and the tutor.
+
+Python is reduced token-by-token with :mod:`tokenize`; anything else (or Python
+that does not tokenize) goes through a conservative line-based fallback that
+only removes what it can recognize unambiguously. In a whole message only the
+code is reduced (see :func:`minify_message`); the learner's prose is sent as
+written.
+"""
+
+from __future__ import annotations
+
+import bisect
+import io
+import re
+import tokenize
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import AbstractSet, List, Optional, Tuple
+
+from .tokens import estimate_tokens
+
+
+class MinifyLevel(IntEnum):
+    # blank lines and whole-line comments only
+    LIGHT = 1
+    # + inline comments, docstrings cut to one line, long literals shortened
+    NORMAL = 2
+    # + docstrings dropped, shorter literal limits, import runs collapsed
+    AGGRESSIVE = 3
+
+
+@dataclass(frozen=True)
+class MinifiedCode:
+    text: str
+    language: str
+    level: MinifyLevel
+    original_tokens: int
+    minified_tokens: int
+    # lines dropped (beyond what the level removes) to meet the token budget
+    truncated: bool = False
+
+
+# (max string literal chars, max items in a constant data literal)
+_LITERAL_LIMITS = {
+    MinifyLevel.LIGHT: (None, None),
+    MinifyLevel.NORMAL: (80, 12),
+    MinifyLevel.AGGRESSIVE: (24, 4),
+}
+_ELLIPSIS = "…"
+
+# ---------------------------------------------------------------------
+# Language detection
+# ---------------------------------------------------------------------
+_PY_HINT_RE = re.compile(
+    r"^[ \t]*(?:def [\w]+\(|class \w+[(:]|import \w|from [\w.]+ import |"
+    r"if __name__ ==|elif |except\b|with .+:$|for .+ in .+:$)",
+    re.M,
+)
+_BRACE_HINT_RE = re.compile(r"(?:[;{}][ \t]*$|^[ \t]*#include\b|^[ \t]*//)", re.M)
+_PY_NAMES = ("python", "py", ".py", "python3")
+
+
+def guess_language(code: str) -> str:
+    """'python' if the snippet looks like Python, otherwise 'generic'."""
+    py = len(_PY_HINT_RE.findall(code))
+    braces = len(_BRACE_HINT_RE.findall(code))
+    return "python" if py and py >= braces else "generic"
+
+
+# ---------------------------------------------------------------------
+# Line bookkeeping
+# ---------------------------------------------------------------------
+# Edits are ((row, col), (row, col), replacement) on 1-based rows.
+_Edit = Tuple[Tuple[int, int], Tuple[int, int], str]
+
+
+def _apply_edits(lines: List[Optional[str]], edits: List[_Edit]) -> None:
+    """
+    Apply non-overlapping edits in place. A multi-line edit folds its rows into
+    the first one; the others become None so original numbering survives.
+    """
+    for (r1, c1), (r2, c2), rep in sorted(edits, reverse=True):
+        head, tail = lines[r1 - 1] or "", lines[r2 - 1] or ""
+        lines[r1 - 1] = head[:c1] + rep + tail[c2:]
+        for r in range(r1, r2):
+            lines[r] = None
+
+
+def _numbered(
+    lines: List[Optional[str]], keep: AbstractSet[int] = frozenset()
+) -> List[Tuple[int, str]]:
+    """Non-blank lines (and lines in ``keep``, e.g. inside strings) with their numbers."""
+    return [
+        (i, ln.rstrip())
+        for i, ln in enumerate(lines, 1)
+        if ln is not None and (ln.strip() or i in keep)
+    ]
+
+
+def _render(rows: List[Tuple[int, str]]) -> str:
+    if not rows:
+        return ""
+    width = len(str(rows[-1][0]))
+    return "\n".join(f"{n:>{width}}| {ln}" for n, ln in rows)
+
+
+_STRING_OPEN_RE = re.compile(r"(?i)([rbuf]*)('''|\"\"\"|'|\")")
+
+
+def _shorten_string(token: str, limit: int) -> str:
+    """Keep the prefix, opening quote and first ``limit`` chars of a literal."""
+    m = _STRING_OPEN_RE.match(token)
+    if m is None or len(token) <= limit + len(m.group(0)) * 2:
+        return token
+    quote = m.group(2)
+    body = token[len(m.group(0)) : -len(quote)]
+    first = body.splitlines()[0] if body else ""
+    return f"{m.group(0)}{first[:limit]}{_ELLIPSIS}{quote}"
+
+
+def _first_line(token: str) -> str:
+    """A multi-line string literal cut to its first non-blank line."""
+    m = _STRING_OPEN_RE.match(token)
+    if m is None:
+        return token
+    quote = m.group(2)
+    body = token[len(m.group(0)) : -len(quote)]
+    first = next((ln.strip() for ln in body.splitlines() if ln.strip()), "")
+    return f"{m.group(0)}{first}{_ELLIPSIS}{quote}"
+
+
+def _collapse_imports(rows: List[Tuple[int, str]], keep: int = 2) -> List[Tuple[int, str]]:
+    """Fold runs of import lines longer than ``keep`` into one summary line."""
+    out: List[Tuple[int, str]] = []
+    run: List[Tuple[int, str]] = []
+
+    def flush() -> None:
+        if len(run) <= keep:
+            out.extend(run)
+        else:
+            names = ", ".join(ln.split()[1] for _, ln in run)
+            out.append((run[0][0], f"# {len(run)} imports: {names}"))
+        run.clear()
+
+    for n, ln in rows:
+        if ln.startswith(("import ", "from ")) and not ln.endswith(("(", "\\")):
+            run.append((n, ln))
+        else:
+            flush()
+            out.append((n, ln))
+    flush()
+    return out
+
+
+# ---------------------------------------------------------------------
+# Python (tokenize)
+# ---------------------------------------------------------------------
+_LITERAL_TOKENS = (tokenize.NUMBER, tokenize.STRING, tokenize.NL, tokenize.COMMENT)
+_LITERAL_OPS = frozenset(",:-+()[]{}")
+_LITERAL_NAMES = frozenset(("True", "False", "None"))
+_OPENERS = frozenset("([{")
+_CLOSERS = frozenset(")]}")
+_STATEMENT_START = (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT)
+
+
+def _next_significant(tokens: List[tokenize.TokenInfo], i: int) -> int:
+    for tok in tokens[i + 1 :]:
+        if tok.type not in (tokenize.NL, tokenize.COMMENT):
+            return tok.type
+    return tokenize.ENDMARKER
+
+
+def _is_call_or_subscript(opener: tokenize.TokenInfo, prev: Optional[tokenize.TokenInfo]) -> bool:
+    if prev is None or opener.string == "{":
+        return False
+    return prev.type in (tokenize.NAME, tokenize.STRING) or prev.string in _CLOSERS
+
+
+def _python_rows(code: str, level: MinifyLevel) -> List[Tuple[int, str]]:
+    """Raises tokenize.TokenError / SyntaxError if ``code`` is not Python."""
+    max_string, max_items = _LITERAL_LIMITS[level]
+    tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+    edits: List[_Edit] = []
+    # (opening token index, literal-only so far, element separators seen)
+    brackets: List[Tuple[int, bool, int]] = []
+    # token index ranges of constant data literals worth collapsing
+    literals: List[Tuple[int, int]] = []
+    prev: Optional[tokenize.TokenInfo] = None
+
+    for i, tok in enumerate(tokens):
+        kind = tok.type
+        if kind == tokenize.COMMENT:
+            whole_line = not tok.line[: tok.start[1]].strip()
+            if whole_line or level >= MinifyLevel.NORMAL:
+                edits.append((tok.start, tok.end, ""))
+            continue
+        if (
+            kind == tokenize.STRING
+            and (prev is None or prev.type in _STATEMENT_START)
+            and _next_significant(tokens, i) in (tokenize.NEWLINE, tokenize.ENDMARKER)
+        ):
+            # a bare string statement: a docstring (or dead code, same treatment)
+            if level >= MinifyLevel.AGGRESSIVE:
+                edits.append((tok.start, tok.end, ""))
+            elif level >= MinifyLevel.NORMAL and "\n" in tok.string:
+                edits.append((tok.start, tok.end, _first_line(tok.string)))
+        elif kind == tokenize.STRING and max_string is not None:
+            short = _shorten_string(tok.string, max_string)
+            if short != tok.string:
+                edits.append((tok.start, tok.end, short))
+
+        if max_items is not None:
+            if kind == tokenize.OP and tok.string in _OPENERS:
+                brackets.append((i, not _is_call_or_subscript(tok, prev), 0))
+            elif kind == tokenize.OP and tok.string in _CLOSERS and brackets:
+                opener, literal_only, commas = brackets.pop()
+                if literal_only and commas >= max_items:
+                    literals.append((opener, i))
+                if not literal_only and brackets:
+                    opener2, _, commas2 = brackets[-1]
+                    brackets[-1] = (opener2, False, commas2)
+            elif brackets:
+                opener, literal_only, commas = brackets[-1]
+                if kind == tokenize.OP and tok.string == ",":
+                    commas += 1
+                elif not (
+                    kind in _LITERAL_TOKENS
+                    or (kind == tokenize.OP and tok.string in _LITERAL_OPS)
+                    or (kind == tokenize.NAME and tok.string in _LITERAL_NAMES)
+                ):
+                    literal_only = False
+                brackets[-1] = (opener, literal_only, commas)
+
+        if kind != tokenize.NL:
+            prev = tok
+
+    # collapse constant data literals, outermost only; drop edits inside them
+    if literals:
+        outermost: List[Tuple[int, int]] = []
+        for first, last in sorted(literals):
+            if not outermost or first > outermost[-1][1]:
+                outermost.append((first, last))
+        starts = [tokens[first].start for first, _ in outermost]
+        kept_edits = []
+        for ed in edits:
+            k = bisect.bisect_right(starts, ed[0]) - 1
+            if k < 0 or tokens[outermost[k][1]].end < ed[1]:
+                kept_edits.append(ed)
+        edits = kept_edits
+        for first, last in outermost:
+            short = _first_items(tokens[first : last + 1], max_items or 1, max_string)
+            edits.append((tokens[first].start, tokens[last].end, short))
+
+    # blank lines inside multi-line strings that survive are part of the value
+    edited = {ed[0] for ed in edits}
+    keep = {
+        row
+        for tok in tokens
+        if tok.type == tokenize.STRING and tok.start not in edited
+        for row in range(tok.start[0] + 1, tok.end[0] + 1)
+    }
+    lines: List[Optional[str]] = list(code.splitlines())
+    _apply_edits(lines, edits)
+    rows = _numbered(lines, keep)
+    return _collapse_imports(rows) if level >= MinifyLevel.AGGRESSIVE else rows
+
+
+def _first_items(literal: List[tokenize.TokenInfo], keep: int, max_string: Optional[int]) -> str:
+    """Source of a bracketed literal reduced to its first ``keep`` elements."""
+    parts: List[str] = []
+    depth = items = 0
+    trailing_comma = False
+    for t in literal[1:-1]:
+        if t.type in (tokenize.NL, tokenize.COMMENT):
+            continue
+        trailing_comma = False
+        if t.string in _OPENERS:
+            depth += 1
+        elif t.string in _CLOSERS:
+            depth -= 1
+        elif depth == 0 and t.string == ",":
+            items += 1
+            trailing_comma = True
+            if items < keep:
+                parts.append(", ")
+            continue
+        if items < keep:
+            text = t.string
+            if t.type == tokenize.STRING and max_string is not None:
+                text = _shorten_string(text, max_string)
+            parts.append(text + (" " if text == ":" else ""))
+    total = items if trailing_comma else items + 1
+    return f"{literal[0].string}{''.join(parts)}, {_ELLIPSIS} ({total} items){literal[-1].string}"
+
+
+# ---------------------------------------------------------------------
+# Generic fallback
+# ---------------------------------------------------------------------
+# "#" only when it cannot be a preprocessor directive ("#include", "#define")
+_LINE_COMMENT_RE = re.compile(r"^[ \t]*(?://|#(?=[\s#!]|$))")
+_BLOCK_START_RE = re.compile(r"^[ \t]*/\*")
+_TRAILING_COMMENT_RE = re.compile(r"[ \t]+//[^\n]*$")
+_STRING_RE = re.compile(r"\"(?:[^\"\\\n]|\\.)*\"|'(?:[^'\\\n]|\\.)*'")
+_DATUM = r"(?:[-+]?[\d.]+[fFlLuU]?|\"[^\"\n]*\"|'[^'\n]*')"
+# a line holding nothing but literal values: one row of a data table
+_DATA_LINE_RE = re.compile(rf"^[ \t]*{_DATUM}(?:[ \t]*,[ \t]*{_DATUM})*[ \t]*,?[ \t]*$")
+
+
+def _generic_rows(code: str, level: MinifyLevel) -> List[Tuple[int, str]]:
+    max_string, max_items = _LITERAL_LIMITS[level]
+    rows: List[Tuple[int, str]] = []
+    in_block = False
+    data_run = 0
+    for n, line in enumerate(code.splitlines(), 1):
+        stripped = line.strip()
+        if in_block:
+            in_block = "*/" not in stripped
+            # only whole-line block comments are removed
+            if in_block or stripped.endswith("*/"):
+                continue
+        if not stripped or _LINE_COMMENT_RE.match(line):
+            continue
+        if _BLOCK_START_RE.match(line):
+            if "*/" not in stripped:
+                in_block = True
+                continue
+            if stripped.endswith("*/"):
+                continue
+        if level >= MinifyLevel.NORMAL:
+            # no quotes on the line: a "//" cannot be inside a string literal
+            if '"' not in line and "'" not in line:
+                line = _TRAILING_COMMENT_RE.sub("", line)
+            if max_string is not None:
+                line = _STRING_RE.sub(lambda m: _shorten_string(m.group(0), max_string), line)
+        if max_items is not None and _DATA_LINE_RE.match(line):
+            data_run += 1
+            if data_run == max_items:
+                rows.append((n, line[: len(line) - len(line.lstrip())] + _ELLIPSIS))
+            if data_run >= max_items:
+                continue
+        else:
+            data_run = 0
+        rows.append((n, line.rstrip()))
+    return rows
+
+
+# ---------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------
+def _fit_budget(rows: List[Tuple[int, str]], budget: int) -> List[Tuple[int, str]]:
+    """Keep head and tail lines (2:1) around one elision marker within ``budget``."""
+    # priced as rendered: the "N| " prefix and line break included
+    width = len(str(rows[-1][0])) if rows else 1
+    costs = [estimate_tokens(f"{n:>{width}}| {ln}\n") for n, ln in rows]
+    widest = "9" * width
+    marker_cost = estimate_tokens(
+        f"{widest}| {_ELLIPSIS} lines {widest}-{widest} omitted {_ELLIPSIS}\n"
+    )
+    remaining = budget - marker_cost
+    head: List[int] = []
+    tail: List[int] = []
+    lo, hi = 0, len(rows) - 1
+    while lo <= hi:
+        take_head = len(head) <= 2 * len(tail)
+        i = lo if take_head else hi
+        if costs[i] > remaining:
+            break
+        remaining -= costs[i]
+        if take_head:
+            head.append(i)
+            lo += 1
+        else:
+            tail.append(i)
+            hi -= 1
+    if lo > hi:
+        return rows
+    first, last = rows[lo][0], rows[hi][0]
+    marker = (first, f"{_ELLIPSIS} lines {first}-{last} omitted {_ELLIPSIS}")
+    return [rows[i] for i in head] + [marker] + [rows[i] for i in reversed(tail)]
+
+
+def minify_code(
+    code: str,
+    *,
+    language: Optional[str] = None,
+    level: MinifyLevel = MinifyLevel.NORMAL,
+    token_budget: Optional[int] = None,
+) -> MinifiedCode:
+    """
+    Reduce ``code`` for an explanation prompt; kept lines are prefixed "N| ".
+
+    ``language`` is a name or file extension (".py" selects the tokenize path);
+    by default it is guessed. With ``token_budget``, stronger levels are tried
+    in turn and, if even the most aggressive one is over budget, lines from the
+    middle of the snippet are replaced by a single "lines a-b omitted" marker.
+    """
+    original_tokens = estimate_tokens(code)
+    lang = (language or guess_language(code)).lower()
+    lang = "python" if lang in _PY_NAMES else lang
+
+    rows: List[Tuple[int, str]] = []
+    used = level
+    for used in (lv for lv in MinifyLevel if lv >= level):
+        if lang == "python":
+            try:
+                rows = _python_rows(code, used)
+            except (tokenize.TokenError, SyntaxError):
+                lang = "generic"
+        if lang != "python":
+            rows = _generic_rows(code, used)
+        if token_budget is None or estimate_tokens(_render(rows)) <= token_budget:
+            break
+
+    truncated = False
+    if token_budget is not None and estimate_tokens(_render(rows)) > token_budget:
+        rows = _fit_budget(rows, token_budget)
+        truncated = True
+    text = _render(rows)
+    return MinifiedCode(text, lang, used, original_tokens, estimate_tokens(text), truncated)
+
+
+# ---------------------------------------------------------------------
+# Messages: prose around the code
+# ---------------------------------------------------------------------
+# ```lang ... ``` (or ~~~); an unclosed fence runs to the end of the message
+_FENCE_RE = re.compile(
+    r"^[ \t]*(?P<fence>`{3,}|~{3,})[ \t]*(?P<info>[^\s`]*)[^\n]*\n"
+    r"(?P<body>.*?)(?:^[ \t]*(?P=fence)[ \t]*$|\Z)",
+    re.M | re.S,
+)
+# Lines shaped like code. Block keywords count only with a header ending, so
+# "for some reason it fails" stays prose.
+_CODE_LINE_RE = re.compile(
+    r"""^(?:
+        (?:async[ \t]+)?(?:def|class|if|elif|else|for|while|with|try|except|finally
+            |switch|function|fn|func)\b.*[:{)][ \t]*$
+        |import[ \t]+[\w.]+(?:[ \t]+as[ \t]+\w+)?(?:[ \t]*,[ \t]*[\w.]+)*[ \t]*;?[ \t]*$
+        |from[ \t]+[\w.]+[ \t]+import\b
+        |(?:return|raise|yield)\b|(?:pass|break|continue)[ \t]*;?[ \t]*$
+        |\#[ \t]*(?:include|define|ifn?def|endif|pragma)\b
+        |@\w
+        |[A-Za-z_][\w.]*(?:\[[^\]\n]*\])?[ \t]*(?:[-+*/%&|^]?=(?!=)|\()
+        |[}\])]
+        |[rRbBuUfF]{0,2}(?:'''|\"\"\")
+        |.*[;{}(\[][ \t]*$
+    )""",
+    re.X,
+)
+_COMMENT_LINE_RE = re.compile(r"^(?:#|//|/\*|\*)")
+_TRIPLE_QUOTES = ('"""', "'''")
+# non-code lines with at least this many words are the learner's prose
+_PROSE_WORDS = 3
+
+_Segment = Tuple[bool, int, int]
+
+
+def _line_kinds(lines: List[str]) -> List[Optional[bool]]:
+    """Per line: True for code, False for prose, None for either (blank, comment, short)."""
+    kinds: List[Optional[bool]] = []
+    open_quote: Optional[str] = None
+    for line in lines:
+        stripped = line.strip()
+        if open_quote is not None:
+            # inside a multi-line string literal of the code
+            kinds.append(True)
+            if stripped.count(open_quote) % 2:
+                open_quote = None
+            continue
+        if not stripped or _COMMENT_LINE_RE.match(stripped):
+            kinds.append(None)
+        elif line[0] in " \t" or _CODE_LINE_RE.match(stripped):
+            kinds.append(True)
+            open_quote = next((q for q in _TRIPLE_QUOTES if stripped.count(q) % 2), None)
+        else:
+            kinds.append(False if len(stripped.split()) >= _PROSE_WORDS else None)
+    return kinds
+
+
+def _code_runs(lines: List[str]) -> List[Tuple[int, int]]:
+    """[start, end) line ranges of code; all of it if there is no prose at all."""
+    kinds = _line_kinds(lines)
+    if False not in kinds:
+        return [(0, len(lines))] if True in kinds else []
+    runs: List[Tuple[int, int]] = []
+    start = last = -1
+    for i, kind in enumerate(kinds):
+        if kind is True:
+            if start < 0:
+                start = i
+            last = i
+        elif kind is False and start >= 0:
+            runs.append((start, last + 1))
+            start = -1
+    if start >= 0:
+        runs.append((start, last + 1))
+    return runs
+
+
+def _split_message(text: str) -> List[Tuple[str, Optional[str], bool]]:
+    """``text`` as (part, language, is_code) parts that join back into it."""
+    parts: List[Tuple[str, Optional[str], bool]] = []
+    pos = 0
+    fences = list(_FENCE_RE.finditer(text))
+    for m in fences:
+        body_start, body_end = m.span("body")
+        parts.append((text[pos:body_start], None, False))
+        parts.append((text[body_start:body_end], m.group("info") or None, True))
+        pos = body_end
+    if fences:
+        parts.append((text[pos:], None, False))
+        return parts
+    # no fences: the code is whatever runs of lines look like it
+    lines = text.split("\n")
+    for start, end in _code_runs(lines):
+        parts.append(("\n".join(lines[pos:start] + [""]) if start > pos else "", None, False))
+        tail = "\n" if end < len(lines) else ""
+        parts.append(("\n".join(lines[start:end]) + tail, None, True))
+        pos = end
+    parts.append(("\n".join(lines[pos:]), None, False))
+    return [part for part in parts if part[0]]
+
+
+def minify_message(
+    text: str,
+    *,
+    level: MinifyLevel = MinifyLevel.NORMAL,
+    token_budget: Optional[int] = None,
+) -> MinifiedCode:
+    """
+    :func:`minify_code` applied to the code in a learner's message only.
+
+    The code is the fenced blocks if there are any, otherwise the runs of
+    lines shaped like code (a message with no prose is all code). Everything
+    else is kept verbatim, so an apostrophe or "#" in a sentence is never read
+    as a string or a comment. Line numbers restart in each block. With
+    ``token_budget``, what the prose leaves is shared between the blocks in
+    proportion to their size. ``language`` is that of the first block, or ""
+    when nothing looked like code.
+    """
+    parts = _split_message(text)
+    original_tokens = estimate_tokens(text)
+    code = [(part, lang) for part, lang, is_code in parts if is_code and part.strip()]
+    if not code:
+        return MinifiedCode(text, "", level, original_tokens, original_tokens)
+
+    budgets: List[Optional[int]] = [None] * len(code)
+    if token_budget is not None:
+        prose_tokens = sum(estimate_tokens(part) for part, _, is_code in parts if not is_code)
+        sizes = [estimate_tokens(part) for part, _ in code]
+        room = max(token_budget - prose_tokens, 0)
+        budgets = [room * size // max(sum(sizes), 1) for size in sizes]
+    minified = iter(
+        [
+            minify_code(part.strip("\n"), language=lang, level=level, token_budget=budget)
+            for (part, lang), budget in zip(code, budgets)
+        ]
+    )
+
+    out: List[str] = []
+    results: List[MinifiedCode] = []
+    for part, _, is_code in parts:
+        if not (is_code and part.strip()):
+            out.append(part)
+            continue
+        result = next(minified)
+        results.append(result)
+        # keep the blank lines around the block, and its closing line break
+        lead = part[: len(part) - len(part.lstrip("\n"))]
+        trail = part[len(part.rstrip("\n")) :]
+        out.append(lead + result.text + trail)
+    minified_text = "".join(out)
+    return MinifiedCode(
+        minified_text,
+        results[0].language,
+        max(r.level for r in results),
+        original_tokens,
+        estimate_tokens(minified_text),
+        any(r.truncated for r in results),
+    )
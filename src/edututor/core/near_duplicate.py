@@ -0,0 +1,291 @@
+# src/edututor/core/near_duplicate.py
+"""
+Near-duplicate question cache.
+
+Students rarely repeat a question word for word ("what is recursion",
+"explain recursion pls", "recursion??"), so the exact-match
+:class:`response_cache.ResponseCache` misses most repeats. Here a question is
+reduced to its content words (filler such as "what is", "explain", "pls"
+dropped, plurals folded), summarized by a MinHash signature, and indexed
+with banded LSH: questions whose signatures agree on every row of some band
+land in the same bucket. Candidates are then accepted only if their
+estimated Jaccard similarity reaches ``threshold`` and they were answered
+with the same provider, model and prompt prefix. Each intent is answered
+under its own prefix (its scaffold), so matches never cross intents; an
+UNKNOWN question matches the questions of the intent it is answered like.
+
+The index is a bounded LRU and can be rebuilt from ``ConversationStore``
+history at startup.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .classifiers import Intent
+from .intent_cache import normalize_text
+from .response_cache import CachedReply, CacheLookup
+
+logger = logging.getLogger(__name__)
+
+# (scope, band number, the band's rows of the signature)
+_BandKey = Tuple[str, int, Tuple[int, ...]]
+
+# Mersenne prime for the universal hashes h(x) = (a*x + b) mod p
+_PRIME = (1 << 61) - 1
+_WORD_RE = re.compile(r"[^\W_]+")
+
+# words that do not change what a question is about ("example", "more",
+# "again" or "mean" ask for a different answer, so they are not filler)
+_FILLER = frozenset("""
+    a an the is are was were be been am do does did can could would should will
+    what whats how why when where which who whom explain describe define tell
+    me my i you your we us it its this that these those of in on at to for
+    with by from about into as and or but so if then than
+    pls plz please thanks thank hi hello hey help understand
+    just really some any very also exactly
+    """.split())
+
+
+def question_features(text: str) -> FrozenSet[str]:
+    """The content words of a question, lower-cased with plurals folded."""
+    words = _WORD_RE.findall(normalize_text(text))
+    content = {_singular(w) for w in words if w not in _FILLER}
+    # a question made only of filler is its own (rare) topic
+    return frozenset(content or map(_singular, words))
+
+
+def _singular(word: str) -> str:
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class MinHasher:
+    """``num_perm`` MinHash functions, fixed by ``seed`` so signatures are comparable."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        if num_perm < 1:
+            raise ValueError("num_perm must be >= 1")
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, features: Iterable[str]) -> Tuple[int, ...]:
+        xs = [_feature_hash(f) for f in features]
+        if not xs:
+            return ()
+        return tuple(min((a * x + b) % _PRIME for x in xs) for a, b in self._params)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the feature sets behind two signatures."""
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class NearDuplicateCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    # lookups for intents (or lengths) the cache does not serve
+    skipped: int
+    maxsize: int
+    currsize: int
+    buckets: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(frozen=True)
+class _Entry:
+    scope: str
+    signature: Tuple[int, ...]
+    reply: CachedReply
+
+
+def near_scope(provider: str, model: Optional[str], prefix_hash: str, sanitizer: str) -> str:
+    """
+    What two questions must share for one's answer to serve the other.
+    ``sanitizer`` names the sanitizer and rule set the stored answer went
+    through, so answers sanitized under replaced rules stop being served.
+    """
+    return "\x1f".join((provider, model or "", prefix_hash, sanitizer))
+
+
+class NearDuplicateCache:
+    """
+    Bounded, thread-safe MinHash/LSH index of answered questions.
+
+    ``num_perm`` hash functions are split into ``bands`` bands; two questions
+    become candidates when one band matches exactly, which (with the
+    defaults, 16 bands of 4) happens for most pairs above about 0.5
+    similarity and few below. Only questions of ``intents`` up to
+    ``max_chars`` long are served: a short conceptual question is about its
+    words, while two error reports or pasted snippets sharing most words can
+    still need different answers.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        *,
+        threshold: float = 0.7,
+        num_perm: int = 64,
+        bands: int = 16,
+        intents: Iterable[Intent] = (Intent.CONCEPT, Intent.UNKNOWN),
+        max_chars: int = 300,
+        seed: int = 1,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        if bands < 1 or num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.bands = bands
+        self.intents = frozenset(intents)
+        self.max_chars = max_chars
+        self._rows = num_perm // bands
+        self._hasher = MinHasher(num_perm, seed)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._buckets: Dict[_BandKey, Set[int]] = {}
+        self._next_id = 0
+        self._hits = 0
+        self._misses = 0
+        self._skipped = 0
+
+    def serves(self, text: str, intent: Any) -> bool:
+        return intent in self.intents and len(text) <= self.max_chars
+
+    def _band_keys(self, scope: str, signature: Tuple[int, ...]) -> List[_BandKey]:
+        r = self._rows
+        return [(scope, i, signature[i * r : (i + 1) * r]) for i in range(self.bands)]
+
+    def get(self, text: str, intent: Any, scope: str) -> CacheLookup:
+        started = time.perf_counter()
+        if not self.serves(text, intent):
+            with self._lock:
+                self._skipped += 1
+            return CacheLookup(None, None, _ms_since(started))
+        signature = self._hasher.signature(question_features(text))
+        keys = self._band_keys(scope, signature) if signature else []
+        best: Optional[Tuple[float, int]] = None
+        with self._lock:
+            candidates: Set[int] = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+            for entry_id in candidates:
+                sim = similarity(signature, self._entries[entry_id].signature)
+                if sim >= self.threshold and (best is None or sim > best[0]):
+                    best = (sim, entry_id)
+            if best is None:
+                self._misses += 1
+                return CacheLookup(None, None, _ms_since(started))
+            self._hits += 1
+            self._entries.move_to_end(best[1])
+            reply = self._entries[best[1]].reply
+        return CacheLookup(reply, "near", _ms_since(started), best[0])
+
+    def put(self, text: str, intent: Any, scope: str, reply: CachedReply) -> None:
+        if not self.serves(text, intent):
+            return
+        signature = self._hasher.signature(question_features(text))
+        if not signature:
+            return
+        keys = self._band_keys(scope, signature)
+        with self._lock:
+            # an identical question replaces its earlier answer
+            for key in keys[:1]:
+                for entry_id in list(self._buckets.get(key, ())):
+                    if self._entries[entry_id].signature == signature:
+                        self._drop(entry_id)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(scope, signature, reply)
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, entry_id: int) -> None:
+        # caller holds the lock
+        entry = self._entries.pop(entry_id)
+        for key in self._band_keys(entry.scope, entry.signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def rebuild(self, store: Any, *, batch_size: int = 1000) -> int:
+        """
+        Index answered questions from ``store`` history (oldest first, so the
+        newest survive the bound). Returns the number of questions indexed.
+
+        Rows are skipped if they were refused, cut off, or were stored before
+        the orchestrator recorded the prompt prefix and sanitizer they were
+        answered under.
+        """
+        indexed = 0
+        for rec in store.iter_conversations(batch_size=batch_size):
+            meta = rec.metadata
+            prefix_hash = (meta.get("prompt") or {}).get("prefix_hash")
+            sanitized_by = meta.get("sanitizer")
+            if not prefix_hash or not sanitized_by:
+                continue
+            if not rec.sanitized_text or rec.llm_raw.get("aborted"):
+                continue
+            try:
+                intent = Intent[rec.intent or ""]
+            except KeyError:
+                continue
+            if not self.serves(rec.user_text, intent):
+                continue
+            scope = near_scope(rec.provider or "", meta.get("model"), prefix_hash, sanitized_by)
+            completion = (meta.get("tokens") or {}).get("completion") or 0
+            reply = CachedReply(rec.sanitized_text, rec.llm_raw, completion)
+            self.put(rec.user_text, intent, scope, reply)
+            indexed += 1
+        logger.info("near-duplicate cache: indexed %d questions from history", indexed)
+        return indexed
+
+    def cache_info(self) -> NearDuplicateCacheInfo:
+        with self._lock:
+            return NearDuplicateCacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                skipped=self._skipped,
+                maxsize=self.maxsize,
+                currsize=len(self._entries),
+                buckets=len(self._buckets),
+            )
+
+    def cache_clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._hits = self._misses = self._skipped = 0
+
+
+def _ms_since(started: float) -> float:
+    return (time.perf_counter() - started) * 1000.0
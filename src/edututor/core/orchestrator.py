@@ -1,19 +1,132 @@
 # src/edututor/core/orchestrator.py
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from dataclasses import dataclass
-from typing import Any, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from concurrent.futures import as_completed as futures_completed
+from dataclasses import dataclass, field, replace
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from edututor.llm import make_provider
 from edututor.persistence.store import ConversationStore
 
 from . import sanitizer, templates
 from .classifiers import ClassifiedIntent, Intent, classify_intent
-from .policy import decide_response
+from .minifier import MinifyLevel, minify_message
+from .near_duplicate import NearDuplicateCache, near_scope
+from .policy import TutorDecision, decide_response
+from .prompts import Prompt, prompt_prefix
+from .response_cache import CachedReply, CacheLookup, ResponseCache, cache_key
+from .sanitizer_rules import current_rules
+from .single_flight import SingleFlight
+from .stream_guard import MAX_CODE_LINES, GuardedReply, aguard_stream, guard_stream
+from .tokens import estimate_tokens, trim_to_tokens
+from .tracebacks import compact_error_text
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+
+def _intent_name(ci: ClassifiedIntent) -> str:
+    return ci.intent.name if hasattr(ci.intent, "name") else str(ci.intent)
+
+
+def _input_metadata(ci: ClassifiedIntent) -> Dict[str, Any]:
+    """Describe the user input from the classifier's measurements (no rescan)."""
+    if ci.features is None:
+        return {}
+    return {"input": ci.features._asdict()}
+
+
+def _error_payload(text: str, ci: ClassifiedIntent) -> Tuple[str, Dict[str, Any]]:
+    """Replace a pasted stack trace with its compact form."""
+    span = ci.features.traceback_span if ci.features is not None else None
+    if ci.features is not None and span is None:
+        # the classifier found no trace line, so there is nothing to compact
+        return text, {}
+    # feature offsets refer to the stripped input
+    compacted = compact_error_text(text.strip() if span else text, span)
+    if not compacted.compacted:
+        return text, {}
+    return compacted.text, {
+        "prompt": {
+            "reduction": "traceback",
+            "original_tokens": compacted.original_tokens,
+            "compacted_tokens": compacted.compacted_tokens,
+        }
+    }
+
+
+def _code_payload(
+    text: str, ci: ClassifiedIntent, level: MinifyLevel, token_budget: Optional[int]
+) -> Tuple[str, Dict[str, Any]]:
+    """Minify the code pasted in a message, keeping its line numbers and the prose."""
+    if ci.features is not None and not ci.features.code_like_ratio:
+        # no line carries code punctuation: prose the minifier would only number
+        return text, {}
+    minified = minify_message(text, level=level, token_budget=token_budget)
+    within_budget = token_budget is None or minified.original_tokens <= token_budget
+    # numbering costs a little; tiny snippets are cheaper as they are
+    if not minified.language or (
+        minified.minified_tokens >= minified.original_tokens and within_budget
+    ):
+        return text, {}
+    return minified.text, {
+        "prompt": {
+            "reduction": "minify",
+            "language": minified.language,
+            "level": minified.level.name,
+            "truncated": minified.truncated,
+            "original_tokens": minified.original_tokens,
+            "compacted_tokens": minified.minified_tokens,
+        }
+    }
+
+
+def _completion_limit(decision: Any, provider: Any) -> Optional[int]:
+    """The tighter of the decision's completion budget and the provider's limit."""
+    limits = [
+        limit
+        for limit in (
+            getattr(decision, "completion_budget", None),
+            getattr(provider, "max_tokens", None),
+        )
+        if isinstance(limit, int)
+    ]
+    return min(limits) if limits else None
+
+
+def _fallback_text() -> str:
+    fallback_fn = getattr(templates, "fallback_message", None)
+    return (
+        fallback_fn()
+        if callable(fallback_fn)
+        else ("Sorry — I couldn't produce a helpful answer. Try rephrasing?")
+    )
+
+
+def sanitize_reply(llm_text: str, sanitize_fn: Optional[Callable[[str], str]] = None) -> str:
+    """The text shown to the learner for a provider reply (never empty)."""
+    sanitized = (sanitize_fn or sanitizer.sanitize)(llm_text)
+    if not sanitized.strip():
+        sanitized = _fallback_text()
+    return sanitized
+
 
 @dataclass
 class OrchestratorResult:
@@ -21,10 +134,346 @@ class OrchestratorResult:
     intent: Optional[Intent] = None
 
 
+@dataclass(frozen=True)
+class BatchResult:
+    # position of the message in the batch
+    index: int
+    text: str
+    result: Optional[OrchestratorResult]
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass(frozen=True)
+class _Request:
+    prompt: Prompt
+    prompt_meta: Dict[str, Any]
+    prompt_budget: Optional[int]
+    completion_limit: Optional[int]
+    trimmed: bool
+    # the learner's text, as near-duplicate questions are matched on it
+    question: str = ""
+    # set when the orchestrator has a response cache or coalesces requests
+    cache_key: Optional[str] = None
+    # set when the orchestrator has a near-duplicate cache
+    near_scope: Optional[str] = None
+    # the sanitizer and rule set the reply goes through (see _sanitizer_tag)
+    sanitizer: str = ""
+
+
+@dataclass(frozen=True)
+class _Reply:
+    llm_raw: Dict[str, Any]
+    # sanitized, for the learner
+    text: str
+    completion_tokens: int
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+def _guarded_reply(
+    guarded: GuardedReply, sanitize_fn: Optional[Callable[[str], str]] = None
+) -> _Reply:
+    if sanitize_fn is not None and not guarded.aborted:
+        # a complete reply goes through the injected sanitizer (or its cache)
+        # like a sent one; a cut-off one keeps the guard's prefix and redirect
+        text = sanitize_reply(guarded.raw_text, sanitize_fn)
+    else:
+        text = guarded.text if guarded.text.strip() else _fallback_text()
+    return _Reply(
+        # "text" is what resanitize reads back
+        llm_raw={"text": guarded.raw_text, "streamed": True, "aborted": guarded.aborted},
+        text=text,
+        completion_tokens=guarded.received_tokens,
+        meta=guarded.metadata(),
+    )
+
+
+def _sanitizer_tag(sanitize_fn: Optional[Callable[[str], str]]) -> str:
+    """Name the sanitizer and active rule set, for cache keys and stored rows."""
+    fn: Any = sanitize_fn or sanitizer.sanitize
+    name = getattr(fn, "__qualname__", None) or type(fn).__qualname__
+    return f"{name}@{current_rules().version}"
+
+
+def _with_meta(reply: _Reply, meta: Dict[str, Any]) -> _Reply:
+    return replace(reply, meta={**reply.meta, **meta}) if meta else reply
+
+
 class Orchestrator:
-    def __init__(self, provider: Any | None = None, store: ConversationStore | None = None) -> None:
+    def __init__(
+        self,
+        provider: Any | None = None,
+        store: ConversationStore | None = None,
+        *,
+        classifier: Callable[..., ClassifiedIntent] = classify_intent,
+        policy: Callable[[ClassifiedIntent], TutorDecision] = decide_response,
+        sanitize_fn: Optional[Callable[[str], str]] = None,
+        code_minify_level: MinifyLevel = MinifyLevel.NORMAL,
+        code_token_budget: Optional[int] = 2000,
+        stream_guard_lines: Optional[int] = MAX_CODE_LINES,
+        executor: Optional[Executor] = None,
+        offload_chars: Optional[int] = 20_000,
+        response_cache: Optional[ResponseCache] = None,
+        near_duplicate_cache: Optional[NearDuplicateCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+    ) -> None:
         self.provider = provider or make_provider()
         self.store = store or ConversationStore()
+        # e.g. an IntentCache to memoize repeated classroom questions
+        self.classifier = classifier
+        # e.g. a PolicyEngine with this deployment's overrides
+        self.policy = policy
+        # e.g. a SanitizeCache so repeated provider replies skip sanitizing;
+        # streamed replies use it too unless the stream guard cut them off
+        self.sanitize_fn = sanitize_fn
+        self.code_minify_level = code_minify_level
+        self.code_token_budget = code_token_budget
+        # providers with stream() are cut off after this many code lines in a
+        # row; None always waits for the full reply
+        self.stream_guard_lines = stream_guard_lines
+        # ahandle_user_message() runs blocking providers and stores here (None
+        # is the event loop's default executor), and classifies and sanitizes
+        # texts of at least offload_chars here too (None never offloads them)
+        self.executor = executor
+        self.offload_chars = offload_chars
+        # replies to questions already answered the same way skip the provider
+        self.response_cache = response_cache
+        # then rephrasings of them (e.g. rebuilt from the store at startup)
+        self.near_duplicate_cache = near_duplicate_cache
+        # identical requests arriving while one is in flight share its reply
+        # (share one SingleFlight between orchestrators to coalesce across them)
+        self.single_flight = single_flight
+
+    def _user_payload(
+        self, text: str, ci: ClassifiedIntent, room: Optional[int] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Shrink the user's text before it is sent to the provider.
+
+        ``room`` is what the prompt budget leaves for the payload; pasted code
+        is minified to fit it rather than cut afterwards.
+
+        Returns the text to send and metadata describing the reduction (empty
+        when nothing was reduced).
+        """
+        if ci.intent == Intent.ERROR:
+            return _error_payload(text, ci)
+        if ci.intent == Intent.EXPLAIN_CODE:
+            budgets = [b for b in (self.code_token_budget, room) if b is not None]
+            return _code_payload(text, ci, self.code_minify_level, min(budgets, default=None))
+        return text, {}
+
+    def _decide(self, text: str, user_hint: Optional[Intent]) -> Tuple[ClassifiedIntent, Any]:
+        ci: ClassifiedIntent = self.classifier(text, user_hint=user_hint)
+        return ci, self.policy(ci)
+
+    def _disallowed_row(self, text: str, ci: ClassifiedIntent) -> Dict[str, Any]:
+        # use templates.disallowed_message() if present, otherwise fallback
+        disallowed_fn = getattr(templates, "disallowed_message", None)
+        out = disallowed_fn() if callable(disallowed_fn) else ("I'm sorry, I can't help with that.")
+        return dict(
+            user_text=text,
+            intent=_intent_name(ci),
+            provider=type(self.provider).__name__,
+            llm_raw={},
+            sanitized_text=out,
+            metadata={
+                "decision": "disallowed",
+                **_input_metadata(ci),
+                "tokens": {"prompt": 0, "completion": 0},
+            },
+        )
+
+    def _prepare(self, text: str, ci: ClassifiedIntent, decision: Any) -> _Request:
+        """The prompt for ``text`` within the decision's prompt budget."""
+        # static system prompt and the decision's scaffold first, the learner's text last
+        prefix = prompt_prefix(decision)
+        prompt_budget = getattr(decision, "prompt_budget", None)
+        room = None if prompt_budget is None else max(prompt_budget - prefix.tokens, 0)
+        payload, payload_meta = self._user_payload(text, ci, room)
+        prompt = Prompt(prefix, payload)
+        trimmed = False
+        if room is not None and prompt.payload_tokens > room:
+            prompt = Prompt(prefix, trim_to_tokens(payload, room))
+            trimmed = True
+        completion_limit = _completion_limit(decision, self.provider)
+        provider_name = type(self.provider).__name__
+        model = getattr(self.provider, "model", None)
+        # cached replies are stored sanitized: a rules reload must change their keys
+        tag = _sanitizer_tag(self.sanitize_fn)
+        key = scope = None
+        if self.response_cache is not None or self.single_flight is not None:
+            key = cache_key(
+                prompt.payload,
+                ci.intent,
+                provider=provider_name,
+                model=model,
+                prefix_hash=prompt.prefix_hash,
+                max_tokens=completion_limit,
+                sanitizer=tag,
+            )
+        near = self.near_duplicate_cache
+        if near is not None and near.serves(text, ci.intent):
+            scope = near_scope(provider_name, model, prompt.prefix_hash, tag)
+        return _Request(
+            prompt=prompt,
+            # the prefix hash shows which requests could reuse a provider-cached prefix
+            prompt_meta={"prefix_hash": prompt.prefix_hash, **payload_meta.get("prompt", {})},
+            prompt_budget=prompt_budget,
+            completion_limit=completion_limit,
+            trimmed=trimmed,
+            question=text,
+            cache_key=key,
+            near_scope=scope,
+            sanitizer=tag,
+        )
+
+    def _lookup(
+        self, req: _Request, ci: ClassifiedIntent
+    ) -> Tuple[Optional[_Reply], Dict[str, Any]]:
+        """A cached reply for ``req`` (or None) and the lookup's metadata."""
+        lookup: Optional[CacheLookup] = None
+        if self.response_cache is not None and req.cache_key is not None:
+            lookup = self.response_cache.get(req.cache_key)
+        near_cache = self.near_duplicate_cache
+        missed = lookup is None or lookup.reply is None
+        if near_cache is not None and req.near_scope is not None and missed:
+            near = near_cache.get(req.question, ci.intent, req.near_scope)
+            # the latency of both tiers
+            spent = lookup.lookup_ms if lookup is not None else 0.0
+            lookup = near._replace(lookup_ms=near.lookup_ms + spent)
+        if lookup is None:
+            return None, {}
+        meta = lookup.metadata()
+        if lookup.reply is None:
+            return None, meta
+        cached = lookup.reply
+        reply = _Reply(
+            llm_raw=cached.llm_raw,
+            text=cached.text,
+            completion_tokens=cached.completion_tokens,
+            meta=meta,
+        )
+        return reply, meta
+
+    def _remember(self, req: _Request, ci: ClassifiedIntent, reply: _Reply) -> None:
+        """Cache a fresh reply."""
+        # cut-off and empty replies are not answers worth repeating
+        answered = not reply.llm_raw.get("aborted") and reply.text != _fallback_text()
+        cached = CachedReply(reply.text, reply.llm_raw, reply.completion_tokens)
+        if self.response_cache is not None and req.cache_key is not None and answered:
+            self.response_cache.put(req.cache_key, ci.intent, cached)
+        near_cache = self.near_duplicate_cache
+        if near_cache is not None and req.near_scope is not None and answered:
+            near_cache.put(req.question, ci.intent, req.near_scope, cached)
+
+    def _fetch(self, req: _Request, ci: ClassifiedIntent) -> Tuple[_Reply, Dict[str, Any]]:
+        """A fresh reply for ``req``, shared with identical requests in flight."""
+
+        def fetch() -> _Reply:
+            reply = self._ask(req, ci)
+            self._remember(req, ci, reply)
+            return reply
+
+        if self.single_flight is None or req.cache_key is None:
+            return fetch(), {}
+        reply, shared = self.single_flight.do(req.cache_key, fetch)
+        return reply, {"coalesced": shared}
+
+    def _streaming(self, name: str) -> Optional[Tuple[Callable[..., Any], int]]:
+        """The provider's ``name`` stream method and the guard's code-line limit,
+        if replies are stream-guarded."""
+        stream_fn = getattr(self.provider, name, None)
+        limit = self.stream_guard_lines
+        if limit is None or not callable(stream_fn):
+            return None
+        return stream_fn, limit
+
+    def _ask(self, req: _Request, ci: ClassifiedIntent) -> _Reply:
+        """Get and sanitize the provider's reply (blocking)."""
+        streaming = self._streaming("stream")
+        if streaming is not None:
+            stream_fn, max_code_lines = streaming
+            guarded = guard_stream(
+                stream_fn(prompt=req.prompt, intent=ci.intent, max_tokens=req.completion_limit),
+                max_code_lines=max_code_lines,
+                max_tokens=req.completion_limit,
+            )
+            return _guarded_reply(guarded, self.sanitize_fn)
+        llm_resp = self.provider.send(
+            prompt=req.prompt, intent=ci.intent, max_tokens=req.completion_limit
+        )
+        return self._finish(llm_resp)
+
+    def _finish(self, llm_resp: Any) -> _Reply:
+        # defensive: providers that return plain strings
+        llm_text = getattr(llm_resp, "text", None) or (
+            llm_resp if isinstance(llm_resp, str) else ""
+        )
+        return _Reply(
+            llm_raw=getattr(llm_resp, "raw", {}) or {},
+            text=sanitize_reply(llm_text, self.sanitize_fn),
+            completion_tokens=estimate_tokens(llm_text),
+        )
+
+    def _row(
+        self, text: str, ci: ClassifiedIntent, decision: Any, req: _Request, reply: _Reply
+    ) -> Dict[str, Any]:
+        model = getattr(self.provider, "model", None)
+        # estimates; providers bill by their own tokenizer
+        tokens = {
+            "prompt": req.prompt.tokens,
+            "prefix": req.prompt.prefix.tokens,
+            "payload": req.prompt.payload_tokens,
+            "completion": reply.completion_tokens,
+            "prompt_budget": req.prompt_budget,
+            "completion_budget": req.completion_limit,
+            "trimmed": req.trimmed,
+        }
+        return dict(
+            user_text=text,
+            intent=_intent_name(ci),
+            provider=type(self.provider).__name__,
+            llm_raw=reply.llm_raw,
+            sanitized_text=reply.text,
+            metadata={
+                "decision": decision.name if hasattr(decision, "name") else str(decision),
+                **_input_metadata(ci),
+                # near_duplicate.rebuild() scopes history by these two
+                **({"model": model} if model else {}),
+                "sanitizer": req.sanitizer,
+                "prompt": req.prompt_meta,
+                **reply.meta,
+                "tokens": tokens,
+            },
+        )
+
+    def _save(self, row: Dict[str, Any]) -> None:
+        try:
+            self.store.save_conversation(**row)
+        except Exception:
+            logger.exception("failed to save conversation (continuing)")
+
+    def _answer(
+        self, text: str, user_hint: Optional[Intent]
+    ) -> Tuple[OrchestratorResult, Dict[str, Any]]:
+        """The result for ``text`` and the row to store for it (not yet saved)."""
+        ci, decision = self._decide(text, user_hint)
+
+        if not decision.allowed:
+            row = self._disallowed_row(text, ci)
+            return OrchestratorResult(text=row["sanitized_text"], intent=ci.intent), row
+
+        req = self._prepare(text, ci, decision)
+        reply, cache_meta = self._lookup(req, ci)
+        if reply is None:
+            reply, flight_meta = self._fetch(req, ci)
+            reply = _with_meta(reply, {**cache_meta, **flight_meta})
+        row = self._row(text, ci, decision, req, reply)
+        return OrchestratorResult(text=reply.text, intent=ci.intent), row
 
     def handle_user_message(
         self,
@@ -32,65 +481,163 @@ class Orchestrator:
         *,
         user_hint: Optional[Intent] = None,
     ) -> OrchestratorResult:
-        ci: ClassifiedIntent = classify_intent(text, user_hint=user_hint)
-        decision: Any = decide_response(ci)
-
-        if getattr(decision, "is_disallowed", False):
-            # use templates.disallowed_message() if present, otherwise fallback
-            disallowed_fn = getattr(templates, "disallowed_message", None)
-            out = (
-                disallowed_fn()
-                if callable(disallowed_fn)
-                else ("I'm sorry, I can't help with that.")
-            )
-            try:
-                self.store.save_conversation(
-                    user_text=text,
-                    intent=ci.intent.name if hasattr(ci.intent, "name") else str(ci.intent),
-                    provider=type(self.provider).__name__,
-                    llm_raw={},
-                    sanitized_text=out,
-                    metadata={"decision": "disallowed"},
-                )
-            except Exception:
-                logger.exception("failed to save disallowed conversation (continuing)")
+        result, row = self._answer(text, user_hint)
+        self._save(row)
+        return result
 
-            return OrchestratorResult(text=out, intent=ci.intent)
+    def _save_many(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            save_many = getattr(self.store, "save_conversations", None)
+            if callable(save_many):
+                save_many(rows)
+            else:
+                for row in rows:
+                    self.store.save_conversation(**row)
+        except Exception:
+            logger.exception("failed to save %d conversations (continuing)", len(rows))
 
-        # build prompt using templates.scaffold_for(ci) if available; otherwise fallback
-        scaffold_fn = getattr(templates, "scaffold_for", None)
-        prompt = scaffold_fn(ci) if callable(scaffold_fn) else text
+    def handle_many(
+        self,
+        messages: Iterable[str],
+        *,
+        max_concurrency: int = 8,
+        user_hint: Optional[Intent] = None,
+        as_completed: bool = False,
+    ) -> Union[List[BatchResult], Iterator[BatchResult]]:
+        """
+        Answer many messages, at most ``max_concurrency`` at a time.
 
-        llm_resp = self.provider.send(prompt=prompt, intent=ci.intent)
+        Returns one :class:`BatchResult` per message, in input order, or an
+        iterator yielding them as they complete if ``as_completed``. A message
+        that fails gets a result carrying its error; the others are unaffected.
+        The answered messages are stored with one batched write once all are
+        done (for ``as_completed``, when the iterator is exhausted or closed).
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        texts = list(messages)
+        results = self._iter_many(texts, max_concurrency, user_hint)
+        if as_completed:
+            return results
+        ordered: List[Optional[BatchResult]] = [None] * len(texts)
+        for res in results:
+            ordered[res.index] = res
+        return cast(List[BatchResult], ordered)
 
-        # defensive: providers that return plain strings
-        llm_text = getattr(llm_resp, "text", None) or (
-            llm_resp if isinstance(llm_resp, str) else ""
+    def _iter_many(
+        self, texts: List[str], max_concurrency: int, user_hint: Optional[Intent]
+    ) -> Iterator[BatchResult]:
+        rows: List[Tuple[int, Dict[str, Any]]] = []
+        pool = ThreadPoolExecutor(
+            max_workers=min(max_concurrency, max(len(texts), 1)),
+            thread_name_prefix="edututor-batch",
         )
-        llm_raw = getattr(llm_resp, "raw", {}) or {}
-
-        sanitized = sanitizer.sanitize(llm_text)
+        try:
+            futures = {
+                pool.submit(self._answer, text, user_hint): i for i, text in enumerate(texts)
+            }
+            for fut in futures_completed(futures):
+                i = futures[fut]
+                try:
+                    result, row = fut.result()
+                except Exception as exc:
+                    logger.warning("batch item %d failed: %r", i, exc)
+                    yield BatchResult(index=i, text=texts[i], result=None, error=exc)
+                    continue
+                rows.append((i, row))
+                yield BatchResult(index=i, text=texts[i], result=result)
+        finally:
+            # an abandoned iterator does not wait for the rest
+            pool.shutdown(wait=True, cancel_futures=True)
+            rows.sort(key=lambda r: r[0])
+            self._save_many([row for _, row in rows])
 
-        if not sanitized.strip():
-            fallback_fn = getattr(templates, "fallback_message", None)
-            sanitized = (
-                fallback_fn()
-                if callable(fallback_fn)
-                else ("Sorry — I couldn't produce a helpful answer. Try rephrasing?")
-            )
+    async def _offload(self, size: int, fn: Callable[..., _T], *args: Any) -> _T:
+        """Run ``fn`` on the executor if ``size`` chars make it worth a thread hop."""
+        if self.offload_chars is None or size < self.offload_chars:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args))
 
+    async def _asave(self, row: Dict[str, Any]) -> None:
         try:
-            self.store.save_conversation(
-                user_text=text,
-                intent=ci.intent.name if hasattr(ci.intent, "name") else str(ci.intent),
-                provider=type(self.provider).__name__,
-                llm_raw=llm_raw,
-                sanitized_text=sanitized,
-                metadata={
-                    "decision": decision.name if hasattr(decision, "name") else str(decision)
-                },
-            )
+            asave = getattr(self.store, "asave_conversation", None)
+            if callable(asave):
+                await asave(**row)
+            else:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(
+                    self.executor, functools.partial(self.store.save_conversation, **row)
+                )
         except Exception:
             logger.exception("failed to save conversation (continuing)")
 
-        return OrchestratorResult(text=sanitized, intent=ci.intent)
+    async def ahandle_user_message(
+        self,
+        text: str,
+        *,
+        user_hint: Optional[Intent] = None,
+    ) -> OrchestratorResult:
+        """
+        :meth:`handle_user_message` for an event loop.
+
+        Async providers (``llm.base.AsyncLLM``) are awaited, streaming with
+        ``astream()`` when they have it; blocking providers run on ``executor``.
+        Classifying and preparing inputs of ``offload_chars`` or more, and
+        sanitizing replies that long, also run on the executor.
+        """
+        ci, decision = await self._offload(len(text), self._decide, text, user_hint)
+
+        if not decision.allowed:
+            row = self._disallowed_row(text, ci)
+            await self._asave(row)
+            return OrchestratorResult(text=row["sanitized_text"], intent=ci.intent)
+
+        req = await self._offload(len(text), self._prepare, text, ci, decision)
+        reply, cache_meta = await self._acache(self._lookup, req, ci)
+        if reply is None:
+            reply, flight_meta = await self._afetch(req, ci)
+            reply = _with_meta(reply, {**cache_meta, **flight_meta})
+        await self._asave(self._row(text, ci, decision, req, reply))
+        return OrchestratorResult(text=reply.text, intent=ci.intent)
+
+    async def _acache(self, fn: Callable[..., _T], *args: Any) -> _T:
+        """Run a cache step, on the executor if the response cache has a disk tier."""
+        if self.response_cache is None or not self.response_cache.blocking:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args))
+
+    async def _afetch(self, req: _Request, ci: ClassifiedIntent) -> Tuple[_Reply, Dict[str, Any]]:
+        """:meth:`_fetch` for an event loop."""
+
+        async def fetch() -> _Reply:
+            reply = await self._aask(req, ci)
+            await self._acache(self._remember, req, ci, reply)
+            return reply
+
+        if self.single_flight is None or req.cache_key is None:
+            return await fetch(), {}
+        reply, shared = await self.single_flight.ado(req.cache_key, fetch)
+        return reply, {"coalesced": shared}
+
+    async def _aask(self, req: _Request, ci: ClassifiedIntent) -> _Reply:
+        streaming = self._streaming("astream")
+        asend = getattr(self.provider, "asend", None)
+        if streaming is not None:
+            astream, max_code_lines = streaming
+            guarded = await aguard_stream(
+                astream(prompt=req.prompt, intent=ci.intent, max_tokens=req.completion_limit),
+                max_code_lines=max_code_lines,
+                max_tokens=req.completion_limit,
+            )
+            size = len(guarded.raw_text) if self.sanitize_fn is not None else 0
+            return await self._offload(size, _guarded_reply, guarded, self.sanitize_fn)
+        if callable(asend):
+            llm_resp = await asend(
+                prompt=req.prompt, intent=ci.intent, max_tokens=req.completion_limit
+            )
+            size = len(getattr(llm_resp, "text", None) or "")
+            return await self._offload(size, self._finish, llm_resp)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._ask, req, ci)
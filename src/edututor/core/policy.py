@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Tuple
+import json
+import logging
+from dataclasses import dataclass, replace
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
 
 from . import templates
 from .classifiers import ClassifiedIntent, Intent
 
+logger = logging.getLogger(__name__)
+
 SYSTEM_PROMPT = """You are EduTutor, a strict but helpful computer science tutor.
 Your mission is to foster deep understanding, not to provide finished solutions or code.
 
@@ -26,6 +32,11 @@ Do not include code blocks or complete functions in your answers.
 """
 
 
+# Distinct classifier reasons remembered per engine; reasons are a small fixed
+# set except for bounded-scan and vector-model ones, which embed numbers.
+_MAX_REASONS = 1024
+
+
 @dataclass(frozen=True)
 class TutorDecision:
     allowed: bool
@@ -34,43 +45,164 @@ class TutorDecision:
     scaffold: str = ""
     # Optionally include a few Socratic questions
     questions: Tuple[str, ...] = ()
+    # Estimated token limits for the whole prompt and for the reply
+    prompt_budget: Optional[int] = None
+    completion_budget: Optional[int] = None
 
 
-def decide_response(ci: ClassifiedIntent) -> TutorDecision:
-    if ci.intent == Intent.DISALLOWED:
-        return TutorDecision(
-            allowed=False,
-            reason=ci.reason,
-        )
+@dataclass(frozen=True)
+class IntentPolicy:
+    """How the tutor answers one intent; deployments override single fields."""
 
-    if ci.intent == Intent.CONCEPT:
-        return TutorDecision(
-            allowed=True,
-            reason=ci.reason,
-            scaffold=templates.CONCEPT_SCAFFOLD,
-            questions=tuple(templates.SOCRATIC_QUESTIONS[:2]),
-        )
+    scaffold: str = ""
+    # the first question_count questions are asked
+    question_count: int = 2
+    questions: Tuple[str, ...] = tuple(templates.SOCRATIC_QUESTIONS)
+    # system prompt and scaffold included; None for no limit
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
 
-    if ci.intent == Intent.ERROR:
-        return TutorDecision(
-            allowed=True,
-            reason=ci.reason,
-            scaffold=templates.ERROR_EXPLANATION_SCAFFOLD,
-            questions=tuple(templates.SOCRATIC_QUESTIONS[:2]),
-        )
 
-    if ci.intent == Intent.EXPLAIN_CODE:
-        return TutorDecision(
-            allowed=True,
-            reason=ci.reason,
-            scaffold=templates.EXPLAIN_CODE_SCAFFOLD,
-            questions=tuple(templates.SOCRATIC_QUESTIONS[:2]),
-        )
+DEFAULT_POLICIES: Dict[Intent, IntentPolicy] = {
+    Intent.CONCEPT: IntentPolicy(
+        scaffold=templates.CONCEPT_SCAFFOLD, prompt_tokens=1500, completion_tokens=400
+    ),
+    # room for a compacted traceback
+    Intent.ERROR: IntentPolicy(
+        scaffold=templates.ERROR_EXPLANATION_SCAFFOLD, prompt_tokens=3000, completion_tokens=500
+    ),
+    # room for a minified snippet (Orchestrator.code_token_budget)
+    Intent.EXPLAIN_CODE: IntentPolicy(
+        scaffold=templates.EXPLAIN_CODE_SCAFFOLD, prompt_tokens=4000, completion_tokens=600
+    ),
+    Intent.DISALLOWED: IntentPolicy(question_count=0, prompt_tokens=1000, completion_tokens=300),
+}
+
+_FIELDS = ("scaffold", "question_count", "questions", "prompt_tokens", "completion_tokens")
+
+
+def _intent_key(key: Union[Intent, str]) -> Intent:
+    if isinstance(key, Intent):
+        intent = key
+    else:
+        try:
+            intent = Intent[str(key).upper()]
+        except KeyError:
+            raise ValueError(f"unknown intent in policy overrides: {key!r}") from None
+    if intent not in DEFAULT_POLICIES:
+        # UNKNOWN input is answered like CONCEPT or EXPLAIN_CODE
+        raise ValueError(f"{intent.name} has no policy of its own")
+    return intent
 
-    # Unknown → treat as concept guidance prompt
-    return TutorDecision(
-        allowed=True,
-        reason="Defaulted to concept-style guidance",
-        scaffold=templates.CONCEPT_SCAFFOLD,
-        questions=tuple(templates.SOCRATIC_QUESTIONS[:2]),
+
+def _override(policy: IntentPolicy, fields: Mapping[str, Any], intent: Intent) -> IntentPolicy:
+    unknown = set(fields) - set(_FIELDS)
+    if unknown:
+        raise ValueError(f"{intent.name}: unknown policy fields {sorted(unknown)}")
+    scaffold = fields.get("scaffold", policy.scaffold)
+    count = fields.get("question_count", policy.question_count)
+    questions = fields.get("questions", policy.questions)
+    if not isinstance(scaffold, str):
+        raise ValueError(f"{intent.name}: scaffold must be a string")
+    if isinstance(count, bool) or not isinstance(count, int) or count < 0:
+        raise ValueError(f"{intent.name}: question_count must be a non-negative integer")
+    if isinstance(questions, str) or not all(isinstance(q, str) for q in questions):
+        raise ValueError(f"{intent.name}: questions must be a list of strings")
+    budgets = {}
+    for name in ("prompt_tokens", "completion_tokens"):
+        value = fields.get(name, getattr(policy, name))
+        valid = isinstance(value, int) and not isinstance(value, bool) and value > 0
+        if value is not None and not valid:
+            raise ValueError(f"{intent.name}: {name} must be a positive integer or null")
+        budgets[name] = value
+    return IntentPolicy(
+        scaffold=scaffold, question_count=count, questions=tuple(questions), **budgets
     )
+
+
+class PolicyEngine:
+    """
+    Decides how to answer a classified input by direct lookup.
+
+    One immutable :class:`TutorDecision` per intent is built up front from
+    ``DEFAULT_POLICIES`` and any per-deployment ``overrides`` (intent name ->
+    any of ``{"scaffold", "question_count", "questions", "prompt_tokens",
+    "completion_tokens"}``). Decisions carry the
+    classifier's reason, so each (intent, reason) pair is built once and the
+    same object is returned for it afterwards.
+
+    Instances are callable like :func:`decide_response`.
+    """
+
+    def __init__(
+        self, overrides: Optional[Mapping[Union[Intent, str], Mapping[str, Any]]] = None
+    ) -> None:
+        policies = dict(DEFAULT_POLICIES)
+        for key, fields in (overrides or {}).items():
+            intent = _intent_key(key)
+            if not isinstance(fields, Mapping):
+                raise ValueError(f"{intent.name}: overrides must be an object")
+            policies[intent] = _override(policies[intent], fields, intent)
+        self.policies: Mapping[Intent, IntentPolicy] = MappingProxyType(policies)
+
+        self._table: Dict[Intent, TutorDecision] = {
+            intent: TutorDecision(
+                allowed=intent != Intent.DISALLOWED,
+                reason="",
+                scaffold=p.scaffold,
+                questions=p.questions[: p.question_count],
+                prompt_budget=p.prompt_tokens,
+                completion_budget=p.completion_tokens,
+            )
+            for intent, p in policies.items()
+        }
+        # Unknown → treat as concept guidance prompt
+        self._guidance = replace(
+            self._table[Intent.CONCEPT], reason="Defaulted to concept-style guidance"
+        )
+        self._decisions: Dict[Tuple[Intent, str], TutorDecision] = {}
+
+    def __call__(self, ci: ClassifiedIntent) -> TutorDecision:
+        return self.decide(ci)
+
+    def decide(self, ci: ClassifiedIntent) -> TutorDecision:
+        key = (ci.intent, ci.reason)
+        decision = self._decisions.get(key)
+        if decision is not None:
+            return decision
+        base = self._table.get(ci.intent)
+        if base is None:
+            return self._guidance
+        decision = replace(base, reason=ci.reason)
+        if len(self._decisions) < _MAX_REASONS:
+            self._decisions[key] = decision
+        return decision
+
+
+def read_policy(path: Union[str, Path]) -> PolicyEngine:
+    """A :class:`PolicyEngine` from a JSON file of per-intent overrides."""
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+    if not isinstance(overrides, dict):
+        raise ValueError(f"{path}: a policy file must hold a JSON object")
+    return PolicyEngine(overrides)
+
+
+_engine = PolicyEngine()
+
+
+def current_policy() -> PolicyEngine:
+    return _engine
+
+
+def set_policy(engine: PolicyEngine) -> PolicyEngine:
+    """Make ``engine`` the one :func:`decide_response` uses; returns the previous one."""
+    global _engine
+    previous, _engine = _engine, engine
+    counts = {intent.name: p.question_count for intent, p in engine.policies.items()}
+    logger.info("tutor policy set; questions per intent: %s", counts)
+    return previous
+
+
+def decide_response(ci: ClassifiedIntent) -> TutorDecision:
+    return _engine.decide(ci)
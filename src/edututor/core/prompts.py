@@ -0,0 +1,164 @@
+# src/edututor/core/prompts.py
+"""
+Provider prompts with a byte-stable prefix.
+
+Providers cache the longest prompt prefix they have seen before, so everything
+that does not depend on the learner's text comes first and is rendered once:
+``policy.SYSTEM_PROMPT`` (shared by every request), then the answer structure
+of the decision (scaffold and Socratic questions, shared by every request with
+that decision). The learner's payload is appended last.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from .policy import SYSTEM_PROMPT
+from .tokens import estimate_tokens
+
+# (scaffold, questions) of a decision
+_Key = Tuple[str, Tuple[str, ...]]
+
+# between the prefix and the payload in the plain-text form of a prompt
+_PAYLOAD_SEPARATOR = "\n\n"
+
+
+@dataclass(frozen=True)
+class PromptPrefix:
+    # rendered in order; the first is the same for every prompt
+    segments: Tuple[str, ...]
+    text: str
+    # BLAKE2b of the UTF-8 prefix: equal hashes mean byte-identical prefixes
+    hash: str
+    # estimated once, with the prefix
+    tokens: int
+
+
+class Prompt(str):
+    """
+    A prompt as the plain text a completion provider receives.
+
+    Being a ``str`` keeps providers that take a string working unchanged; chat
+    providers send :meth:`messages` instead, keeping the prefix as its own
+    system message.
+    """
+
+    prefix: PromptPrefix
+    payload: str
+    payload_tokens: int
+
+    def __new__(cls, prefix: PromptPrefix, payload: str) -> "Prompt":
+        self = super().__new__(cls, prefix.text + _PAYLOAD_SEPARATOR + payload)
+        self.prefix = prefix
+        self.payload = payload
+        self.payload_tokens = estimate_tokens(payload)
+        return self
+
+    @property
+    def prefix_hash(self) -> str:
+        return self.prefix.hash
+
+    @property
+    def tokens(self) -> int:
+        """Estimated prompt tokens (prefix and payload)."""
+        return self.prefix.tokens + self.payload_tokens
+
+    def messages(self) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.prefix.text},
+            {"role": "user", "content": self.payload},
+        ]
+
+
+class PromptCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    currsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _render_structure(scaffold: str, questions: Tuple[str, ...]) -> str:
+    parts = []
+    if scaffold:
+        parts.append("Structure your answer like this:\n" + scaffold)
+    if questions:
+        parts.append(
+            "Close with one or two guiding questions such as:\n"
+            + "\n".join(f"- {q}" for q in questions)
+        )
+    return "\n\n".join(parts)
+
+
+def render_prefix(system_prompt: str, scaffold: str, questions: Tuple[str, ...]) -> PromptPrefix:
+    structure = _render_structure(scaffold, questions)
+    segments = (system_prompt, "\n" + structure) if structure else (system_prompt,)
+    text = "".join(segments)
+    return PromptPrefix(
+        segments=segments,
+        text=text,
+        hash=hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest(),
+        tokens=estimate_tokens(text),
+    )
+
+
+class PromptBuilder:
+    """
+    Builds :class:`Prompt` objects, rendering each distinct prefix once.
+
+    Prefixes are keyed on the decision's scaffold and questions, so decisions
+    that differ only in their reason share one prefix. There is one per
+    policy outcome, so the cache needs no bound.
+    """
+
+    def __init__(self, system_prompt: str = SYSTEM_PROMPT) -> None:
+        self.system_prompt = system_prompt
+        self._lock = threading.Lock()
+        self._prefixes: Dict[_Key, PromptPrefix] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def prefix_for(self, decision: Any) -> PromptPrefix:
+        key = (getattr(decision, "scaffold", ""), tuple(getattr(decision, "questions", ())))
+        with self._lock:
+            prefix = self._prefixes.get(key)
+            if prefix is not None:
+                self._hits += 1
+                return prefix
+            self._misses += 1
+        prefix = render_prefix(self.system_prompt, *key)
+        with self._lock:
+            return self._prefixes.setdefault(key, prefix)
+
+    def build(self, decision: Any, payload: str) -> Prompt:
+        return Prompt(self.prefix_for(decision), payload)
+
+    def cache_info(self) -> PromptCacheInfo:
+        with self._lock:
+            return PromptCacheInfo(self._hits, self._misses, len(self._prefixes))
+
+
+# the prefix of prompts sent without a decision
+STATIC_PREFIX = render_prefix(SYSTEM_PROMPT, "", ())
+
+_builder = PromptBuilder()
+
+
+def prompt_prefix(decision: Any) -> PromptPrefix:
+    """The shared prefix for prompts answered as ``decision`` says."""
+    return _builder.prefix_for(decision)
+
+
+def build_prompt(decision: Any, payload: str) -> Prompt:
+    """A prompt for ``payload`` answered as ``decision`` says (shared prefix cache)."""
+    return _builder.build(decision, payload)
+
+
+def prompt_cache_info() -> PromptCacheInfo:
+    return _builder.cache_info()
@@ -0,0 +1,232 @@
+# src/edututor/core/resanitize.py
+"""
+Re-apply the sanitizer rules to stored conversations.
+
+Rows are streamed in id order and ``sanitized_text`` is recomputed from the
+provider reply kept in ``llm_raw``, exactly as the orchestrator computes it for
+a live reply. Rows whose ``llm_raw`` holds no reply text (refusals, providers
+that do not echo their text) are skipped. A streamed reply the orchestrator
+cut off keeps its redirect after the re-sanitized text. The active rules are
+used unless a rule file is given; either way they are compiled once and handed
+to every worker, so a pool never falls back to the defaults.
+
+Work is fanned out to a process pool in chunks; each chunk's changes are
+written in one transaction, and the id of the last row in a committed chunk is
+the checkpoint to resume from.
+
+Usage:
+    python -m edututor.core.resanitize [--db PATH] [--rules FILE] [--checkpoint FILE]
+                                       [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from edututor.persistence.store import ConversationStore
+
+from . import sanitizer
+from .orchestrator import sanitize_reply
+from .sanitizer_rules import RuleSet, current_rules, read_rules
+from .stream_guard import with_redirect
+
+logger = logging.getLogger(__name__)
+
+# (id, raw reply text, stored sanitized_text, cut off by the stream guard)
+_Row = Tuple[int, str, Optional[str], bool]
+
+# Below this many rows the job runs in-process; starting a pool costs more.
+POOL_THRESHOLD = 2_000
+
+# The rules a pool worker sanitizes with, set once per process by _init_worker.
+_worker_rules: Optional[RuleSet] = None
+
+
+@dataclass(frozen=True)
+class ResanitizeReport:
+    rows: int
+    changed: int
+    skipped: int
+    # id of the last row processed; pass as ``after_id`` to resume
+    last_id: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def reply_text(llm_raw: Dict[str, Any]) -> Optional[str]:
+    """The provider's reply text from a stored ``llm_raw`` payload, if present."""
+    # OpenAI-style chat completion (what OpenAIProvider stores)
+    choices = llm_raw.get("choices")
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        message = choices[0].get("message")
+        if isinstance(message, dict) and message.get("content") is not None:
+            # OpenAIProvider strips the reply before sanitizing it
+            return str(message["content"]).strip()
+    text = llm_raw.get("text")
+    return text if isinstance(text, str) else None
+
+
+def _init_worker(rules: RuleSet) -> None:
+    global _worker_rules
+    _worker_rules = rules
+
+
+def _resanitize_chunk(rows: List[_Row], rules: Optional[RuleSet] = None) -> List[Tuple[int, str]]:
+    """Recompute a chunk; returns (id, new text) for the rows that changed."""
+    rules = rules or _worker_rules or current_rules()
+    sanitize = partial(sanitizer.sanitize, rules=rules)
+    changed: List[Tuple[int, str]] = []
+    for row_id, raw, old, aborted in rows:
+        new = with_redirect(sanitize(raw)) if aborted else sanitize_reply(raw, sanitize)
+        if new != old:
+            changed.append((row_id, new))
+    return changed
+
+
+def _chunked(rows: Iterable[_Row], size: int) -> Iterator[List[_Row]]:
+    it = iter(rows)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+
+def resanitize(
+    store: ConversationStore,
+    *,
+    after_id: int = 0,
+    workers: Optional[int] = None,
+    chunksize: int = 500,
+    min_pool_size: int = POOL_THRESHOLD,
+    dry_run: bool = False,
+    checkpoint: Optional[Path] = None,
+    rules: Optional[RuleSet] = None,
+) -> ResanitizeReport:
+    """
+    Recompute ``sanitized_text`` for every row with id > ``after_id``, under
+    ``rules`` (default: the active rule set).
+
+    At most ``2 * workers`` chunks are in flight and results are consumed in
+    id order, so the archive is streamed rather than loaded. With
+    ``dry_run`` nothing is written and only the counts are reported. If
+    ``checkpoint`` is given, the last committed id is written there after
+    every chunk.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be >= 1")
+    workers = workers or os.cpu_count() or 1
+    rules = rules or current_rules()
+    logger.info("resanitize: rules %s from %s", rules.version, rules.source)
+    start = time.perf_counter()
+    rows = changed = skipped = 0
+    last_id = after_id
+
+    def with_text() -> Iterator[_Row]:
+        nonlocal skipped
+        for row_id, llm_raw, old in store.iter_llm_raw(after_id, batch_size=chunksize):
+            raw = reply_text(llm_raw)
+            if raw is None:
+                skipped += 1
+                continue
+            yield row_id, raw, old, llm_raw.get("aborted") is True
+
+    def commit(chunk: List[_Row], updates: List[Tuple[int, str]]) -> None:
+        nonlocal rows, changed, last_id
+        if not dry_run:
+            store.update_sanitized(updates)
+        rows += len(chunk)
+        changed += len(updates)
+        last_id = chunk[-1][0]
+        if checkpoint is not None and not dry_run:
+            checkpoint.write_text(str(last_id))
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "resanitize: %d rows (%.0f rows/s), %d changed, checkpoint id %d",
+            rows,
+            rows / elapsed if elapsed > 0 else 0.0,
+            changed,
+            last_id,
+        )
+
+    items = with_text()
+    # Peek far enough to decide whether the pool is worth starting.
+    head = list(itertools.islice(items, min_pool_size))
+    chunks = _chunked(itertools.chain(head, items), chunksize)
+    if workers <= 1 or len(head) < min_pool_size:
+        for chunk in chunks:
+            commit(chunk, _resanitize_chunk(chunk, rules))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(rules,)
+        ) as pool:
+            pending: Deque[Tuple[List[_Row], Future[List[Tuple[int, str]]]]] = deque()
+            try:
+                for chunk in itertools.islice(chunks, 2 * workers):
+                    pending.append((chunk, pool.submit(_resanitize_chunk, chunk)))
+                while pending:
+                    chunk, fut = pending.popleft()
+                    updates = fut.result()
+                    for nxt in itertools.islice(chunks, 1):
+                        pending.append((nxt, pool.submit(_resanitize_chunk, nxt)))
+                    commit(chunk, updates)
+            finally:
+                # a worker or a write failed: drop queued work
+                for _, fut in pending:
+                    fut.cancel()
+
+    return ResanitizeReport(
+        rows=rows,
+        changed=changed,
+        skipped=skipped,
+        last_id=last_id,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-sanitize stored conversations.")
+    parser.add_argument("--db", default=None, help="database path (default: ~/.edututor)")
+    parser.add_argument(
+        "--rules", type=Path, default=None, help="JSON rule file (default: the built-in rules)"
+    )
+    parser.add_argument("--after-id", type=int, default=0, help="resume after this row id")
+    parser.add_argument("--checkpoint", type=Path, default=None, help="file holding the last id")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="count changes, write nothing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    after_id = args.after_id
+    if args.checkpoint is not None and args.checkpoint.exists():
+        after_id = max(after_id, int(args.checkpoint.read_text().strip() or 0))
+
+    report = resanitize(
+        ConversationStore(args.db),
+        after_id=after_id,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        dry_run=args.dry_run,
+        checkpoint=args.checkpoint,
+        rules=read_rules(args.rules) if args.rules is not None else None,
+    )
+    print(
+        f"rows {report.rows}  changed {report.changed}  skipped {report.skipped}  "
+        f"{report.rows_per_second:.0f} rows/s  last id {report.last_id}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
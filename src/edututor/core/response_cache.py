@@ -0,0 +1,301 @@
+# src/edututor/core/response_cache.py
+"""
+Exact-match cache of sanitized tutor replies.
+
+The same question answered the same way gets the same reply, so the
+orchestrator looks replies up here before calling the provider. Keys cover
+everything that shapes a reply: the normalized payload, the intent, the
+provider class and model, the prompt prefix hash (the system prompt and the
+decision's scaffold, so editing a template retires its entries) and the
+completion limit.
+
+Entries live in a bounded in-memory LRU and, optionally, a SQLite table
+that survives restarts; each expires after its intent's TTL.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple, Union
+
+from edututor.persistence.db import connect
+
+from .classifiers import Intent
+from .intent_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# seconds; None never expires, 0 never caches
+DEFAULT_TTLS: Dict[Intent, Optional[float]] = {
+    Intent.CONCEPT: 7 * 24 * 3600.0,
+    Intent.EXPLAIN_CODE: 24 * 3600.0,
+    Intent.ERROR: 24 * 3600.0,
+}
+DEFAULT_TTL = 3600.0
+
+# intents whose payload is code: case and indentation are kept
+_CODE_INTENTS = (Intent.EXPLAIN_CODE, Intent.ERROR)
+_TRAILING_SPACE_RE = re.compile(r"[^\S\n]+$", re.MULTILINE)
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS response_cache (
+    key TEXT PRIMARY KEY,
+    intent TEXT,
+    expires_at REAL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_response_cache_expires_at ON response_cache(expires_at);
+"""
+
+
+@dataclass(frozen=True)
+class CachedReply:
+    # sanitized, for the learner
+    text: str
+    llm_raw: Dict[str, Any]
+    completion_tokens: int
+
+
+class CacheLookup(NamedTuple):
+    reply: Optional[CachedReply]
+    # "memory", "disk", "near" (near_duplicate), or None on a miss
+    tier: Optional[str]
+    lookup_ms: float
+    # estimated similarity of a near-duplicate hit
+    similarity: Optional[float] = None
+
+    def metadata(self) -> Dict[str, Any]:
+        meta: Dict[str, Any] = {
+            "hit": self.reply is not None,
+            "tier": self.tier,
+            "lookup_ms": round(self.lookup_ms, 3),
+        }
+        if self.similarity is not None:
+            meta["similarity"] = round(self.similarity, 3)
+        return {"cache": meta}
+
+
+class ResponseCacheInfo(NamedTuple):
+    hits: int
+    # hits served from the SQLite tier (included in hits)
+    disk_hits: int
+    misses: int
+    # entries found but past their TTL (counted as misses)
+    expired: int
+    maxsize: int
+    currsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def normalize_payload(payload: str, intent: Any) -> str:
+    """The payload as it is keyed: prose is folded, code keeps case and indentation."""
+    if intent in _CODE_INTENTS:
+        return _TRAILING_SPACE_RE.sub("", (payload or "").strip())
+    return normalize_text(payload)
+
+
+def cache_key(
+    payload: str,
+    intent: Any,
+    *,
+    provider: str,
+    model: Optional[str],
+    prefix_hash: str,
+    max_tokens: Optional[int],
+    sanitizer: str,
+) -> str:
+    """
+    The key of a reply. ``sanitizer`` names the sanitizer and rule set the
+    reply's text went through, so a rules reload stops old entries matching.
+    """
+    name = intent.name if hasattr(intent, "name") else str(intent)
+    fields = (name, provider, model or "", prefix_hash, str(max_tokens or ""), sanitizer)
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\x1f".join(fields).encode("utf-8"))
+    h.update(b"\x1e")
+    h.update(normalize_payload(payload, intent).encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+def _intent_key(key: Union[Intent, str]) -> Intent:
+    if isinstance(key, Intent):
+        return key
+    try:
+        return Intent[str(key).upper()]
+    except KeyError:
+        raise ValueError(f"unknown intent in response cache TTLs: {key!r}") from None
+
+
+class ResponseCache:
+    """
+    Two-tier, thread-safe cache of replies keyed by :func:`cache_key`.
+
+    ``ttls`` overrides the per-intent lifetimes of ``DEFAULT_TTLS``; intents
+    not listed use ``default_ttl``. ``path`` (a SQLite file, which may be the
+    conversation database) adds the persistent tier: memory misses fall
+    through to it, and its hits are promoted back into memory.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        *,
+        path: Optional[str] = None,
+        ttls: Optional[Mapping[Union[Intent, str], Optional[float]]] = None,
+        default_ttl: Optional[float] = DEFAULT_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.path = path
+        self.default_ttl = default_ttl
+        self._ttls = dict(DEFAULT_TTLS)
+        for intent, ttl in (ttls or {}).items():
+            self._ttls[_intent_key(intent)] = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (reply, expires_at or None)
+        self._entries: OrderedDict[str, Tuple[CachedReply, Optional[float]]] = OrderedDict()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._expired = 0
+        if path is not None:
+            with connect(path) as conn:
+                conn.executescript(_DDL)
+
+    @property
+    def blocking(self) -> bool:
+        """True if lookups may touch the disk."""
+        return self.path is not None
+
+    def ttl_for(self, intent: Any) -> Optional[float]:
+        return self._ttls.get(intent, self.default_ttl)
+
+    def get(self, key: str) -> CacheLookup:
+        started = time.perf_counter()
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                reply, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return CacheLookup(reply, "memory", _ms_since(started))
+                del self._entries[key]
+                self._expired += 1
+        found = self._disk_get(key, now) if self.path is not None else None
+        with self._lock:
+            if found is None:
+                self._misses += 1
+                return CacheLookup(None, None, _ms_since(started))
+            self._hits += 1
+            self._disk_hits += 1
+            self._remember(key, *found)
+        return CacheLookup(found[0], "disk", _ms_since(started))
+
+    def put(self, key: str, intent: Any, reply: CachedReply) -> None:
+        ttl = self.ttl_for(intent)
+        if ttl is not None and ttl <= 0:
+            return
+        expires_at = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            self._remember(key, reply, expires_at)
+        if self.path is not None:
+            value = json.dumps(
+                {
+                    "text": reply.text,
+                    "llm_raw": reply.llm_raw,
+                    "completion_tokens": reply.completion_tokens,
+                }
+            )
+            name = intent.name if hasattr(intent, "name") else str(intent)
+            try:
+                with connect(self.path) as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO response_cache (key, intent, expires_at, value) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, name, expires_at, value),
+                    )
+            except Exception:
+                logger.exception("failed to write response cache entry (continuing)")
+
+    def purge_expired(self) -> int:
+        """Delete expired entries from both tiers; returns how many were on disk."""
+        now = self._clock()
+        with self._lock:
+            stale = [k for k, (_, exp) in self._entries.items() if exp is not None and exp <= now]
+            for key in stale:
+                del self._entries[key]
+        if self.path is None:
+            return 0
+        with connect(self.path) as conn:
+            cur = conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+            return cur.rowcount
+
+    def cache_info(self) -> ResponseCacheInfo:
+        with self._lock:
+            return ResponseCacheInfo(
+                hits=self._hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                expired=self._expired,
+                maxsize=self.maxsize,
+                currsize=len(self._entries),
+            )
+
+    def cache_clear(self) -> None:
+        """Drop all entries (both tiers) and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._disk_hits = self._misses = self._expired = 0
+        if self.path is not None:
+            with connect(self.path) as conn:
+                conn.execute("DELETE FROM response_cache")
+
+    def _remember(self, key: str, reply: CachedReply, expires_at: Optional[float]) -> None:
+        # caller holds the lock
+        self._entries[key] = (reply, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[CachedReply, Optional[float]]]:
+        try:
+            with connect(self.path) as conn:
+                row = conn.execute(
+                    "SELECT expires_at, value FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            if row["expires_at"] is not None and row["expires_at"] <= now:
+                with self._lock:
+                    self._expired += 1
+                return None
+            value = json.loads(row["value"])
+            reply = CachedReply(
+                text=value["text"],
+                llm_raw=value.get("llm_raw") or {},
+                completion_tokens=int(value.get("completion_tokens") or 0),
+            )
+            return reply, row["expires_at"]
+        except Exception:
+            logger.exception("failed to read response cache entry (treated as a miss)")
+            return None
+
+
+def _ms_since(started: float) -> float:
+    return (time.perf_counter() - started) * 1000.0
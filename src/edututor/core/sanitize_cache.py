@@ -0,0 +1,134 @@
+# src/edututor/core/sanitize_cache.py
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Tuple
+
+from . import sanitizer
+from .sanitizer_rules import current_rules
+
+# (rules version, digest of the raw text)
+_Key = Tuple[str, bytes]
+
+
+class SanitizeCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    # lookups whose text exceeded max_entry_bytes and were never stored
+    bypassed: int
+    maxsize: int
+    currsize: int
+    currbytes: int
+    max_bytes: int
+    rules_version: str
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses + self.bypassed
+        return self.hits / lookups if lookups else 0.0
+
+
+def text_digest(text: str) -> bytes:
+    """128-bit BLAKE2b of the text (lone surrogates from a provider included)."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _size_bytes(s: str) -> int:
+    return len(s) if s.isascii() else len(s.encode("utf-8", "surrogatepass"))
+
+
+class SanitizeCache:
+    """
+    Bounded, thread-safe LRU cache in front of :func:`sanitizer.sanitize`.
+
+    Provider replies are keyed on a digest of their exact text plus the
+    version of the active sanitizer rules, so a repeated reply (canned mock answers,
+    cached FAQ answers) skips sanitizing, and a change to the sanitizer rules
+    never serves a result computed under the old ones: the cache empties
+    itself the first time it sees a new version.
+
+    Entries are evicted least-recently-used first when either ``maxsize``
+    entries or ``max_bytes`` of cached output are exceeded; replies larger
+    than ``max_entry_bytes`` are sanitized but never stored.
+
+    Instances are callable with the same signature as ``sanitize``.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        *,
+        max_bytes: int = 8 * 1024 * 1024,
+        max_entry_bytes: int = 64 * 1024,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[_Key, Tuple[str, int]] = OrderedDict()
+        self._version = current_rules().version
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+
+    def __call__(self, text: str) -> str:
+        return self.sanitize(text)
+
+    def sanitize(self, text: str) -> str:
+        # one snapshot, so the result is stored under the rules that made it
+        rules = current_rules()
+        if _size_bytes(text) > self.max_entry_bytes:
+            with self._lock:
+                self._bypassed += 1
+            return sanitizer.sanitize(text, rules)
+
+        version = rules.version
+        key = (version, text_digest(text))
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        # sanitize outside the lock; concurrent misses on one key just race to store
+        result = sanitizer.sanitize(text, rules)
+        size = _size_bytes(result)
+        with self._lock:
+            if key[0] == self._version and key not in self._entries:
+                self._entries[key] = (result, size)
+                self._bytes += size
+                while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+        return result
+
+    def cache_info(self) -> SanitizeCacheInfo:
+        with self._lock:
+            return SanitizeCacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                bypassed=self._bypassed,
+                maxsize=self.maxsize,
+                currsize=len(self._entries),
+                currbytes=self._bytes,
+                max_bytes=self.max_bytes,
+                rules_version=self._version,
+            )
+
+    def cache_clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._bypassed = 0
@@ -2,21 +2,25 @@
 from __future__ import annotations
 
 import re
-from typing import List
+from typing import List, Optional, Tuple
 
-# Fenced code block: ```...```
-_FENCED_CODE_RE = re.compile(r"```.*?```", re.DOTALL)
-# Inline backticks: `...`
-_INLINE_CODE_RE = re.compile(r"`[^`]+`")
+from .sanitizer_rules import RuleSet, current_rules
 
-# heuristics to detect code-like content
-_CODE_LIKE_PATTERNS = [
-    re.compile(r"^\s*def\s+\w+\(", re.MULTILINE),
-    re.compile(r"^\s*class\s+\w+\s*:", re.MULTILINE),
-    re.compile(r"\bfor\s+\w+\s+in\s+", re.IGNORECASE),
-    re.compile(r"\bwhile\s+.*:\b", re.IGNORECASE),
-    re.compile(r"\breturn\b", re.IGNORECASE),
-]
+_FENCE_PLACEHOLDER = "[code omitted — EduTutor does not provide code]"
+_INLINE_PLACEHOLDER = "[code omitted]"
+_REMOVED_PLACEHOLDER = "[content removed: code-like output]"
+
+# Code-likeness is decided by the active sanitizer_rules.RuleSet. Each call
+# (and each StreamingSanitizer) takes one snapshot of it, so a reload never
+# changes the rules halfway through a reply.
+_COLON_WORD_RE = re.compile(r":\b")
+
+
+def __getattr__(name: str) -> str:
+    # RULES_VERSION follows the active rule set
+    if name == "RULES_VERSION":
+        return current_rules().version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def strip_code_blocks(text: str) -> str:
@@ -24,65 +28,467 @@ def strip_code_blocks(text: str) -> str:
     Remove fenced code blocks and inline backtick sections from model output.
     Uses the same placeholders expected by tests.
     """
-    text = _FENCED_CODE_RE.sub("[code omitted — EduTutor does not provide code]", text)
-    text = _INLINE_CODE_RE.sub("[code omitted]", text)
-    return text
+    return _strip(text, _InlineStripper())
 
 
 def strip_inline_code(text: str) -> str:
     """Replace inline backtick-delimited sections with a short placeholder."""
-    return _INLINE_CODE_RE.sub("[code omitted]", text)
+    inline = _InlineStripper()
+    return inline.feed(text) + inline.close()
+
+
+def _strip(text: str, inline: _InlineStripper) -> str:
+    fence = _FenceStripper()
+    return inline.feed(fence.feed(text)) + inline.feed(fence.close()) + inline.close()
 
 
-def detect_code_like(text: str) -> bool:
+def _scan_lines(text: str, rules: RuleSet) -> Tuple[int, int, List[str]]:
     """
-    Heuristic detection for code-like content.
+    One pass over the lines of ``text``.
+
+    Returns the number of non-blank lines, how many of those contain code
+    punctuation, and the stripped lines free of unsafe punctuation. Keywords
+    are left to :func:`_drop_keyword_lines`, which only code-like text needs.
     """
-    lines = [ln for ln in text.splitlines() if ln.strip()]
-    if not lines:
-        return False
+    nonblank = punct = 0
+    candidates: List[str] = []
+    for ln in text.splitlines():
+        ln_stripped = ln.strip()
+        if not ln_stripped:
+            continue
+        nonblank += 1
+        m = rules.any_punct_re.search(ln_stripped)
+        if m is not None:
+            c = m.group()
+            if c in rules.punctuation or rules.punct_re.search(ln_stripped, m.end()):
+                punct += 1
+            if c in rules.unsafe_punctuation or rules.unsafe_punct_re.search(ln_stripped, m.end()):
+                continue
+        if len(ln_stripped) <= rules.max_line_chars:
+            candidates.append(ln_stripped)
+    return nonblank, punct, candidates
 
-    punct_chars = "{};()<>:=[]"
-    punct_count = sum(1 for ln in lines if re.search(f"[{re.escape(punct_chars)}]", ln))
-    punctuation_ratio = punct_count / len(lines)
-    if punctuation_ratio > 0.35:
-        return True
 
-    for pat in _CODE_LIKE_PATTERNS:
-        if pat.search(text):
-            return True
+def _drop_keyword_lines(lines: List[str], rules: RuleSet) -> List[str]:
+    return [ln for ln in lines if not rules.keyword_re.search(ln)]
+
+
+def _has_block_opener(text: str, rules: RuleSet) -> bool:
+    r"""
+    ``re.search(r"\b(?:while|...)\s+.*:\b", text, re.IGNORECASE)`` in linear
+    time, for the rule set's block openers.
 
+    The regex retries ``.*`` to the end of the line from every opener, which
+    is quadratic on a long line of them. A match needs a ":" before a word
+    character on the line where the whitespace after the opener ends, and a
+    later opener on a line already checked cannot find one either.
+    """
+    if rules.block_opener_re is None:
+        return False
+    checked = -1
+    for m in rules.block_opener_re.finditer(text):
+        start = m.end()
+        if start < checked:
+            continue
+        end = text.find("\n", start)
+        if end < 0:
+            end = len(text)
+        if _COLON_WORD_RE.search(text, start, end):
+            return True
+        checked = end
     return False
 
 
-def sanitize(text: str) -> str:
+def _matches_code_pattern(text: str, rules: RuleSet) -> bool:
+    return rules.code_like_re.search(text) is not None or _has_block_opener(text, rules)
+
+
+def _is_code_like(text: str, nonblank: int, punct: int, rules: RuleSet) -> bool:
+    if not nonblank:
+        return False
+    return punct / nonblank > rules.punct_ratio or _matches_code_pattern(text, rules)
+
+
+def detect_code_like(text: str, rules: Optional[RuleSet] = None) -> bool:
+    """
+    Heuristic detection for code-like content.
+    """
+    rules = rules or current_rules()
+    nonblank, punct, _ = _scan_lines(text, rules)
+    return _is_code_like(text, nonblank, punct, rules)
+
+
+def _safe_line(ln: str, rules: RuleSet) -> Optional[str]:
+    """The stripped line if it survives code-like filtering, otherwise None."""
+    ln_stripped = ln.strip()
+    if not ln_stripped or len(ln_stripped) > rules.max_line_chars:
+        return None
+    # drop lines that contain code punctuation or keywords
+    if rules.unsafe_punct_re.search(ln_stripped) or rules.keyword_re.search(ln_stripped):
+        return None
+    return ln_stripped
+
+
+def sanitize(text: str, rules: Optional[RuleSet] = None) -> str:
     """
     Sanitize LLM output so UI never receives raw code.
 
     Steps:
-      1. Replace fenced code blocks with a descriptive placeholder.
+      1. Replace fenced code blocks with a descriptive placeholder. A fence
+         that is never closed runs to the end of the text.
       2. Replace inline backtick sections.
       3. If the result still looks code-like, drop suspicious lines.
-    """
-    t = strip_code_blocks(text)
-    t = strip_inline_code(t)
-
-    if detect_code_like(t):
-        safe_lines: List[str] = []
-        for ln in t.splitlines():
-            ln_stripped = ln.strip()
-            if not ln_stripped:
-                continue
-            if len(ln_stripped) > 300:
-                continue
-            # drop lines that contain code punctuation or keywords
-            if re.search(r"[{};()<>=\[\]]", ln_stripped):
-                continue
-            if re.search(r"\b(return|yield|import|from|def|class)\b", ln_stripped, re.IGNORECASE):
-                continue
-            safe_lines.append(ln_stripped)
-        t = "\n".join(safe_lines).strip()
-        if not t:
-            t = "[content removed: code-like output]"
 
+    Steps 1 and 2 are one scan of the text, and a single pass over the lines
+    both scores code-likeness and collects the lines that may survive.
+    ``rules`` defaults to the active rule set.
+    """
+    rules = rules or current_rules()
+    # inline code is stripped twice, as the original regex passes did
+    t = _strip(text, _InlineStripper(twice=True))
+    nonblank, punct, candidates = _scan_lines(t, rules)
+    if _is_code_like(t, nonblank, punct, rules):
+        return "\n".join(_drop_keyword_lines(candidates, rules)) or _REMOVED_PLACEHOLDER
     return t.strip()
+
+
+# ---------------------------------------------------------------------
+# Streaming
+# ---------------------------------------------------------------------
+# Characters str.splitlines() treats as line boundaries.
+_LINE_BREAK_RE = re.compile(r"[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]")
+# Early code-like detection looks back over this many non-blank lines, enough
+# for every default code pattern to be seen whole (a longer match is still
+# found at close()).
+_DETECT_LOOKBACK_LINES = 3
+
+
+class _FenceStripper:
+    """
+    Incremental fence removal: each ```...``` becomes ``_FENCE_PLACEHOLDER``.
+
+    Every character is looked at once, and nothing but two possible backticks
+    of a fence delimiter is ever held. A fence still open at the end (a reply
+    cut off by max_tokens, or a stray ```) runs to the end of the text.
+    """
+
+    def __init__(self) -> None:
+        # outside a fence: up to two trailing backticks that may start one;
+        # inside: the last two characters (a closing fence may straddle chunks)
+        self._held = ""
+        self._open = False
+        # line breaks seen so far in the body of the open fence
+        self.open_lines = 0
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        data = chunk if self._open else self._held + chunk
+        if not self._open:
+            self._held = ""
+        i, n = 0, len(data)
+        while True:
+            if self._open:
+                end = -1
+                if self._held:
+                    # only ever set at the start of a chunk
+                    k = (self._held + data[:2]).find("```")
+                    if k >= 0:
+                        end = k + 3 - len(self._held)
+                if end < 0:
+                    q = data.find("```", i)
+                    if q >= 0:
+                        end = q + 3
+                if end < 0:
+                    self.open_lines += data.count("\n", i)
+                    self._held = (self._held + data[max(i, n - 2) :])[-2:]
+                    return "".join(out)
+                out.append(_FENCE_PLACEHOLDER)
+                self._open, self._held = False, ""
+                i = end
+            p = data.find("```", i)
+            if p < 0:
+                rest = data[i:]
+                keep = min(len(rest) - len(rest.rstrip("`")), 2)
+                out.append(rest[: len(rest) - keep])
+                self._held = rest[len(rest) - keep :]
+                return "".join(out)
+            out.append(data[i:p])
+            i = p + 3
+            self._open, self.open_lines = True, 0
+
+    def close(self) -> str:
+        out = _FENCE_PLACEHOLDER if self._open else self._held
+        self._held, self._open, self.open_lines = "", False, 0
+        return out
+
+
+class _InlineStripper:
+    """
+    Incremental ``re.sub(r"`[^`]+`", _INLINE_PLACEHOLDER, text)``.
+
+    With ``twice=True`` the result is that of applying the substitution twice,
+    still in one scan: the second pass only sees the backticks the first one
+    left alone, so it is run on those as they are produced.
+    """
+
+    def __init__(self, twice: bool = False) -> None:
+        self._twice = twice
+        # None outside backticks; otherwise the opening backtick and content so far
+        self._parts: Optional[List[str]] = None
+        # the same for the second pass
+        self._outer: Optional[List[str]] = None
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        i, n = 0, len(chunk)
+        while i < n:
+            if self._parts is None:
+                p = chunk.find("`", i)
+                if p < 0:
+                    self._text(out, chunk[i:])
+                    break
+                self._text(out, chunk[i:p])
+                self._parts = ["`"]
+                i = p + 1
+            elif len(self._parts) == 1 and chunk[i] == "`":
+                # "``": the first backtick opens nothing, the second may
+                self._tick(out)
+                i += 1
+            else:
+                q = chunk.find("`", i)
+                if q < 0:
+                    self._parts.append(chunk[i:])
+                    break
+                self._parts = None
+                self._text(out, _INLINE_PLACEHOLDER)
+                i = q + 1
+        return "".join(out)
+
+    def close(self) -> str:
+        out: List[str] = []
+        if self._parts is not None:
+            # unmatched: the backtick and what follows pass through
+            parts, self._parts = self._parts, None
+            self._tick(out)
+            self._text(out, "".join(parts[1:]))
+        if self._outer is not None:
+            out.extend(self._outer)
+            self._outer = None
+        return "".join(out)
+
+    def _text(self, out: List[str], text: str) -> None:
+        """First-pass output without backticks."""
+        if not text:
+            return
+        if self._outer is None:
+            out.append(text)
+        else:
+            self._outer.append(text)
+
+    def _tick(self, out: List[str]) -> None:
+        """A backtick the first pass left in its output."""
+        if not self._twice:
+            out.append("`")
+        elif self._outer is None:
+            self._outer = ["`"]
+        elif len(self._outer) == 1:
+            out.append("`")
+        else:
+            self._outer = None
+            out.append(_INLINE_PLACEHOLDER)
+
+
+class StreamingSanitizer:
+    """
+    Incremental :func:`sanitize` for streamed LLM output.
+
+    ``feed`` returns text that is safe to show now; ``close`` returns the rest.
+    Their concatenation always equals ``sanitize(full_text)``.
+
+    Fences and inline backticks split across chunks are handled by buffering
+    only the unresolved part. Line filtering depends on whether the *whole*
+    reply looks code-like, so until that is known only output that is the same
+    either way is released. Once a code pattern has been seen the reply is
+    code-like for good, and each completed line is filtered and released as it
+    arrives. A reply that never matches a pattern is settled at ``close``.
+    """
+
+    def __init__(self, rules: Optional[RuleSet] = None) -> None:
+        # one rule set for the whole reply, even if the active one is swapped
+        self._rules = rules or current_rules()
+        self._fence = _FenceStripper()
+        # sanitize() strips inline code twice, and so does the stream
+        self._inline = _InlineStripper(twice=True)
+        self._partial: List[str] = []
+        self._emitted = 0
+        self._code_like = False
+        self._closed = False
+        # lines that survive code-like filtering
+        self._safe_count = 0
+        # non-blank lines filtering would drop since the last one it keeps
+        self._unsafe_run = 0
+        # while undecided: all lines and the safe ones, for the final decision
+        self._lines: List[str] = []
+        self._safe_lines: List[str] = []
+        self._recent: List[str] = []
+        # whether _recent starts where "^" can match (after "\n" or at the start)
+        self._recent_at_bol = True
+        # while undecided and both candidate outputs still agree: their parts
+        # beyond what was emitted (None once they differ)
+        self._plain_tail: Optional[List[str]] = []
+        self._code_tail: List[str] = []
+        self._plain_started = False
+        self._plain_ws: List[str] = []
+
+    @property
+    def code_like(self) -> bool:
+        """True once the reply is known to be code-like (it cannot turn back)."""
+        return self._code_like
+
+    @property
+    def withheld_code_lines(self) -> int:
+        """
+        How many lines in a row are being withheld as code right now: the body
+        of a fence still open, after the trailing lines of a code-like reply
+        that filtering drops.
+        """
+        run = self._unsafe_run if self._code_like else 0
+        return run + self._fence.open_lines
+
+    def feed(self, chunk: str) -> str:
+        if self._closed:
+            raise ValueError("feed() after close()")
+        return self._feed_text(self._inline.feed(self._fence.feed(chunk)))
+
+    def close(self) -> str:
+        if self._closed:
+            return ""
+        self._closed = True
+        out = self._feed_text(self._inline.feed(self._fence.close()) + self._inline.close())
+        # what is left may still hold a "\r" line break
+        lines = "".join(self._partial).splitlines(keepends=True)
+        self._partial = []
+        for ln in lines:
+            out += self._line(ln, complete=bool(_LINE_BREAK_RE.match(ln[-1])))
+        return out + self._finish()
+
+    # -- lines --------------------------------------------------------
+    def _feed_text(self, text: str) -> str:
+        if not text:
+            return ""
+        self._partial.append(text)
+        if not _LINE_BREAK_RE.search(text):
+            return ""
+        lines = "".join(self._partial).splitlines(keepends=True)
+        last = lines[-1]
+        # an unterminated line, or a "\r" that may be the first half of "\r\n"
+        if last[-1] == "\r" or not _LINE_BREAK_RE.match(last[-1]):
+            self._partial = [lines.pop()]
+        else:
+            self._partial = []
+        return "".join(self._line(ln) for ln in lines)
+
+    def _line(self, line: str, complete: bool = True) -> str:
+        """Process one line of stripped text (terminator included, if any)."""
+        safe = _safe_line(line, self._rules)
+        code_piece = ""
+        if safe is not None:
+            code_piece = ("\n" if self._safe_count else "") + safe
+            self._safe_count += 1
+            self._unsafe_run = 0
+        elif line.strip():
+            self._unsafe_run += 1
+        if self._code_like:
+            self._emitted += len(code_piece)
+            return code_piece
+
+        self._lines.append(line)
+        if safe is not None:
+            self._safe_lines.append(safe)
+        if complete and self._detect_early(line):
+            return self._switch_to_code_like()
+        if self._plain_tail is None:
+            return ""
+        plain_piece = self._plain_piece(line)
+        if plain_piece:
+            self._plain_tail.append(plain_piece)
+        if code_piece:
+            self._code_tail.append(code_piece)
+        return self._release_common()
+
+    def _plain_piece(self, line: str) -> str:
+        """What this line adds to ``text.strip()``, holding back trailing whitespace."""
+        if not line.strip():
+            if self._plain_started:
+                self._plain_ws.append(line)
+            return ""
+        body = line.rstrip()
+        piece = "".join(self._plain_ws) + body if self._plain_started else body.lstrip()
+        self._plain_started = True
+        self._plain_ws = [line[len(body) :]]
+        return piece
+
+    def _release_common(self) -> str:
+        """Emit the prefix both candidate outputs share."""
+        if not (self._plain_tail and self._code_tail):
+            # one side is behind: nothing to compare yet
+            return ""
+        plain, code = "".join(self._plain_tail), "".join(self._code_tail)
+        n = min(len(plain), len(code))
+        k = n if plain[:n] == code[:n] else 0
+        while k < n and plain[k] == code[k]:
+            k += 1
+        if k < n:
+            self._plain_tail, self._code_tail = None, []
+        else:
+            self._plain_tail = [plain[k:]] if k < len(plain) else []
+            self._code_tail = [code[k:]] if k < len(code) else []
+        self._emitted += k
+        return plain[:k]
+
+    def _detect_early(self, line: str) -> bool:
+        """True if a code pattern matches text that later input cannot change."""
+        if not line.strip():
+            # whitespace completes no pattern. A run of blank lines matches
+            # like a single "\n" if it has one, and like a space otherwise.
+            if self._recent and not self._recent[-1].strip():
+                line = self._recent.pop() + line
+            self._recent.append("\n" if "\n" in line else " ")
+            return False
+        self._recent.append(line)
+        nonblank = 0
+        for i in range(len(self._recent) - 1, -1, -1):
+            if self._recent[i].strip():
+                nonblank += 1
+                if nonblank == _DETECT_LOOKBACK_LINES:
+                    if i:
+                        self._recent_at_bol = self._recent[i - 1].endswith("\n")
+                        del self._recent[:i]
+                    break
+        trigger = self._rules.stream_trigger_re
+        if trigger is not None and not trigger.search(line):
+            return False
+        # "^" only matches after "\n", not after the other splitlines() breaks;
+        # a leading NUL keeps the window from matching at a false line start
+        window = ("" if self._recent_at_bol else "\0") + "".join(self._recent)
+        return _matches_code_pattern(window, self._rules)
+
+    def _switch_to_code_like(self) -> str:
+        self._code_like = True
+        out = "\n".join(self._safe_lines)[self._emitted :]
+        self._emitted += len(out)
+        self._lines, self._safe_lines, self._recent = [], [], []
+        self._plain_tail = None
+        return out
+
+    def _finish(self) -> str:
+        if not self._code_like:
+            full = "".join(self._lines)
+            if not detect_code_like(full, self._rules):
+                return full.strip()[self._emitted :]
+            self._code_like = True
+        if not self._safe_count:
+            return _REMOVED_PLACEHOLDER
+        if self._safe_lines:
+            return "\n".join(self._safe_lines)[self._emitted :]
+        return ""
@@ -0,0 +1,299 @@
+# src/edututor/core/sanitizer_rules.py
+"""
+Declarative code-detection rules for :mod:`edututor.core.sanitizer`.
+
+A rule set is plain data (``DEFAULT_RULES``, or a JSON file overriding any of
+its keys) compiled once into a :class:`RuleSet`: all code patterns become one
+combined alternation, and the punctuation and keyword lists become single
+character classes / alternations.
+
+The active rule set is one module-level reference. :func:`set_rules` swaps it
+atomically; ``sanitize()`` and each ``StreamingSanitizer`` take a snapshot, so
+in-flight work neither blocks nor mixes two rule sets. :class:`RulesWatcher`
+reloads a rule file when it changes; every swap is timed and logged.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Pattern, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# bump when sanitizing logic or placeholders change in a way the rules do not show
+_RULES_REVISION = 1
+
+DEFAULT_RULES: Dict[str, Any] = {
+    # a reply is code-like if more than punct_ratio of its non-blank lines hold
+    # one of these characters...
+    "punctuation": "{};()<>:=[]",
+    "punct_ratio": 0.35,
+    # ...or if any code pattern matches it
+    "code_patterns": {
+        # at a line start, after optional indentation (case-sensitive)
+        "line_start": [r"def\s+\w+\(", r"class\s+\w+\s*:"],
+        # anywhere (case-insensitive)
+        "anywhere": [r"\bfor\s+\w+\s+in\s+", r"\breturn\b"],
+        # the word and whitespace, then ":" before a word character later on
+        # the same line (case-insensitive)
+        "block_openers": ["while"],
+    },
+    # in a code-like reply a line is dropped if it holds one of these
+    # characters, one of the keywords (case-insensitive), or is too long
+    "unsafe_punctuation": "{};()<>=[]",
+    "keywords": ["return", "yield", "import", "from", "def", "class"],
+    "max_line_chars": 300,
+    # streaming only: a code pattern that ends in a line needs a match for this
+    # in that line (case-insensitive). It only decides how early a stream is
+    # settled, never the output; null searches after every line.
+    # Streams search the patterns over the last few lines, so they should not
+    # anchor on \A, \Z or a non-multiline "$".
+    "stream_trigger": r"[(:]|in|return",
+}
+# Entries of line_start / anywhere are pattern strings, or
+# {"pattern": ..., "ignore_case": bool} to override the group's case rule.
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """Compiled rules; never mutated, only replaced."""
+
+    version: str
+    source: str
+    compile_ms: float
+    # every code pattern but the block openers, as one alternation
+    code_like_re: Pattern[str]
+    # r"\b(?:while|...)\s+", or None without block openers
+    block_opener_re: Optional[Pattern[str]]
+    stream_trigger_re: Optional[Pattern[str]]
+    # counted and unsafe punctuation together, then each on its own
+    any_punct_re: Pattern[str]
+    punct_re: Pattern[str]
+    unsafe_punct_re: Pattern[str]
+    punctuation: FrozenSet[str]
+    unsafe_punctuation: FrozenSet[str]
+    keyword_re: Pattern[str]
+    punct_ratio: float
+    max_line_chars: int
+
+
+def _char_class(chars: str) -> str:
+    return "[" + "".join(re.escape(c) for c in chars) + "]" if chars else "(?!)"
+
+
+def _pattern_entries(entries: Any, ignore_case: bool, field: str) -> List[Tuple[str, bool]]:
+    if not isinstance(entries, list):
+        raise ValueError(f"{field} must be a list")
+    out = []
+    for entry in entries:
+        if isinstance(entry, str):
+            pattern, icase = entry, ignore_case
+        elif isinstance(entry, Mapping) and isinstance(entry.get("pattern"), str):
+            pattern, icase = entry["pattern"], bool(entry.get("ignore_case", ignore_case))
+        else:
+            raise ValueError(f"{field}: expected a pattern string or object, got {entry!r}")
+        try:
+            # as it will sit inside the combined alternation
+            re.compile(_scoped(pattern, icase))
+        except re.error as exc:
+            raise ValueError(f"{field}: invalid pattern {pattern!r}: {exc}") from None
+        out.append((pattern, icase))
+    return out
+
+
+def _scoped(pattern: str, ignore_case: bool) -> str:
+    return f"(?i:{pattern})" if ignore_case else f"(?:{pattern})"
+
+
+def compile_rules(spec: Mapping[str, Any], source: str = "<defaults>") -> RuleSet:
+    """
+    Validate and compile a rule spec (``DEFAULT_RULES`` with any keys
+    overridden). Raises ValueError on a malformed spec.
+    """
+    start = time.perf_counter()
+    rules = copy.deepcopy(DEFAULT_RULES)
+    unknown = set(spec) - set(rules)
+    if unknown:
+        raise ValueError(f"unknown sanitizer rule keys: {sorted(unknown)}")
+    rules.update(copy.deepcopy(dict(spec)))
+
+    patterns = rules["code_patterns"]
+    if not isinstance(patterns, Mapping):
+        raise ValueError("code_patterns must be an object")
+    unknown = set(patterns) - set(DEFAULT_RULES["code_patterns"])
+    if unknown:
+        raise ValueError(f"unknown code_patterns keys: {sorted(unknown)}")
+    line_start = _pattern_entries(patterns.get("line_start", []), False, "line_start")
+    anywhere = _pattern_entries(patterns.get("anywhere", []), True, "anywhere")
+    openers = patterns.get("block_openers", [])
+    if not isinstance(openers, list) or not all(isinstance(w, str) and w for w in openers):
+        raise ValueError("block_openers must be a list of words")
+
+    # Leading whitespace stops at "\n" so that a run of blank lines is not
+    # rescanned from every line start.
+    alternatives = [rf"(?m:^[^\S\n]*{_scoped(p, i)})" for p, i in line_start]
+    alternatives += [_scoped(p, i) for p, i in anywhere]
+    code_like_re = re.compile("|".join(alternatives) or "(?!)")
+    block_opener_re = None
+    if openers:
+        words = "|".join(re.escape(w) for w in openers)
+        block_opener_re = re.compile(rf"\b(?:{words})\s+", re.IGNORECASE)
+
+    for key in ("punctuation", "unsafe_punctuation"):
+        if not isinstance(rules[key], str):
+            raise ValueError(f"{key} must be a string of characters")
+    keywords = rules["keywords"]
+    if not isinstance(keywords, list) or not all(isinstance(w, str) and w for w in keywords):
+        raise ValueError("keywords must be a list of words")
+    ratio = rules["punct_ratio"]
+    if not isinstance(ratio, (int, float)) or not 0 <= ratio <= 1:
+        raise ValueError("punct_ratio must be a number between 0 and 1")
+    max_line = rules["max_line_chars"]
+    if not isinstance(max_line, int) or max_line < 1:
+        raise ValueError("max_line_chars must be a positive integer")
+    trigger = rules["stream_trigger"]
+    if trigger is not None and not isinstance(trigger, str):
+        raise ValueError("stream_trigger must be a pattern string or null")
+    try:
+        stream_trigger_re = re.compile(trigger, re.IGNORECASE) if trigger is not None else None
+    except re.error as exc:
+        raise ValueError(f"stream_trigger: invalid pattern {trigger!r}: {exc}") from None
+
+    canonical = json.dumps(rules, sort_keys=True, ensure_ascii=False)
+    version = hashlib.blake2b(
+        f"{_RULES_REVISION}\n{canonical}".encode("utf-8"), digest_size=8
+    ).hexdigest()
+    kw = "|".join(re.escape(w) for w in keywords)
+    return RuleSet(
+        version=version,
+        source=source,
+        compile_ms=(time.perf_counter() - start) * 1e3,
+        code_like_re=code_like_re,
+        block_opener_re=block_opener_re,
+        stream_trigger_re=stream_trigger_re,
+        any_punct_re=re.compile(_char_class(rules["punctuation"] + rules["unsafe_punctuation"])),
+        punct_re=re.compile(_char_class(rules["punctuation"])),
+        unsafe_punct_re=re.compile(_char_class(rules["unsafe_punctuation"])),
+        punctuation=frozenset(rules["punctuation"]),
+        unsafe_punctuation=frozenset(rules["unsafe_punctuation"]),
+        keyword_re=re.compile(rf"\b(?:{kw})\b" if kw else "(?!)", re.IGNORECASE),
+        punct_ratio=float(ratio),
+        max_line_chars=max_line,
+    )
+
+
+def read_rules(path: Union[str, Path]) -> RuleSet:
+    """Compile a JSON rule file; its keys override ``DEFAULT_RULES``."""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise ValueError(f"{path}: a rule file must hold a JSON object")
+    return compile_rules(spec, source=str(path))
+
+
+# ---------------------------------------------------------------------
+# Active rule set
+# ---------------------------------------------------------------------
+_active: RuleSet = compile_rules(DEFAULT_RULES)
+_swap_lock = threading.Lock()
+
+
+def current_rules() -> RuleSet:
+    return _active
+
+
+def set_rules(rules: RuleSet) -> RuleSet:
+    """Make ``rules`` the active rule set; returns the one it replaced."""
+    global _active
+    start = time.perf_counter()
+    with _swap_lock:
+        previous, _active = _active, rules
+    logger.info(
+        "sanitizer rules %s -> %s from %s (compiled in %.2f ms, swapped in %.3f ms)",
+        previous.version,
+        rules.version,
+        rules.source,
+        rules.compile_ms,
+        (time.perf_counter() - start) * 1e3,
+    )
+    return previous
+
+
+def load_rules(path: Union[str, Path]) -> RuleSet:
+    """Compile a rule file and make it active. On error the active rules stay."""
+    rules = read_rules(path)
+    set_rules(rules)
+    return rules
+
+
+def reset_rules() -> RuleSet:
+    """Go back to ``DEFAULT_RULES``."""
+    rules = compile_rules(DEFAULT_RULES)
+    set_rules(rules)
+    return rules
+
+
+class RulesWatcher:
+    """
+    Reload a rule file whenever it changes.
+
+    ``check()`` compares the file's size and modification time with the last
+    load and reloads on a difference; ``start()`` runs it every ``interval``
+    seconds on a daemon thread. A file that fails to parse or compile is
+    logged and skipped, and the rules in use stay active.
+    """
+
+    def __init__(self, path: Union[str, Path], interval: float = 2.0) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check; True if new rules are active."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            logger.warning("sanitizer rule file %s is missing; keeping current rules", self.path)
+            return False
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            load_rules(self.path)
+        except (OSError, ValueError) as exc:
+            logger.error(
+                "sanitizer rules in %s rejected, keeping current rules: %s", self.path, exc
+            )
+            return False
+        return True
+
+    def start(self) -> "RulesWatcher":
+        self.check()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sanitizer-rules-watcher", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
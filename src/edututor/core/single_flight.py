@@ -0,0 +1,122 @@
+# src/edututor/core/single_flight.py
+"""
+Coalesce identical in-flight requests.
+
+When a lecture ends, many students paste the same error within seconds. With
+a :class:`SingleFlight`, the first call for a key does the work and every
+call for the same key that arrives while it is running waits for, and
+shares, its result instead of repeating it. Threads and coroutines share one
+table of in-flight calls (each is a ``concurrent.futures.Future``), so a
+thread can wait on work a coroutine started and the other way round.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Awaitable, Callable, Dict, NamedTuple, Tuple, TypeVar
+
+_T = TypeVar("_T")
+
+
+class SingleFlightInfo(NamedTuple):
+    # calls that did the work
+    leaders: int
+    # calls that waited for a leader and shared its result
+    shared: int
+    in_flight: int
+
+    @property
+    def share_rate(self) -> float:
+        calls = self.leaders + self.shared
+        return self.shared / calls if calls else 0.0
+
+
+class SingleFlight:
+    """
+    Thread-safe and asyncio-safe table of in-flight calls by key.
+
+    A leader's exception is raised in the calls that shared it, as its
+    result would have been returned. If the leader is cancelled (its task or
+    thread gave up), the waiting calls start over and one of them leads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, concurrent.futures.Future] = {}
+        self._leaders = 0
+        self._shared = 0
+
+    def _join(self, key: str) -> Tuple[concurrent.futures.Future, bool]:
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                self._shared += 1
+                return fut, False
+            fut = concurrent.futures.Future()
+            self._calls[key] = fut
+            self._leaders += 1
+            return fut, True
+
+    def _leave(self, key: str, fut: concurrent.futures.Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is fut:
+                del self._calls[key]
+
+    def do(self, key: str, fn: Callable[[], _T]) -> Tuple[_T, bool]:
+        """``fn()``, or the result of the call for ``key`` already running; and
+        whether the result was shared."""
+        while True:
+            fut, leader = self._join(key)
+            if not leader:
+                try:
+                    return fut.result(), True
+                except concurrent.futures.CancelledError:
+                    continue
+            try:
+                result = fn()
+            except BaseException as exc:
+                _fail(fut, exc)
+                raise
+            else:
+                fut.set_result(result)
+                return result, False
+            finally:
+                self._leave(key, fut)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[_T]]) -> Tuple[_T, bool]:
+        """:meth:`do` for a coroutine function; waiting does not block the loop."""
+        while True:
+            fut, leader = self._join(key)
+            if not leader:
+                waiter = asyncio.wrap_future(fut)
+                try:
+                    # shielded, so cancelling this call does not cancel the leader
+                    return await asyncio.shield(waiter), True
+                except asyncio.CancelledError:
+                    if fut.cancelled():
+                        continue
+                    raise
+            try:
+                result = await fn()
+            except BaseException as exc:
+                _fail(fut, exc)
+                raise
+            else:
+                fut.set_result(result)
+                return result, False
+            finally:
+                self._leave(key, fut)
+
+    def info(self) -> SingleFlightInfo:
+        with self._lock:
+            return SingleFlightInfo(self._leaders, self._shared, len(self._calls))
+
+
+def _fail(fut: concurrent.futures.Future, exc: BaseException) -> None:
+    if isinstance(exc, (asyncio.CancelledError, KeyboardInterrupt, SystemExit)):
+        # the work was abandoned rather than failed: waiting calls retry
+        fut.cancel()
+    else:
+        fut.set_exception(exc)
@@ -0,0 +1,175 @@
+# src/edututor/core/stream_guard.py
+"""
+Stop a streamed provider reply as soon as it turns into a code dump.
+
+Without streaming, every token of a code dump is generated and paid for, then
+thrown away by :func:`sanitizer.sanitize`. :func:`guard_stream` runs the
+reply through :class:`sanitizer.StreamingSanitizer` as it arrives and, once
+``max_code_lines`` lines in a row are being withheld as code (an open fence,
+or filtered lines of a reply already known to be code-like), closes the
+provider's stream, which ends the request. The learner gets the sanitized
+text received so far followed by ``templates.CODE_REDIRECT``.
+
+A reply that is never cut off gets exactly ``sanitize(full_text)``.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional
+
+from . import templates
+from .sanitizer import StreamingSanitizer
+from .sanitizer_rules import RuleSet
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Consecutive withheld code lines after which a reply is a code dump. A short
+# snippet in an otherwise conceptual answer stays below it.
+MAX_CODE_LINES = 10
+
+
+@dataclass(frozen=True)
+class GuardedReply:
+    # sanitized text for the learner (redirect included if aborted)
+    text: str
+    # provider text received before the stream ended or was closed
+    raw_text: str
+    aborted: bool
+    received_tokens: int
+    # tokens left of max_tokens when the stream was closed (0 if it was not);
+    # None if the limit is unknown
+    tokens_saved: Optional[int]
+    code_lines: int
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "stream": {
+                "aborted": self.aborted,
+                "received_tokens": self.received_tokens,
+                "tokens_saved": self.tokens_saved,
+                "code_lines": self.code_lines,
+            }
+        }
+
+
+def with_redirect(text: str) -> str:
+    """The sanitized text of a cut-off reply, followed by the redirect."""
+    return f"{text}\n\n{templates.CODE_REDIRECT}" if text else templates.CODE_REDIRECT
+
+
+class _Guard:
+    """The state of one guarded stream, shared by the sync and async loops."""
+
+    def __init__(
+        self,
+        max_code_lines: int,
+        max_tokens: Optional[int],
+        rules: Optional[RuleSet],
+        on_text: Optional[Callable[[str], None]],
+    ) -> None:
+        if max_code_lines < 1:
+            raise ValueError("max_code_lines must be >= 1")
+        self.max_code_lines = max_code_lines
+        self.max_tokens = max_tokens
+        self.on_text = on_text
+        self.sanitizer = StreamingSanitizer(rules)
+        self.received: List[str] = []
+        self.shown: List[str] = []
+        self.code_lines = 0
+
+    def show(self, piece: str) -> None:
+        if piece:
+            self.shown.append(piece)
+            if self.on_text is not None:
+                self.on_text(piece)
+
+    def feed(self, chunk: str) -> bool:
+        """Take a chunk; True once the reply is a code dump."""
+        self.received.append(chunk)
+        self.show(self.sanitizer.feed(chunk))
+        self.code_lines = max(self.code_lines, self.sanitizer.withheld_code_lines)
+        return self.code_lines >= self.max_code_lines
+
+    def reply(self, aborted: bool) -> GuardedReply:
+        # sanitized text of everything received, cut off or not
+        self.show(self.sanitizer.close())
+        raw_text = "".join(self.received)
+        received_tokens = estimate_tokens(raw_text)
+        tokens_saved: Optional[int] = 0
+        if aborted:
+            prefix = "".join(self.shown)
+            self.show(with_redirect(prefix)[len(prefix) :])
+            max_tokens = self.max_tokens
+            tokens_saved = None if max_tokens is None else max(max_tokens - received_tokens, 0)
+            logger.info(
+                "stream guard: closed reply after %d code lines (%d tokens received, %s saved)",
+                self.code_lines,
+                received_tokens,
+                "unknown" if tokens_saved is None else tokens_saved,
+            )
+        return GuardedReply(
+            text="".join(self.shown),
+            raw_text=raw_text,
+            aborted=aborted,
+            received_tokens=received_tokens,
+            tokens_saved=tokens_saved,
+            code_lines=self.code_lines,
+        )
+
+
+def guard_stream(
+    chunks: Iterable[str],
+    *,
+    max_code_lines: int = MAX_CODE_LINES,
+    max_tokens: Optional[int] = None,
+    rules: Optional[RuleSet] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> GuardedReply:
+    """
+    Consume a provider stream, sanitizing it as it arrives.
+
+    ``chunks`` is closed (if it has ``close()``, as generators do) when this
+    returns, aborted or not. ``on_text`` receives each piece of safe text as
+    soon as it is released. ``max_tokens`` is the generation limit of the
+    request, used to estimate the tokens saved by aborting.
+    """
+    guard = _Guard(max_code_lines, max_tokens, rules, on_text)
+    aborted = False
+    it = iter(chunks)
+    try:
+        for chunk in it:
+            if guard.feed(chunk):
+                aborted = True
+                break
+    finally:
+        close = getattr(it, "close", None)
+        if callable(close):
+            close()
+    return guard.reply(aborted)
+
+
+async def aguard_stream(
+    chunks: AsyncIterable[str],
+    *,
+    max_code_lines: int = MAX_CODE_LINES,
+    max_tokens: Optional[int] = None,
+    rules: Optional[RuleSet] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> GuardedReply:
+    """:func:`guard_stream` for an async stream, closed with ``aclose()``."""
+    guard = _Guard(max_code_lines, max_tokens, rules, on_text)
+    aborted = False
+    it = aiter(chunks)
+    try:
+        async for chunk in it:
+            if guard.feed(chunk):
+                aborted = True
+                break
+    finally:
+        aclose = getattr(it, "aclose", None)
+        if callable(aclose):
+            await aclose()
+    return guard.reply(aborted)
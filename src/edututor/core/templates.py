@@ -30,6 +30,13 @@ SOCRATIC_QUESTIONS = [
     "How will you verify correctness (invariants, test cases)?",
 ]
 
+# Appended when a streamed reply is cut off because it turned into code:
+CODE_REDIRECT = (
+    "I stopped there — the answer was turning into finished code, which EduTutor won’t "
+    "write for you. Let’s work it out together instead: which step would you like to "
+    "reason through first?"
+)
+
 # Response scaffolds (not code) for allowed intents:
 CONCEPT_SCAFFOLD = (
     "Here’s the idea in plain words, then an analogy, and then a quick mental model.\n"
@@ -0,0 +1,402 @@
+# src/edututor/core/tracebacks.py
+"""
+Compact pasted stack traces / compiler output before they reach the provider.
+
+A 300-frame traceback costs many tokens and tells the tutor little more than
+the exception, its message and the few innermost frames in the learner's own
+code. ``compact_error_text`` keeps exactly that (plus a de-duplicated frame
+summary) and leaves the learner's surrounding question untouched.
+
+Supported: Python tracebacks, Java/JVM stack traces, JavaScript (V8/Node)
+stack traces, and GCC/Clang-style compiler and linker diagnostics.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+from .classifiers import traceback_span
+from .tokens import estimate_tokens
+
+# ---------------------------------------------------------------------
+# Data model
+# ---------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Frame:
+    file: str
+    line: Optional[int]
+    # function name; for compiler output, the diagnostic ("error: ...")
+    function: str = ""
+    # source line quoted by the trace (Python), if any
+    source: str = ""
+    # consecutive identical calls folded into this frame (recursion)
+    repeat: int = 1
+
+    def location(self) -> str:
+        where = f"{self.file}:{self.line}" if self.line is not None else self.file
+        return f"{where} in {self.function}" if self.function else where
+
+
+@dataclass(frozen=True)
+class ParsedTraceback:
+    language: str
+    exc_type: str
+    message: str
+    # outermost call first, innermost last; compiler diagnostics in output order
+    frames: Tuple[Frame, ...] = ()
+    # exceptions this one was raised while handling / wrapped by, outermost first
+    context: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class CompactedText:
+    text: str
+    original_tokens: int
+    compacted_tokens: int
+    # None when nothing was recognized or compaction would not save anything
+    parsed: Optional[ParsedTraceback] = field(default=None, compare=False)
+
+    @property
+    def compacted(self) -> bool:
+        return self.parsed is not None
+
+
+# ---------------------------------------------------------------------
+# Patterns
+# ---------------------------------------------------------------------
+_PY_HEADER_RE = re.compile(r"^[ \t]*Traceback \(most recent call last\):[ \t]*$")
+_PY_FRAME_RE = re.compile(
+    r'^[ \t]*File "(?P<file>[^"\n]+)", line (?P<line>\d+)(?:, in (?P<func>.+))?$'
+)
+_PY_REPEAT_RE = re.compile(r"^[ \t]*\[Previous line repeated (?P<n>\d+) more times?\]$")
+_PY_EXC_RE = re.compile(r"^(?P<type>[A-Za-z_][\w.]*)(?::[ \t]*(?P<msg>.*))?$")
+_PY_CARETS = frozenset("^~ ")
+
+_JAVA_FRAME_RE = re.compile(
+    r"^[ \t]*at (?P<func>[\w$.<>/]+)\((?P<file>[^:()\n]+)(?::(?P<line>\d+))?\)[ \t]*$"
+)
+_JAVA_EXC_RE = re.compile(
+    r"^[ \t]*(?:Exception in thread \"[^\"]*\" |Caused by: )?"
+    r"(?P<type>[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)+|[A-Za-z_$]*(?:Exception|Error))"
+    r"(?::[ \t]*(?P<msg>.*))?$"
+)
+_JAVA_MORE_RE = re.compile(r"^[ \t]*\.\.\. (?P<n>\d+) (?:more|common frames omitted)[ \t]*$")
+
+_JS_FRAME_RE = re.compile(
+    r"^[ \t]*at (?:(?P<func>.+?) \()?(?P<file>[^()\s]+?):(?P<line>\d+):\d+\)?[ \t]*$"
+)
+_JS_EXC_RE = re.compile(r"^(?:Uncaught )?(?P<type>[A-Z]\w*(?:Error|Exception)):[ \t]*(?P<msg>.*)$")
+
+_CC_DIAG_RE = re.compile(
+    r"^(?P<file>[^\s:][^:\n]*?):(?P<line>\d+)(?::\d+)?:[ \t]*"
+    r"(?P<kind>fatal error|error|warning|note):[ \t]*(?P<msg>.*)$"
+)
+_LINK_ERR_RE = re.compile(r"undefined reference to [`'\"](?P<sym>[^`'\"]+)[`'\"]")
+
+# lines that belong to a trace without being trace lines the classifier marks:
+# compiler context before the first diagnostic, and excerpts / elisions after
+_LEADING_CONTEXT_RE = re.compile(r"^(?:In file included from .*|[^\s:][^:\n]*: In .*:)$")
+_TRAILING_CONTEXT_RE = re.compile(
+    r"^(?:[ \t]*\.\.\. \d+ (?:more|common frames omitted)|[ \t]*\d*[ \t]*\|.*|"
+    r"[ \t]*\^[~^ ]*|[^\s:][^:\n]*:\d+(?::\d+)?:[ \t]*(?:warning|note):.*)[ \t]*$"
+)
+
+# frames from the language runtime / third-party packages
+_LIBRARY_HINTS = (
+    "site-packages",
+    "dist-packages",
+    "/lib/python",
+    "\\lib\\python",
+    "<frozen ",
+    "node_modules",
+    "node:internal",
+    "internal/",
+)
+_JAVA_LIBRARY_PREFIXES = (
+    "java.",
+    "javax.",
+    "jdk.",
+    "sun.",
+    "com.sun.",
+    "kotlin.",
+    "scala.",
+    "org.junit.",
+    "org.springframework.",
+    "org.apache.",
+)
+
+# ---------------------------------------------------------------------
+# Parsers (each returns None if the text is not in its format)
+# ---------------------------------------------------------------------
+
+
+def _is_caret_line(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and set(stripped) <= _PY_CARETS
+
+
+def _python_block(lines: List[str], start: int, stop: int) -> Tuple[str, str, List[Frame]]:
+    """Frames and exception of the traceback whose header is ``lines[start]``."""
+    frames: List[Frame] = []
+    i = start + 1
+    while i < stop:
+        ln = lines[i]
+        m = _PY_FRAME_RE.match(ln)
+        r = _PY_REPEAT_RE.match(ln)
+        if m:
+            source = ""
+            nxt = lines[i + 1] if i + 1 < stop else ""
+            if nxt[:1] in (" ", "\t") and not (_PY_FRAME_RE.match(nxt) or _PY_REPEAT_RE.match(nxt)):
+                source = nxt.strip()
+                i += 1
+                # skip the ^^^/~~~ markers added by Python 3.11+
+                while i + 1 < stop and _is_caret_line(lines[i + 1]):
+                    i += 1
+            func = (m.group("func") or "").strip()
+            frames.append(Frame(m.group("file"), int(m.group("line")), func, source))
+        elif r and frames:
+            last = frames[-1]
+            frames[-1] = replace(last, repeat=last.repeat + int(r.group("n")))
+        elif ln and not ln[0].isspace() and frames:
+            e = _PY_EXC_RE.match(ln)
+            if e:
+                return e.group("type"), (e.group("msg") or "").strip(), frames
+        i += 1
+    return "Exception", "", frames
+
+
+def _parse_python(lines: List[str]) -> Optional[ParsedTraceback]:
+    headers = [i for i, ln in enumerate(lines) if _PY_HEADER_RE.match(ln)]
+    if not headers:
+        return None
+    # chained tracebacks: the last one is the exception that escaped
+    bounds = list(zip(headers, headers[1:] + [len(lines)]))
+    context = []
+    for start, stop in bounds[:-1]:
+        exc_type, message, _ = _python_block(lines, start, stop)
+        context.append(f"{exc_type}: {message}" if message else exc_type)
+    exc_type, message, frames = _python_block(lines, *bounds[-1])
+    if not frames:
+        return None
+    return ParsedTraceback("python", exc_type, message, tuple(frames), tuple(context))
+
+
+def _parse_java(lines: List[str]) -> Optional[ParsedTraceback]:
+    # (type, message, frames innermost first, frames shared with the enclosing trace)
+    blocks: List[Tuple[str, str, List[Frame], int]] = []
+    for ln in lines:
+        f = _JAVA_FRAME_RE.match(ln)
+        if f and blocks:
+            line = f.group("line")
+            frame = Frame(f.group("file"), int(line) if line else None, f.group("func"))
+            blocks[-1][2].append(frame)
+            continue
+        more = _JAVA_MORE_RE.match(ln)
+        if more and blocks:
+            type_, msg, frames, _ = blocks[-1]
+            blocks[-1] = (type_, msg, frames, int(more.group("n")))
+            continue
+        e = _JAVA_EXC_RE.match(ln)
+        if e:
+            blocks.append((e.group("type"), (e.group("msg") or "").strip(), [], 0))
+    blocks = [b for b in blocks if b[2]]
+    if not blocks:
+        return None
+    # "Caused by" chains end in the root cause; its stack is its own frames
+    # followed by the last "... N more" frames of each enclosing trace
+    stack = list(blocks[0][2])
+    for _, _, frames, shared in blocks[1:]:
+        stack = frames + (stack[len(stack) - shared :] if shared else [])
+    exc_type, message = blocks[-1][0], blocks[-1][1]
+    context = tuple(f"{t}: {m}" if m else t for t, m, _, _ in blocks[:-1])
+    return ParsedTraceback("java", exc_type, message, tuple(reversed(stack)), context)
+
+
+def _parse_js(lines: List[str]) -> Optional[ParsedTraceback]:
+    exc_type, message = "", ""
+    frames: List[Frame] = []
+    for ln in lines:
+        f = _JS_FRAME_RE.match(ln)
+        if f:
+            if exc_type:
+                func = (f.group("func") or "").strip()
+                frames.append(Frame(f.group("file"), int(f.group("line")), func))
+            continue
+        e = _JS_EXC_RE.match(ln.strip())
+        if e and not frames:
+            exc_type, message = e.group("type"), e.group("msg").strip()
+        elif frames:
+            break
+    if not exc_type or not frames:
+        return None
+    return ParsedTraceback("javascript", exc_type, message, tuple(reversed(frames)))
+
+
+def _parse_compiler(lines: List[str]) -> Optional[ParsedTraceback]:
+    frames: List[Frame] = []
+    first_error: Optional[str] = None
+    link_errors: List[str] = []
+    for ln in lines:
+        d = _CC_DIAG_RE.match(ln.strip())
+        if d:
+            kind, msg = d.group("kind"), d.group("msg").strip()
+            frames.append(Frame(d.group("file"), int(d.group("line")), f"{kind}: {msg}"))
+            if first_error is None and kind.endswith("error"):
+                first_error = msg
+            continue
+        link = _LINK_ERR_RE.search(ln)
+        if link:
+            link_errors.append(link.group("sym"))
+    if first_error is not None:
+        return ParsedTraceback("c/c++", "compiler error", first_error, tuple(frames))
+    if link_errors:
+        symbols = ", ".join(dict.fromkeys(link_errors))
+        return ParsedTraceback("c/c++", "linker error", f"undefined reference to {symbols}")
+    return None
+
+
+_PARSERS = (_parse_python, _parse_java, _parse_js, _parse_compiler)
+
+
+def parse_traceback(text: str) -> Optional[ParsedTraceback]:
+    """Recognize and parse one stack trace / diagnostic block in ``text``."""
+    lines = [ln.rstrip() for ln in text.splitlines()]
+    for parser in _PARSERS:
+        parsed = parser(lines)
+        if parsed is not None:
+            return parsed
+    return None
+
+
+# ---------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------
+def _is_user_frame(frame: Frame, language: str) -> bool:
+    if language == "java":
+        return not frame.function.startswith(_JAVA_LIBRARY_PREFIXES)
+    return not any(hint in frame.file for hint in _LIBRARY_HINTS)
+
+
+def _elide(items: List[str], limit: int) -> List[str]:
+    if len(items) <= limit:
+        return items
+    half = max(limit // 2, 1)
+    return items[:half] + [f"... {len(items) - 2 * half} more ..."] + items[-half:]
+
+
+def _frame_summary(frames: Tuple[Frame, ...], limit: int) -> List[str]:
+    """Outermost -> innermost locations, consecutive repeats collapsed."""
+    summary: List[Tuple[str, int]] = []
+    for fr in frames:
+        loc = fr.location()
+        if summary and summary[-1][0] == loc:
+            summary[-1] = (loc, summary[-1][1] + fr.repeat)
+        else:
+            summary.append((loc, fr.repeat))
+    return _elide([loc if n == 1 else f"{loc} (x{n})" for loc, n in summary], limit)
+
+
+def _diagnostic_summary(frames: Tuple[Frame, ...], limit: int) -> List[str]:
+    """One line per distinct diagnostic, with the places it was reported."""
+    places: Dict[str, List[str]] = {}
+    for fr in frames:
+        places.setdefault(fr.function, []).append(f"{fr.file}:{fr.line}")
+    out = []
+    for diag, where in places.items():
+        shown = ", ".join(where[:3])
+        extra = f" (+{len(where) - 3} more)" if len(where) > 3 else ""
+        out.append(f"  {diag} [{shown}{extra}]")
+    return _elide(out, limit)
+
+
+def render_traceback(parsed: ParsedTraceback, *, user_frames: int = 3, summary: int = 12) -> str:
+    """Render the compact form sent to the provider."""
+    head = f"{parsed.exc_type}: {parsed.message}" if parsed.message else parsed.exc_type
+    if parsed.language == "c/c++":
+        out = [f"[{parsed.language} output, {len(parsed.frames)} diagnostics compacted]", head]
+        out.extend(_diagnostic_summary(parsed.frames, summary))
+        return "\n".join(out)
+
+    depth = sum(fr.repeat for fr in parsed.frames)
+    out = [f"[{parsed.language} error, {depth} frames compacted]", head]
+    out.extend(f"Chained with: {ctx}" for ctx in parsed.context)
+    mine = [fr for fr in parsed.frames if _is_user_frame(fr, parsed.language)]
+    innermost = (mine or list(parsed.frames))[-user_frames:]
+    out.append("Innermost frames in the learner's code:" if mine else "Innermost frames:")
+    for fr in innermost:
+        out.append(f"  {fr.location()}" + (f" (x{fr.repeat})" if fr.repeat > 1 else ""))
+        if fr.source:
+            out.append(f"    {fr.source}")
+    if len(parsed.frames) > len(innermost):
+        out.append("Call path (outermost first):")
+        out.extend(f"  {loc}" for loc in _frame_summary(parsed.frames, summary))
+    return "\n".join(out)
+
+
+# ---------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------
+def _widen(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Extend ``[start, end)`` to whole lines plus adjacent trace context lines."""
+    start = text.rfind("\n", 0, start) + 1
+    while start > 0:
+        prev = text.rfind("\n", 0, start - 1) + 1
+        if not _LEADING_CONTEXT_RE.match(text[prev : start - 1].rstrip()):
+            break
+        start = prev
+    # the classifier only marks Python exception lines named *Error/*Exception,
+    # so a trace ending in e.g. StopIteration or SystemExit stops at its last
+    # frame; take that frame's source and carets and the exception after them
+    last = text[text.rfind("\n", 0, end) + 1 : end]
+    # lines still expected from the last frame: source, carets, "[Previous line ...]"
+    frame_lines = 3 if _PY_FRAME_RE.match(last) else 0
+    while True:
+        nl = text.find("\n", end)
+        if nl < 0:
+            return start, len(text)
+        nxt = text.find("\n", nl + 1)
+        line = text[nl + 1 : len(text) if nxt < 0 else nxt]
+        if frame_lines and _PY_EXC_RE.match(line):
+            return start, nl + 1 + len(line)
+        if frame_lines and line[:1] in (" ", "\t") and line.strip():
+            frame_lines -= 1
+        elif not _TRAILING_CONTEXT_RE.match(line):
+            return start, nl
+        end = nl + 1 + len(line)
+
+
+def compact_error_text(
+    text: str,
+    span: Optional[Tuple[int, int]] = None,
+    *,
+    user_frames: int = 3,
+    summary: int = 12,
+) -> CompactedText:
+    """
+    Replace the stack trace in ``text`` with its compact rendering.
+
+    ``span`` is the [start, end) range of the trace within ``text`` if already
+    known (``ClassifiedIntent.features.traceback_span`` is measured on the
+    stripped input); otherwise it is located here. The learner's words before
+    and after the trace are kept. If nothing is recognized, or the compact form
+    is not smaller, ``text`` is returned unchanged.
+    """
+    original_tokens = estimate_tokens(text)
+    if span is None:
+        span = traceback_span(text) or (0, len(text))
+    start, end = _widen(text, *span)
+    parsed = parse_traceback(text[start:end])
+    if parsed is None:
+        return CompactedText(text, original_tokens, original_tokens)
+
+    rendered = render_traceback(parsed, user_frames=user_frames, summary=summary)
+    parts = (text[:start].strip(), rendered, text[end:].strip())
+    compact = "\n\n".join(part for part in parts if part)
+    compacted_tokens = estimate_tokens(compact)
+    if compacted_tokens >= original_tokens:
+        return CompactedText(text, original_tokens, original_tokens)
+    return CompactedText(compact, original_tokens, compacted_tokens, parsed)
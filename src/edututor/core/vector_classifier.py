@@ -0,0 +1,302 @@
+# src/edututor/core/vector_classifier.py
+"""
+Vectorized intent scoring for offline analytics over many rows.
+
+Texts are hashed into a fixed-width bag of character and word n-grams
+entirely in NumPy, and a whole batch is scored with one (sparse) matrix
+product against multinomial naive Bayes weights. Weights are fitted from labeled
+rows, e.g. the intents already stored by ``ConversationStore``.
+
+Requires NumPy (``pip install edututor[analytics]``). Interactive use
+should keep calling :func:`edututor.core.classifiers.classify_intent`.
+"""
+
+from __future__ import annotations
+
+import itertools
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from edututor.persistence.store import ConversationStore
+
+from .classifiers import ClassifiedIntent, Intent, fold_case
+
+_MASK = np.uint64(0xFFFFFFFF)
+_CHAR_PRIME = np.uint64(0x01000193)  # FNV-1 32-bit prime
+_WORD_PRIME = np.uint64(0x9E3779B1)
+_PAIR_PRIME = np.uint64(0x85EBCA6B)
+# keep n-gram kinds from colliding systematically
+_WORD_SALT = np.uint64(0x27D4EB2F)
+_PAIR_SALT = np.uint64(0x165667B1)
+
+_ALLOWED_HINTS = (Intent.CONCEPT, Intent.ERROR, Intent.EXPLAIN_CODE)
+
+Label = Union[Intent, str]
+
+
+class HashingVectorizer:
+    """
+    Map texts to rows of hashed, log-scaled n-gram counts.
+
+    Character n-grams of each length in ``char_ngrams`` and word n-grams
+    (runs of ASCII letters/digits/underscore or any non-ASCII byte) of each
+    length in ``word_ngrams`` (1 and/or 2) are hashed into ``n_features``
+    buckets. Each text is case-folded and cut to ``max_chars`` first.
+    """
+
+    def __init__(
+        self,
+        n_features: int = 2**14,
+        *,
+        char_ngrams: Sequence[int] = (3, 4, 5),
+        word_ngrams: Sequence[int] = (1, 2),
+        max_chars: int = 4096,
+    ) -> None:
+        if n_features < 1:
+            raise ValueError("n_features must be >= 1")
+        if not set(word_ngrams) <= {1, 2}:
+            raise ValueError("word_ngrams supports 1 and 2")
+        self.n_features = n_features
+        self.char_ngrams = tuple(char_ngrams)
+        self.word_ngrams = tuple(word_ngrams)
+        self.max_chars = max_chars
+        # powers of the word prime mod 2**32; words are at most 4 bytes per char long
+        pows = [1]
+        for _ in range(4 * max_chars):
+            pows.append((pows[-1] * int(_WORD_PRIME)) & 0xFFFFFFFF)
+        self._word_pows = np.array(pows, dtype=np.uint64)
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a dense float32 matrix of shape (len(texts), n_features)."""
+        rows, cols, values = self.transform_sparse(texts)
+        x = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        x[rows, cols] = values
+        return x
+
+    def transform_sparse(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the non-zero entries of :meth:`transform` as (rows, cols, values),
+        sorted by row then column.
+        """
+        n = len(texts)
+        encoded = [fold_case(t or "")[: self.max_chars].encode("utf-8") for t in texts]
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=n)
+        # one NUL after every text, so no n-gram is counted across two texts
+        buf = np.frombuffer(b"\0".join(encoded) + b"\0", dtype=np.uint8)
+        doc_of = np.repeat(np.arange(n, dtype=np.int64), lengths + 1)
+        ends = np.cumsum(lengths + 1) - 1  # index of each text's NUL
+        vals = buf.astype(np.uint64)
+
+        rows: List[np.ndarray] = []
+        cols: List[np.ndarray] = []
+        for k in self.char_ngrams:
+            m = len(buf) - k + 1
+            if m <= 0:
+                continue
+            h = np.full(m, k, dtype=np.uint64)
+            for j in range(k):
+                h = (h * _CHAR_PRIME + vals[j : j + m]) & _MASK
+            valid = np.arange(m) + k <= ends[doc_of[:m]]
+            rows.append(doc_of[:m][valid])
+            cols.append(h[valid])
+
+        if self.word_ngrams:
+            word_hash, word_doc = self._word_hashes(buf, vals, doc_of)
+            if 1 in self.word_ngrams:
+                rows.append(word_doc)
+                cols.append(word_hash ^ _WORD_SALT)
+            if 2 in self.word_ngrams and len(word_hash) > 1:
+                same = word_doc[1:] == word_doc[:-1]
+                pair = (word_hash[:-1] * _PAIR_PRIME + word_hash[1:]) & _MASK
+                rows.append(word_doc[1:][same])
+                cols.append(pair[same] ^ _PAIR_SALT)
+
+        f = self.n_features
+        if not rows:
+            return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+        buckets = (np.concatenate(cols) % np.uint64(f)).astype(np.int64)
+        flat, counts = np.unique(np.concatenate(rows) * f + buckets, return_counts=True)
+        return flat // f, flat % f, np.log1p(counts.astype(np.float32))
+
+    def _word_hashes(
+        self, buf: np.ndarray, vals: np.ndarray, doc_of: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        is_word = (
+            (buf >= 128)
+            | (buf == ord("_"))
+            | ((buf >= ord("0")) & (buf <= ord("9")))
+            | ((buf >= ord("a")) & (buf <= ord("z")))
+        )
+        starts_mask = is_word & ~np.concatenate(([False], is_word[:-1]))
+        word_starts = np.flatnonzero(starts_mask)
+        if not len(word_starts):
+            empty = np.empty(0, dtype=np.uint64)
+            return empty, np.empty(0, dtype=np.int64)
+        word_of = np.cumsum(starts_mask) - 1
+        positions = np.flatnonzero(is_word)
+        offsets = positions - word_starts[word_of[positions]]
+        contrib = (vals[positions] * self._word_pows[offsets]) & _MASK
+        # words are contiguous runs, so each starts where its offset is 0
+        hashes = np.add.reduceat(contrib, np.flatnonzero(offsets == 0)) & _MASK
+        return hashes, doc_of[word_starts]
+
+
+class VectorIntentClassifier:
+    """
+    Batch intent classifier: hashed n-grams scored by multinomial naive Bayes.
+
+    ``scores(texts)`` is ``X @ W + b`` for the whole batch. Hints follow the
+    same rule as ``classify_intent``: DISALLOWED always wins, otherwise a
+    CONCEPT/ERROR/EXPLAIN_CODE hint is respected.
+    """
+
+    def __init__(
+        self,
+        vectorizer: Optional[HashingVectorizer] = None,
+        *,
+        alpha: float = 1.0,
+        batch_size: int = 512,
+    ) -> None:
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.alpha = alpha
+        self.batch_size = batch_size
+        self.classes: Tuple[Intent, ...] = ()
+        self._weights: Optional[np.ndarray] = None  # (n_features, n_classes)
+        self._bias: Optional[np.ndarray] = None  # (n_classes,)
+
+    # -----------------------------------------------------------------
+    # fitting
+    # -----------------------------------------------------------------
+    def fit(self, texts: Iterable[str], labels: Iterable[Label]) -> "VectorIntentClassifier":
+        """Fit from parallel iterables of texts and Intent (or Intent names)."""
+        return self._fit(zip(texts, labels, strict=True))
+
+    def fit_from_store(self, store: ConversationStore) -> "VectorIntentClassifier":
+        """Fit from every conversation row that has a stored intent."""
+        return self._fit(store.iter_labeled(self.batch_size))
+
+    def _fit(self, pairs: Iterable[Tuple[str, Label]]) -> "VectorIntentClassifier":
+        intents = list(Intent)
+        index = {intent: i for i, intent in enumerate(intents)}
+        f = self.vectorizer.n_features
+        feature_counts = np.zeros((len(intents), f), dtype=np.float64)
+        doc_counts = np.zeros(len(intents), dtype=np.float64)
+
+        it = iter(pairs)
+        while chunk := list(itertools.islice(it, self.batch_size)):
+            texts: List[str] = []
+            label_ids: List[int] = []
+            for text, label in chunk:
+                intent = _to_intent(label)
+                if intent is None:
+                    continue
+                texts.append(text)
+                label_ids.append(index[intent])
+            if not texts:
+                continue
+            # Y.T @ X without materializing either matrix
+            rows, cols, values = self.vectorizer.transform_sparse(texts)
+            labels_of_rows = np.asarray(label_ids, dtype=np.int64)[rows]
+            feature_counts += np.bincount(
+                labels_of_rows * f + cols, weights=values, minlength=len(intents) * f
+            ).reshape(len(intents), f)
+            doc_counts += np.bincount(label_ids, minlength=len(intents))
+
+        present = np.flatnonzero(doc_counts)
+        if not len(present):
+            raise ValueError("no labeled rows to fit")
+        counts = feature_counts[present] + self.alpha
+        log_prob = np.log(counts) - np.log(counts.sum(axis=1, keepdims=True))
+        self.classes = tuple(intents[i] for i in present)
+        self._weights = np.ascontiguousarray(log_prob.T, dtype=np.float32)
+        self._bias = (np.log(doc_counts[present]) - np.log(doc_counts.sum())).astype(np.float32)
+        return self
+
+    # -----------------------------------------------------------------
+    # scoring
+    # -----------------------------------------------------------------
+    def scores(self, texts: Sequence[str]) -> np.ndarray:
+        """Unnormalized log-scores, shape (len(texts), len(self.classes))."""
+        if self._weights is None or self._bias is None:
+            raise RuntimeError("VectorIntentClassifier is not fitted")
+        rows, cols, values = self.vectorizer.transform_sparse(texts)
+        out = np.tile(self._bias, (len(texts), 1))
+        if len(rows):
+            # sparse X @ W: weight rows for every non-zero, summed per text
+            contrib = self._weights[cols] * values[:, None]
+            row_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            out[rows[row_starts]] += np.add.reduceat(contrib, row_starts, axis=0)
+        return out
+
+    def classify_batch(
+        self, texts: Sequence[str], hints: Optional[Sequence[Optional[Intent]]] = None
+    ) -> List[ClassifiedIntent]:
+        """Classify ``texts`` (one matrix product per ``batch_size`` rows)."""
+        if hints is None:
+            hints = [None] * len(texts)
+        elif len(hints) != len(texts):
+            raise ValueError("hints must be the same length as texts")
+        out: List[ClassifiedIntent] = []
+        for lo in range(0, len(texts), self.batch_size):
+            batch = texts[lo : lo + self.batch_size]
+            s = self.scores(batch)
+            best = s.argmax(axis=1)
+            # softmax probability of the winning class, for the reason string
+            top = s[np.arange(len(batch)), best]
+            conf = 1.0 / np.exp(s - top[:, None]).sum(axis=1)
+            for text, hint, b, p in zip(batch, hints[lo : lo + len(batch)], best, conf):
+                out.append(self._result(text, hint, self.classes[int(b)], float(p)))
+        return out
+
+    @staticmethod
+    def _result(
+        text: str, hint: Optional[Intent], predicted: Intent, confidence: float
+    ) -> ClassifiedIntent:
+        if not (text or "").strip():
+            return ClassifiedIntent(Intent.UNKNOWN, "Empty or whitespace-only input", hint)
+        if predicted != Intent.DISALLOWED and hint is not None and hint in _ALLOWED_HINTS:
+            return ClassifiedIntent(hint, f"User hinted {hint.name}", hint)
+        return ClassifiedIntent(
+            predicted, f"Vector model score {confidence:.2f} for {predicted.name}", hint
+        )
+
+    # -----------------------------------------------------------------
+    # persistence
+    # -----------------------------------------------------------------
+    def save(self, path: Union[str, Path]) -> None:
+        if self._weights is None or self._bias is None:
+            raise RuntimeError("VectorIntentClassifier is not fitted")
+        v = self.vectorizer
+        np.savez(
+            path,
+            weights=self._weights,
+            bias=self._bias,
+            classes=np.array([c.name for c in self.classes]),
+            n_features=v.n_features,
+            char_ngrams=np.array(v.char_ngrams, dtype=np.int64),
+            word_ngrams=np.array(v.word_ngrams, dtype=np.int64),
+            max_chars=v.max_chars,
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "VectorIntentClassifier":
+        with np.load(path) as data:
+            vectorizer = HashingVectorizer(
+                int(data["n_features"]),
+                char_ngrams=[int(k) for k in data["char_ngrams"]],
+                word_ngrams=[int(k) for k in data["word_ngrams"]],
+                max_chars=int(data["max_chars"]),
+            )
+            model = cls(vectorizer)
+            model.classes = tuple(Intent[str(name)] for name in data["classes"])
+            model._weights = data["weights"]
+            model._bias = data["bias"]
+        return model
+
+
+def _to_intent(label: Label) -> Optional[Intent]:
+    if isinstance(label, Intent):
+        return label
+    return Intent.__members__.get(str(label).upper())
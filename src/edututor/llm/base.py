@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, Protocol
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, Optional, Protocol
 
 
 @dataclass(frozen=True)
@@ -26,3 +26,40 @@ class BaseLLM(Protocol):
     def send(
         self, *, prompt: str, intent: Any, max_tokens: Optional[int] = None
     ) -> LLMResponse: ...
+
+
+class StreamingLLM(BaseLLM, Protocol):
+    """
+    A provider that can also stream its reply as text chunks.
+
+    Closing the returned iterator (``close()`` on a generator) must end the
+    request, so a reply the orchestrator abandons stops being generated.
+    """
+
+    def stream(
+        self, *, prompt: str, intent: Any, max_tokens: Optional[int] = None
+    ) -> Iterator[str]: ...
+
+
+class AsyncLLM(BaseLLM, Protocol):
+    """
+    A provider with a native coroutine ``asend()``, awaited by
+    ``Orchestrator.ahandle_user_message`` instead of running ``send()`` on a
+    worker thread.
+    """
+
+    def asend(
+        self, *, prompt: str, intent: Any, max_tokens: Optional[int] = None
+    ) -> Awaitable[LLMResponse]: ...
+
+
+class AsyncStreamingLLM(AsyncLLM, Protocol):
+    """
+    An async provider that can also stream its reply; ``aclose()`` on the
+    returned iterator must end the request, as ``close()`` does for
+    :class:`StreamingLLM`.
+    """
+
+    def astream(
+        self, *, prompt: str, intent: Any, max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]: ...
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, cast
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, Optional, Tuple, cast
 
 # Try to import BaseLLM and LLMResponse for typing; fall back cleanly at runtime.
 if TYPE_CHECKING:
@@ -33,6 +33,7 @@ class MockResponse:
 def _prompt_to_text(prompt: Any) -> str:
     """
     Normalize possible prompt shapes into a single string:
+    - Prompt (has .payload) -> its payload
     - list of message dicts -> join their 'content' fields
     - dict -> use its 'content' if present, else str(dict)
     - str -> return as-is
@@ -40,6 +41,11 @@ def _prompt_to_text(prompt: Any) -> str:
     """
     if prompt is None:
         return ""
+    # an edututor.core.prompts.Prompt: answer the learner's text, not the
+    # system instructions in front of it
+    payload = getattr(prompt, "payload", None)
+    if isinstance(payload, str):
+        return payload
     if isinstance(prompt, list):
         parts = []
         for part in prompt:
@@ -173,6 +179,30 @@ class MockLLM(BaseLLM):  # type: ignore[misc]
         # For compatibility we return a MockResponse cast to LLMResponse.
         return cast("LLMResponse", MockResponse(text=text, raw=raw))
 
+    async def asend(
+        self, *, prompt: str, intent: Any, max_tokens: Optional[int] = None
+    ) -> "LLMResponse":  # type: ignore[name-defined]
+        """send() as a coroutine; the mock has no I/O to wait on."""
+        return self.send(prompt=prompt, intent=intent, max_tokens=max_tokens)
+
+    def stream(
+        self, *, prompt: str, intent: Any, max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Yield the same reply as send(), a word (and its trailing whitespace)
+        at a time, the way a streaming provider delivers it.
+        """
+        text, _ = _decide_response(prompt, intent=intent)
+        for m in re.finditer(r"\s*\S+\s*", text):
+            yield m.group()
+
+    async def astream(
+        self, *, prompt: str, intent: Any, max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """stream() as an async generator."""
+        for piece in self.stream(prompt=prompt, intent=intent, max_tokens=max_tokens):
+            yield piece
+
 
 # Public API
 __all__ = ["MockResponse", "chat_completion", "MockLLM"]
@@ -1,18 +1,26 @@
 # src/edututor/llm/openai_provider.py
 from __future__ import annotations
 
+import json
 import logging
 import os
 import random
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 
 import requests
 
+from edututor.core.prompts import STATIC_PREFIX, Prompt
+from edututor.core.tokens import estimate_tokens
+
 from .base import BaseLLM, LLMResponse
 
 LOG = logging.getLogger(__name__)
 
+# chat formatting tokens per message, and to prime the reply
+_MESSAGE_OVERHEAD = 4
+_REPLY_OVERHEAD = 3
+
 
 class OpenAIProvider(BaseLLM):
     def __init__(
@@ -23,6 +31,7 @@ class OpenAIProvider(BaseLLM):
         timeout_seconds: int = 20,
         max_retries: int = 3,
         max_tokens: int = 512,
+        context_window: int = 16385,
     ) -> None:
         self.api_key = api_key
         self.api_base = api_base.rstrip("/")
@@ -30,6 +39,8 @@ class OpenAIProvider(BaseLLM):
         self.timeout_seconds = timeout_seconds
         self.max_retries = max_retries
         self.max_tokens = max_tokens
+        # prompt and reply together; max_tokens is clamped to what is left
+        self.context_window = context_window
 
     @classmethod
     def from_env(cls) -> "OpenAIProvider":
@@ -40,31 +51,85 @@ class OpenAIProvider(BaseLLM):
             timeout_seconds=int(os.getenv("OPENAI_TIMEOUT_SECONDS", "20")),
             max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "3")),
             max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "512")),
+            context_window=int(os.getenv("OPENAI_CONTEXT_WINDOW", "16385")),
         )
 
     def _headers(self) -> Dict[str, str]:
         return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
 
     def _payload(self, prompt: str, intent: Any, max_tokens: Optional[int]) -> Dict[str, Any]:
-        system_msg = (
-            "You are a strict pedagogical tutor. "
-            "INTENT: " + str(intent) + ". You must not provide full code or exact solutions. "
-            "Provide conceptual explanations, hints, and Socratic prompts only."
+        if isinstance(prompt, Prompt):
+            messages = prompt.messages()
+        else:
+            # a bare string: the static prefix stays first so it can be cached
+            messages = [
+                {"role": "system", "content": STATIC_PREFIX.text},
+                {"role": "system", "content": f"INTENT: {intent}"},
+                {"role": "user", "content": prompt},
+            ]
+        prompt_tokens = _REPLY_OVERHEAD + sum(
+            _MESSAGE_OVERHEAD + estimate_tokens(m["content"]) for m in messages
         )
+        limit = max_tokens or self.max_tokens
+        room = max(self.context_window - prompt_tokens, 1)
+        if limit > room:
+            LOG.warning(
+                "max_tokens %d clamped to %d (about %d prompt tokens, %d context window)",
+                limit,
+                room,
+                prompt_tokens,
+                self.context_window,
+            )
+            limit = room
         return {
             "model": self.model,
-            "messages": [
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": prompt},
-            ],
-            "max_tokens": max_tokens or self.max_tokens,
+            "messages": messages,
+            "max_tokens": limit,
             "temperature": 0.2,
         }
 
     def send(self, *, prompt: str, intent: Any, max_tokens: Optional[int] = None) -> LLMResponse:
         url = f"{self.api_base}/chat/completions"
-        payload = self._payload(prompt, intent, max_tokens)
+        body = self._post(url, self._payload(prompt, intent, max_tokens)).json()
+        text = ""
+        if isinstance(body, dict):
+            choices = body.get("choices") or []
+            if choices and choices[0].get("message"):
+                text = choices[0]["message"].get("content", "")
+        return LLMResponse(text=str(text).strip(), raw=body)
+
+    def stream(
+        self, *, prompt: str, intent: Any, max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Yield the reply text as it is generated (server-sent events).
+
+        Closing the generator closes the connection, which stops generation.
+        Retries apply until the response starts, as for send().
+        """
+        url = f"{self.api_base}/chat/completions"
+        payload = {**self._payload(prompt, intent, max_tokens), "stream": True}
+        with self._post(url, payload, stream=True) as resp:
+            resp.encoding = "utf-8"
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    return
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    LOG.warning("OpenAIProvider skipped malformed stream event: %.80s", data)
+                    continue
+                choices = (event.get("choices") or []) if isinstance(event, dict) else []
+                if choices and isinstance(choices[0], dict):
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        yield content
 
+    def _post(self, url: str, payload: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """POST with retries; returns the successful (200) response."""
         attempt = 0
         while True:
             attempt += 1
@@ -75,15 +140,10 @@ class OpenAIProvider(BaseLLM):
                     headers=self._headers(),
                     json=payload,
                     timeout=self.timeout_seconds,
+                    stream=stream,
                 )
                 if resp.status_code == 200:
-                    body = resp.json()
-                    text = ""
-                    if isinstance(body, dict):
-                        choices = body.get("choices") or []
-                        if choices and choices[0].get("message"):
-                            text = choices[0]["message"].get("content", "")
-                    return LLMResponse(text=str(text).strip(), raw=body)
+                    return resp
 
                 # Retry on rate limit / server errors
                 if resp.status_code in {429, 500, 502, 503, 504} and attempt <= self.max_retries:
@@ -94,6 +154,7 @@ class OpenAIProvider(BaseLLM):
                         wait,
                         attempt,
                     )
+                    resp.close()
                     time.sleep(wait)
                     continue
 
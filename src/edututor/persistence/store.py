@@ -1,9 +1,10 @@
 # src/edututor/persistence/store.py
 from __future__ import annotations
 
+import asyncio
 import json
 from datetime import datetime
-from typing import Any, Dict, List, Mapping, Optional
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 from .db import connect, initialize_db
 
@@ -81,6 +82,53 @@ class ConversationStore:
             )
             return cast_int(cur.lastrowid)
 
+    def save_conversations(self, rows: Sequence[Mapping[str, Any]]) -> List[int]:
+        """
+        Insert many conversation rows (keyword arguments of save_conversation,
+        optionally with their own ``created_at``) in a single transaction: if
+        any row fails, none is written. Returns the inserted row ids, in order.
+        """
+        if not rows:
+            return []
+        created_at = datetime.utcnow().isoformat() + "Z"
+        ids: List[int] = []
+        # connect() commits on the way out even after an error; the inner
+        # ``with conn`` rolls the batch back first
+        with connect(self.db_path) as conn, conn:
+            for row in rows:
+                cur = conn.execute(
+                    """
+                    INSERT INTO conversations
+                    (created_at, user_text, intent, provider, llm_raw, sanitized_text, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        row.get("created_at") or created_at,
+                        row["user_text"],
+                        row.get("intent"),
+                        row.get("provider"),
+                        json.dumps(row.get("llm_raw") or {}),
+                        row.get("sanitized_text"),
+                        json.dumps(row.get("metadata") or {}),
+                    ),
+                )
+                ids.append(cast_int(cur.lastrowid))
+        return ids
+
+    async def asave_conversation(
+        self,
+        user_text: str,
+        intent: Optional[str],
+        provider: Optional[str],
+        llm_raw: Optional[Dict[str, Any]],
+        sanitized_text: Optional[str],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """save_conversation() on a worker thread, so the event loop keeps running."""
+        return await asyncio.to_thread(
+            self.save_conversation, user_text, intent, provider, llm_raw, sanitized_text, metadata
+        )
+
     def fetch_recent(self, limit: int = 100) -> List[ConversationRecord]:
         with connect(self.db_path) as conn:
             cur = conn.execute(
@@ -103,6 +151,74 @@ class ConversationStore:
             row = cur.fetchone()
             return self._row_to_record(row) if row else None
 
+    def iter_labeled(self, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        """Yield (user_text, intent) for every row with an intent, in id order."""
+        with connect(self.db_path) as conn:
+            cur = conn.execute(
+                "SELECT user_text, intent FROM conversations "
+                "WHERE intent IS NOT NULL ORDER BY id"
+            )
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for r in rows:
+                    yield r["user_text"], r["intent"]
+
+    def iter_conversations(
+        self, after_id: int = 0, batch_size: int = 1000
+    ) -> Iterator[ConversationRecord]:
+        """Yield every row with id > after_id, in id order, a page at a time."""
+        while True:
+            with connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT id, created_at, user_text, intent, provider, "
+                    "llm_raw, sanitized_text, metadata "
+                    "FROM conversations WHERE id > ? ORDER BY id LIMIT ?",
+                    (after_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield self._row_to_record(r)
+            after_id = rows[-1]["id"]
+
+    def iter_llm_raw(
+        self, after_id: int = 0, batch_size: int = 1000
+    ) -> Iterator[Tuple[int, Dict[str, Any], Optional[str]]]:
+        """
+        Yield (id, llm_raw, sanitized_text) for rows with id > after_id, in id order.
+
+        Rows are read a page at a time by id, each page on its own connection,
+        so no read transaction is held open while the caller writes.
+        """
+        while True:
+            with connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT id, llm_raw, sanitized_text FROM conversations "
+                    "WHERE id > ? ORDER BY id LIMIT ?",
+                    (after_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                try:
+                    llm_raw = json.loads(r["llm_raw"]) if r["llm_raw"] else {}
+                except Exception:
+                    llm_raw = {}
+                yield r["id"], llm_raw, r["sanitized_text"]
+            after_id = rows[-1]["id"]
+
+    def update_sanitized(self, updates: Sequence[Tuple[int, str]]) -> None:
+        """Set sanitized_text for each (id, text) pair in a single transaction."""
+        if not updates:
+            return
+        with connect(self.db_path) as conn:
+            conn.executemany(
+                "UPDATE conversations SET sanitized_text = ? WHERE id = ?",
+                [(text, row_id) for row_id, text in updates],
+            )
+
     def export_json(self, limit: int = 100) -> str:
         """Return a JSON string of recent conversations."""
         recs = self.fetch_recent(limit)
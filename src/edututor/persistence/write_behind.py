@@ -0,0 +1,417 @@
+# src/edututor/persistence/write_behind.py
+from __future__ import annotations
+
+import asyncio
+import atexit
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .store import ConversationStore
+
+logger = logging.getLogger(__name__)
+
+# what save_conversation does when the queue is full
+FULL_POLICIES = ("block", "drop", "spill")
+
+
+class WriteBehindInfo(NamedTuple):
+    depth: int
+    maxsize: int
+    enqueued: int
+    written: int
+    # rows lost: dropped when the queue was full (or a block timed out), or
+    # failed to write with nowhere to spill them
+    dropped: int
+    failed: int
+    # rows appended to the spill file
+    spilled: int
+    # rows the store refused on their own (bad data): set aside in the
+    # ``.rejected`` file next to the spill file, or lost without one
+    rejected: int
+    flushes: int
+    last_flush_ms: float
+    max_flush_ms: float
+    total_flush_ms: float
+
+    @property
+    def mean_flush_ms(self) -> float:
+        return self.total_flush_ms / self.flushes if self.flushes else 0.0
+
+
+class _Saved(NamedTuple):
+    written: int
+    # rows that failed on their own, so retrying them cannot help
+    rejected: List[Dict[str, Any]]
+    # rows a transient error left unwritten, and that error
+    unwritten: List[Dict[str, Any]]
+    error: Optional[Exception]
+
+
+def _transient(exc: Exception) -> bool:
+    # locked, busy, disk full or I/O: the same rows may well go through later
+    return isinstance(exc, sqlite3.OperationalError)
+
+
+class WriteBehindStore:
+    """
+    A :class:`ConversationStore` whose writes leave the caller's critical path.
+
+    ``save_conversation`` puts the row on a bounded in-memory queue and
+    returns at once (with id 0: ids are assigned when the row is written). A
+    background thread drains the queue with ``save_conversations``, one
+    transaction per batch, as soon as ``batch_size`` rows are waiting or the
+    oldest has waited ``flush_interval`` seconds. The queue is flushed when
+    the store is closed, and at interpreter exit.
+
+    When the queue holds ``maxsize`` rows, ``on_full`` decides:
+
+    - ``"block"``: wait for room (at most ``block_timeout`` seconds, then
+      drop the row);
+    - ``"drop"``: drop the row;
+    - ``"spill"``: append it to ``spill_path`` (JSON lines), which is
+      replayed into the store when the next WriteBehindStore starts on it
+      or :meth:`replay_spill` is called. Batches that fail to write
+      because the database is unavailable are spilled too.
+
+    A batch that fails for any other reason is retried row by row, and rows
+    the store refuses on their own are set aside in ``<spill_path>.rejected``
+    (JSON lines, never replayed) rather than holding up the rest.
+
+    Reads go to the wrapped store and only see written rows; call
+    :meth:`flush` first to include everything saved so far.
+    """
+
+    def __init__(
+        self,
+        store: Optional[ConversationStore] = None,
+        *,
+        maxsize: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+        on_full: str = "block",
+        block_timeout: Optional[float] = None,
+        spill_path: Optional[str] = None,
+    ) -> None:
+        if maxsize < 1 or batch_size < 1:
+            raise ValueError("maxsize and batch_size must be >= 1")
+        if on_full not in FULL_POLICIES:
+            raise ValueError(f"on_full must be one of {FULL_POLICIES}, not {on_full!r}")
+        if on_full == "spill" and not spill_path:
+            raise ValueError('on_full="spill" needs a spill_path')
+        self.store = store or ConversationStore()
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_full = on_full
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        # (enqueued at, row)
+        self._queue: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        self._writing = 0
+        self._urgent = False
+        self._closed = False
+        self._enqueued = self._written = self._dropped = 0
+        self._failed = self._spilled = self._rejected = self._flushes = 0
+        self._last_flush_ms = self._max_flush_ms = self._total_flush_ms = 0.0
+        if spill_path:
+            try:
+                self.replay_spill()
+            except Exception:
+                # the rows stay on disk; the next replay_spill() retries them
+                logger.exception("write-behind: failed to replay %s", spill_path)
+        self._thread = threading.Thread(target=self._run, name="edututor-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __getattr__(self, name: str) -> Any:
+        # reads (fetch_recent, iter_conversations, ...) go to the wrapped store
+        if name == "store":
+            raise AttributeError(name)
+        return getattr(self.store, name)
+
+    @property
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue) + self._writing
+
+    def save_conversation(
+        self,
+        user_text: str,
+        intent: Optional[str],
+        provider: Optional[str],
+        llm_raw: Optional[Dict[str, Any]],
+        sanitized_text: Optional[str],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """Queue a conversation row. Returns 0: the id is assigned when it is written."""
+        self._put(
+            [
+                dict(
+                    user_text=user_text,
+                    intent=intent,
+                    provider=provider,
+                    llm_raw=llm_raw,
+                    sanitized_text=sanitized_text,
+                    metadata=metadata,
+                )
+            ]
+        )
+        return 0
+
+    def save_conversations(self, rows: Sequence[Dict[str, Any]]) -> List[int]:
+        """Queue many conversation rows (see save_conversation)."""
+        self._put([dict(row) for row in rows])
+        return [0] * len(rows)
+
+    async def asave_conversation(self, **row: Any) -> int:
+        if self.on_full == "block":
+            # waiting for room must not stall the event loop
+            return await asyncio.to_thread(self.save_conversation, **row)
+        return self.save_conversation(**row)
+
+    def _put(self, rows: List[Dict[str, Any]]) -> None:
+        # stamped now, so rows keep the time they were saved, not written
+        created_at = datetime.utcnow().isoformat() + "Z"
+        overflow: List[Dict[str, Any]] = []
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind store is closed")
+            for row in rows:
+                row.setdefault("created_at", created_at)
+                if len(self._queue) >= self.maxsize and self.on_full == "block":
+                    # the queue holds a full batch by now: get the writer going
+                    self._cond.notify_all()
+                    self._cond.wait_for(
+                        lambda: len(self._queue) < self.maxsize or self._closed,
+                        self.block_timeout,
+                    )
+                if len(self._queue) >= self.maxsize or self._closed:
+                    overflow.append(row)
+                    continue
+                self._queue.append((time.monotonic(), row))
+                self._enqueued += 1
+            # the writer flushes a full batch, or sets its deadline for the first row
+            self._cond.notify_all()
+        if overflow:
+            if self.on_full == "spill":
+                self._spill(overflow)
+            else:
+                with self._cond:
+                    self._dropped += len(overflow)
+                logger.warning("write-behind queue full: dropped %d rows", len(overflow))
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready():
+                    if self._closed and not self._queue:
+                        return
+                    self._cond.wait(self._wait_time())
+                n = min(self.batch_size, len(self._queue))
+                batch = [self._queue.popleft()[1] for _ in range(n)]
+                self._writing = n
+                # room for blocked savers
+                self._cond.notify_all()
+            self._write(batch)
+            with self._cond:
+                self._writing = 0
+                if not self._queue:
+                    self._urgent = False
+                self._cond.notify_all()
+
+    def _ready(self) -> bool:
+        # caller holds the lock
+        if not self._queue:
+            return False
+        if self._urgent or self._closed or len(self._queue) >= self.batch_size:
+            return True
+        return time.monotonic() - self._queue[0][0] >= self.flush_interval
+
+    def _wait_time(self) -> Optional[float]:
+        # caller holds the lock
+        if not self._queue:
+            return None
+        return max(self.flush_interval - (time.monotonic() - self._queue[0][0]), 0.0)
+
+    def _save(self, rows: List[Dict[str, Any]]) -> _Saved:
+        """
+        Write ``rows`` in one transaction. If that fails for a reason other
+        than a transient one, write them one by one to find the bad rows.
+        """
+        try:
+            self.store.save_conversations(rows)
+            return _Saved(len(rows), [], [], None)
+        except Exception as exc:
+            if _transient(exc):
+                return _Saved(0, [], rows, exc)
+            if len(rows) == 1:
+                logger.warning("write-behind: store refused a row: %s", exc)
+                return _Saved(0, rows, [], None)
+            logger.warning(
+                "write-behind: batch of %d failed (%s); writing rows singly", len(rows), exc
+            )
+        written = 0
+        rejected: List[Dict[str, Any]] = []
+        for i, row in enumerate(rows):
+            try:
+                self.store.save_conversations([row])
+                written += 1
+            except Exception as exc:
+                if _transient(exc):
+                    return _Saved(written, rejected, rows[i:], exc)
+                logger.warning("write-behind: store refused a row: %s", exc)
+                rejected.append(row)
+        return _Saved(written, rejected, [], None)
+
+    def _reject(self, rows: List[Dict[str, Any]]) -> None:
+        with self._cond:
+            self._rejected += len(rows)
+        if not self.spill_path:
+            return
+        try:
+            with self._spill_lock, open(self.spill_path + ".rejected", "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+        except Exception:
+            logger.exception("write-behind: failed to set aside %d rejected rows", len(rows))
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        saved = self._save(batch)
+        if saved.rejected:
+            self._reject(saved.rejected)
+        if saved.unwritten:
+            logger.error(
+                "write-behind: failed to write %d rows",
+                len(saved.unwritten),
+                exc_info=saved.error,
+            )
+            if self.spill_path:
+                self._spill(saved.unwritten)
+            else:
+                with self._cond:
+                    self._failed += len(saved.unwritten)
+        if not saved.written:
+            return
+        ms = (time.perf_counter() - started) * 1000.0
+        with self._cond:
+            self._written += saved.written
+            self._flushes += 1
+            self._last_flush_ms = ms
+            self._max_flush_ms = max(self._max_flush_ms, ms)
+            self._total_flush_ms += ms
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        assert self.spill_path is not None
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+        except Exception:
+            logger.exception("write-behind: failed to spill %d rows", len(rows))
+            with self._cond:
+                self._failed += len(rows)
+            return
+        with self._cond:
+            self._spilled += len(rows)
+
+    def replay_spill(self) -> int:
+        """
+        Write the spilled rows to the store and remove their files; returns the count.
+
+        The spill file is first renamed to a ``.replaying`` file of its own, so
+        rows spilled meanwhile start a new one. Files left by a replay that
+        failed are replayed first. Each batch is one transaction. Rows the
+        store refuses on their own are moved to the ``.rejected`` file. If the
+        database is unavailable (sqlite3.OperationalError), the rows not yet
+        written are saved back to their file and the error is raised, and the
+        next replay picks up where this one stopped; only a process dying
+        mid-replay can leave a row to be written twice.
+        """
+        if not self.spill_path:
+            return 0
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                # never onto a file still waiting from an earlier replay
+                os.replace(self.spill_path, f"{self.spill_path}.replaying.{time.time_ns()}")
+            pending = sorted(
+                path
+                for path in glob.glob(glob.escape(self.spill_path) + ".replaying*")
+                if not path.endswith(".tmp")
+            )
+        replayed = 0
+        for path in pending:
+            replayed += self._replay_file(path)
+        if replayed:
+            logger.info("write-behind: replayed %d spilled rows", replayed)
+        return replayed
+
+    def _replay_file(self, path: str) -> int:
+        rows = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    # a line cut short by a crash
+                    logger.warning("write-behind: skipped an unreadable spilled row")
+        written = 0
+        for i in range(0, len(rows), self.batch_size):
+            saved = self._save(rows[i : i + self.batch_size])
+            written += saved.written
+            if saved.rejected:
+                self._reject(saved.rejected)
+            if saved.error is not None:
+                # keep what is left (the failed rows included) for the next replay
+                tmp = path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    for row in saved.unwritten + rows[i + self.batch_size :]:
+                        f.write(json.dumps(row) + "\n")
+                os.replace(tmp, path)
+                raise saved.error
+        os.remove(path)
+        return written
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far; False if ``timeout`` ran out first."""
+        with self._cond:
+            self._urgent = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._queue and not self._writing, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush the queue and stop the writer. Later saves raise RuntimeError."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def info(self) -> WriteBehindInfo:
+        with self._cond:
+            return WriteBehindInfo(
+                depth=len(self._queue) + self._writing,
+                maxsize=self.maxsize,
+                enqueued=self._enqueued,
+                written=self._written,
+                dropped=self._dropped,
+                failed=self._failed,
+                spilled=self._spilled,
+                rejected=self._rejected,
+                flushes=self._flushes,
+                last_flush_ms=self._last_flush_ms,
+                max_flush_ms=self._max_flush_ms,
+                total_flush_ms=self._total_flush_ms,
+            )
@@ -0,0 +1,137 @@
+# tests/test_async_orchestrator.py
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from edututor.core import templates
+from edututor.core.orchestrator import Orchestrator
+from edututor.llm.mock import MockLLM
+from edututor.persistence.store import ConversationStore
+
+_CODE = "".join(f"    total[{i}] = grid[{i}] + step({i})\n" for i in range(200))
+
+
+class _Store:
+    def __init__(self) -> None:
+        self.rows = []
+
+    def save_conversation(self, **kwargs):
+        self.rows.append(kwargs)
+        return len(self.rows)
+
+
+class _SlowAsyncProvider:
+    """An async provider that takes a while to answer, with a send() that must not be used."""
+
+    def __init__(self) -> None:
+        self.in_flight = self.peak = 0
+
+    def send(self, prompt, intent, max_tokens=None):
+        raise AssertionError("send() used although asend() exists")
+
+    async def asend(self, *, prompt, intent, max_tokens=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        return "Think about the base case first. What stops the recursion?"
+
+
+def test_async_matches_sync_with_mock(tmp_path) -> None:
+    store = ConversationStore(str(tmp_path / "db.sqlite"))
+    orch = Orchestrator(provider=MockLLM(), store=store)
+    for text in ("what is recursion?", "KeyError: 'a'", "write the code for me"):
+        expected = orch.handle_user_message(text)
+        got = asyncio.run(orch.ahandle_user_message(text))
+        assert (got.text, got.intent) == (expected.text, expected.intent)
+    rows = store.fetch_recent(10)
+    assert len(rows) == 6
+    # streamed through the code-dump guard either way
+    assert all(r.llm_raw.get("streamed") for r in rows if r.metadata["decision"] != "disallowed")
+
+
+def test_async_provider_calls_overlap() -> None:
+    provider, store = _SlowAsyncProvider(), _Store()
+    orch = Orchestrator(provider=provider, store=store)
+
+    async def main():
+        return await asyncio.gather(
+            *(orch.ahandle_user_message(f"what is a stack, part {i}?") for i in range(20))
+        )
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    assert time.perf_counter() - started < 0.05 * 20 / 2
+    assert provider.peak == 20
+    assert len(store.rows) == 20
+    assert all("base case" in r.text for r in results)
+
+
+def test_blocking_provider_runs_on_executor() -> None:
+    threads = set()
+
+    class _Provider:
+        def send(self, prompt, intent, max_tokens=None):
+            threads.add(threading.get_ident())
+            return "Think about the base case first."
+
+    store = _Store()
+    with ThreadPoolExecutor(2) as pool:
+        orch = Orchestrator(provider=_Provider(), store=store, executor=pool)
+        asyncio.run(orch.ahandle_user_message("what is recursion?"))
+    assert threading.get_ident() not in threads
+    assert store.rows[0]["sanitized_text"] == "Think about the base case first."
+
+
+def test_large_input_is_offloaded() -> None:
+    threads = []
+
+    def classifier(text, user_hint=None):
+        threads.append(threading.get_ident())
+        from edututor.core.classifiers import classify_intent
+
+        return classify_intent(text, user_hint=user_hint)
+
+    orch = Orchestrator(
+        provider=MockLLM(), store=_Store(), classifier=classifier, offload_chars=100
+    )
+    asyncio.run(orch.ahandle_user_message("what is recursion?"))
+    asyncio.run(orch.ahandle_user_message("explain this code:\n" + _CODE))
+    assert threads[0] == threading.get_ident() != threads[1]
+
+
+def test_async_stream_guard_cuts_off_code_dump() -> None:
+    class _Provider:
+        closed = False
+
+        def send(self, prompt, intent, max_tokens=None):
+            raise AssertionError("send() used although astream() exists")
+
+        async def astream(self, *, prompt, intent, max_tokens=None):
+            try:
+                yield "Here is the whole thing:\ndef solve(grid):\n"
+                for line in _CODE.splitlines(keepends=True):
+                    yield line
+            finally:
+                type(self).closed = True
+
+    store = _Store()
+    res = asyncio.run(
+        Orchestrator(provider=_Provider(), store=store).ahandle_user_message("help with my loop")
+    )
+    assert res.text.endswith(templates.CODE_REDIRECT)
+    assert _Provider.closed and store.rows[0]["llm_raw"]["aborted"]
+
+
+def test_async_refuses_disallowed_without_calling_provider() -> None:
+    provider, store = _SlowAsyncProvider(), _Store()
+    orch = Orchestrator(provider=provider, store=store)
+    result = asyncio.run(
+        orch.ahandle_user_message("write the full code for my assignment solution")
+    )
+    assert provider.peak == 0
+    assert result.text == store.rows[0]["sanitized_text"]
+    assert store.rows[0]["metadata"]["decision"] == "disallowed"
@@ -0,0 +1,43 @@
+# tests/test_classifier_batch.py
+from __future__ import annotations
+
+import itertools
+
+import pytest
+
+from edututor.core.classifiers import Intent, classify_intent, classify_intents_batch
+
+_TEXTS = [
+    "write the code for quicksort",
+    "explain recursion in simple words",
+    "what does this traceback mean",
+    "walk me through this code",
+    "",
+    "hello there",
+]
+_HINTS = [None, Intent.CONCEPT, Intent.ERROR, Intent.EXPLAIN_CODE, Intent.CONCEPT, None]
+
+
+def test_batch_in_process_matches_single_calls() -> None:
+    expected = [classify_intent(t, user_hint=h) for t, h in zip(_TEXTS, _HINTS)]
+    assert list(classify_intents_batch(_TEXTS, _HINTS)) == expected
+
+
+def test_batch_process_pool_preserves_order() -> None:
+    texts = [f"{t} #{i}" for i, t in enumerate(_TEXTS * 50)]
+    expected = [classify_intent(t) for t in texts]
+    out = classify_intents_batch(texts, workers=2, chunksize=7, min_pool_size=10)
+    assert list(out) == expected
+
+
+def test_batch_streams_from_generators() -> None:
+    texts = (t for t in itertools.islice(itertools.cycle(_TEXTS), 40))
+    hints = (h for h in itertools.islice(itertools.cycle(_HINTS), 40))
+    out = classify_intents_batch(texts, hints, workers=2, chunksize=3, min_pool_size=5)
+    assert next(out) == classify_intent(_TEXTS[0], user_hint=_HINTS[0])
+    assert len(list(out)) == 39
+
+
+def test_batch_rejects_mismatched_hints() -> None:
+    with pytest.raises(ValueError):
+        list(classify_intents_batch(_TEXTS, _HINTS[:2]))
@@ -0,0 +1,233 @@
+# tests/test_classifier_engine.py
+from __future__ import annotations
+
+import random
+import re
+from typing import Optional
+
+import pytest
+
+from edututor.core.classifiers import ClassifiedIntent, Intent, classify_intent
+
+# Reference copy of the original multi-regex classifier. The fused scanner must
+# agree with it on every input.
+_LEGACY_DISALLOWED_RE = re.compile(
+    r"""
+    (?ix)
+    \b(
+        write|implement|code|solve|complete|fill\ in|finish|
+        generate|produce|give|provide|paste|spit\ out|send\ me
+    )\b
+    [^.\n\r]{0,50}
+    \b(
+        code|function|class|program|solution|implementation|script|method
+    )s?\b
+    |
+    \b(share|post)\b[^.\n\r]{0,30}\b(code|full\ solution|entire)\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+_LEGACY_EXPLAIN_RE = re.compile(
+    r"(?ix)\b(explain|walk\ me\ through|annotate|what\ does\ this|what\ does\ this\ code)\b"
+)
+_LEGACY_ERROR_RE = re.compile(
+    r"(?ix)\b(error|exception|traceback|stack\ trace|segmentation\ fault|undefined\ reference)\b"
+)
+_LEGACY_CONCEPT_RE = re.compile(
+    r"(?ix)\b(explain|what\ is|how\ does|teach|overview|concept|intuition)\b"
+)
+_LEGACY_CODE_INDICATORS_RE = re.compile(
+    r"(?ix)\b(function|method|snippet|this\ code|this\ function|my\ function|my\ method"
+    r"|class|module)\b"
+)
+
+
+def _legacy_classify(text: str, user_hint: Optional[Intent] = None) -> ClassifiedIntent:
+    t = (text or "").strip()
+    if not t:
+        return ClassifiedIntent(Intent.UNKNOWN, "Empty or whitespace-only input", user_hint)
+    if _LEGACY_DISALLOWED_RE.search(t):
+        return ClassifiedIntent(
+            Intent.DISALLOWED, "Matched disallowed request for code/solution", user_hint
+        )
+    if user_hint in (Intent.CONCEPT, Intent.ERROR, Intent.EXPLAIN_CODE):
+        return ClassifiedIntent(user_hint, f"User hinted {user_hint.name}", user_hint)
+    if _LEGACY_ERROR_RE.search(t):
+        return ClassifiedIntent(Intent.ERROR, "Matched error-related phrasing", user_hint)
+    if _LEGACY_CODE_INDICATORS_RE.search(t):
+        return ClassifiedIntent(
+            Intent.EXPLAIN_CODE, "Matched explain-code phrasing / code indicators", user_hint
+        )
+    if _LEGACY_CONCEPT_RE.search(t):
+        return ClassifiedIntent(Intent.CONCEPT, "Matched concept phrasing", user_hint)
+    if _LEGACY_EXPLAIN_RE.search(t):
+        return ClassifiedIntent(Intent.EXPLAIN_CODE, "Matched explain-style phrasing", user_hint)
+    return ClassifiedIntent(Intent.UNKNOWN, "No pattern matched", user_hint)
+
+
+_WORDS = [
+    "write", "implement", "code", "codes", "solve", "complete", "fill", "in", "finish",
+    "generate", "give", "paste", "spit", "out", "send", "me", "share", "post", "function",
+    "functions", "class", "classes", "program", "solution", "script", "method", "full",
+    "entire", "explain", "walk", "through", "annotate", "what", "does", "this", "is", "how",
+    "teach", "overview", "concept", "intuition", "error", "exception", "traceback", "stack",
+    "trace", "segmentation", "fault", "undefined", "reference", "snippet", "my", "module",
+    "the", "a", "recursion", "quicksort", "x_1", "error_code", "WRITE", "Code", "İs",
+    "claſs", "Kode", "ſhare",
+]  # fmt: skip
+_SEPARATORS = [" ", " ", " ", "  ", ".", ". ", "\n", "\r\n", ", ", "-", "_", "(", ") ", "\t"]
+
+
+def _random_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(1, 25)):
+        parts.append(rng.choice(_WORDS))
+        parts.append(rng.choice(_SEPARATORS))
+    if rng.random() < 0.2:
+        parts.insert(rng.randrange(len(parts)), "x" * rng.randint(20, 60))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_fused_scanner_matches_legacy_regexes(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(500):
+        text = _random_text(rng)
+        hint = rng.choice([None, Intent.CONCEPT, Intent.ERROR, Intent.EXPLAIN_CODE])
+        assert classify_intent(text, user_hint=hint) == _legacy_classify(text, hint), text
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "   \n  ",
+        "what does this code do",
+        "what does this do",
+        "write it all down. then the function",
+        "write " + "x" * 50 + " code",
+        "write " + "x" * 51 + " code",
+        "share " + "y" * 28 + " full solution",
+        "post the\nentire thing",
+        "code",
+        "code code",
+        "Explain Recursion",
+        "WHAT İS a heap",
+    ],
+)
+def test_fused_scanner_edge_cases(text: str) -> None:
+    assert classify_intent(text) == _legacy_classify(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "give " * 10_000 + "function",
+        "give " * 10_000 + "x" * 60 + " function",
+        "write it.code it.share it.post it.\n" * 2_000,
+        "    result = generate(codec, classy=solve(items), fill_in=provide)\n" * 1_000,
+    ],
+)
+def test_disallowed_window_on_adversarial_input(text: str) -> None:
+    assert classify_intent(text) == _legacy_classify(text)
+
+
+_CODE_LINE = "    if node.left is not None:\n        stack.append(node.left)\n"
+
+
+def test_large_input_uses_bounded_scan() -> None:
+    text = "# a tree walker\n" + _CODE_LINE * 20_000
+    ci = classify_intent(text, large_input_threshold=10_000)
+    assert ci.intent == Intent.EXPLAIN_CODE
+    assert ci.reason.startswith("Bounded scan of large input")
+    assert "40001 lines" in ci.reason
+    assert "Code-like structure" in ci.reason
+
+
+def test_large_input_sees_traceback_at_the_tail() -> None:
+    text = _CODE_LINE * 5_000 + "Traceback (most recent call last):\n  ValueError: bad\n"
+    assert classify_intent(text, large_input_threshold=10_000).intent == Intent.ERROR
+
+
+def test_large_input_only_scans_the_window() -> None:
+    middle = "please write the whole program for me. "
+    text = "lorem ipsum " * 2_000 + middle + "lorem ipsum " * 2_000
+    assert classify_intent(text, large_input_threshold=None).intent == Intent.DISALLOWED
+    bounded = classify_intent(text, large_input_threshold=1_000)
+    assert bounded.intent == Intent.UNKNOWN
+    assert "Bounded scan" in bounded.reason
+
+
+def test_large_input_respects_hint_and_disallowed_window() -> None:
+    text = "give me the full solution code\n" + "x = 1\n" * 10_000
+    hinted = classify_intent(text, user_hint=Intent.CONCEPT, large_input_threshold=1_000)
+    assert hinted.intent == Intent.DISALLOWED
+    plain = classify_intent(text[31:], user_hint=Intent.CONCEPT, large_input_threshold=1_000)
+    assert plain.intent == Intent.CONCEPT
+
+
+def test_features_describe_the_input() -> None:
+    text = "explain this:\n\n  x = f(1)\n  y = 2\nthanks é"
+    ci = classify_intent(f"  {text} ")
+    assert ci.features is not None
+    assert ci.features.line_count == 5
+    assert ci.features.code_like_ratio == 0.5
+    assert ci.features.traceback_span is None
+    assert ci.features.byte_length == len(text.encode())
+
+
+@pytest.mark.parametrize(
+    "trace, first, last",
+    [
+        (
+            'Traceback (most recent call last):\n  File "a.py", line 3, in <module>\n'
+            "    main()\nValueError: bad value",
+            "Traceback",
+            "ValueError: bad value",
+        ),
+        (
+            'Exception in thread "main" java.lang.NullPointerException\n'
+            "\tat com.x.App.run(App.java:12)\n\tat com.x.App.main(App.java:5)",
+            "Exception in thread",
+            "(App.java:5)",
+        ),
+        (
+            "TypeError: x is undefined\n    at go (/srv/app.js:10:5)\n    at /srv/app.js:20:1",
+            "TypeError",
+            "app.js:20:1",
+        ),
+        ("main.c:4:5: error: expected ';' before '}' token", "main.c", "token"),
+    ],
+)
+def test_features_locate_traceback_span(trace: str, first: str, last: str) -> None:
+    text = f"why does this fail?\n{trace}\nplease help"
+    ci = classify_intent(text)
+    assert ci.features is not None and ci.features.traceback_span is not None
+    start, end = ci.features.traceback_span
+    assert text[start:end].startswith(first)
+    assert text[start:end].endswith(last)
+
+
+def test_features_are_not_part_of_equality() -> None:
+    ci = classify_intent("explain recursion")
+    assert ci.features is not None
+    assert ci == ClassifiedIntent(ci.intent, ci.reason, None)
+
+
+def test_features_cover_the_whole_input_after_a_refusal() -> None:
+    text = "write the code for me\nx = f(1)\n\nKeyError: 'a'"
+    ci = classify_intent(text)
+    assert ci.intent == Intent.DISALLOWED
+    assert ci.features is not None
+    assert ci.features.line_count == 4
+    assert ci.features.code_like_ratio == 1 / 3
+    assert ci.features.traceback_span == (text.index("KeyError"), len(text))
+
+
+def test_large_input_features_come_from_the_bounded_scan() -> None:
+    text = "explain this\n" + "x = 1\n" * 2_000 + "ValueError: bad"
+    ci = classify_intent(text, large_input_threshold=1_000)
+    assert ci.features is not None
+    assert ci.features.line_count == 2_002
+    assert ci.features.code_like_ratio > 0.9
+    assert ci.features.traceback_span == (len(text) - len("ValueError: bad"), len(text))
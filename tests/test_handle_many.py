@@ -0,0 +1,90 @@
+# tests/test_handle_many.py
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from edututor.core.orchestrator import Orchestrator
+from edututor.llm.mock import MockLLM
+from edututor.persistence.store import ConversationStore
+
+
+class _SlowProvider:
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = self.peak = 0
+
+    def send(self, prompt, intent, max_tokens=None):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if "boom" in prompt.payload:
+            raise RuntimeError("provider failed")
+        return f"Think about {prompt.payload.split()[-1]}"
+
+
+class _BatchStore:
+    def __init__(self) -> None:
+        self.batches = []
+
+    def save_conversation(self, **kwargs):
+        raise AssertionError("rows saved one at a time")
+
+    def save_conversations(self, rows):
+        self.batches.append(list(rows))
+        return list(range(len(rows)))
+
+
+_QUESTIONS = [f"what is a stack, part {i}" for i in range(12)]
+
+
+def test_results_in_input_order_with_one_batched_write() -> None:
+    provider, store = _SlowProvider(), _BatchStore()
+    orch = Orchestrator(provider=provider, store=store, stream_guard_lines=None)
+    started = time.perf_counter()
+    results = orch.handle_many(_QUESTIONS, max_concurrency=4)
+    assert time.perf_counter() - started < 0.05 * len(_QUESTIONS) / 2
+    assert provider.peak == 4
+    assert [r.index for r in results] == list(range(len(_QUESTIONS)))
+    assert all(r.ok and r.result.text == f"Think about {i}" for i, r in enumerate(results))
+    assert len(store.batches) == 1
+    assert [row["user_text"] for row in store.batches[0]] == _QUESTIONS
+
+
+def test_failures_are_isolated() -> None:
+    store = _BatchStore()
+    orch = Orchestrator(provider=_SlowProvider(0), store=store, stream_guard_lines=None)
+    results = orch.handle_many(["what is a queue", "what is boom", "what is a heap"])
+    assert [r.ok for r in results] == [True, False, True]
+    assert isinstance(results[1].error, RuntimeError) and results[1].result is None
+    assert [row["user_text"] for row in store.batches[0]] == ["what is a queue", "what is a heap"]
+
+
+def test_as_completed_yields_every_item_then_saves() -> None:
+    store = _BatchStore()
+    orch = Orchestrator(provider=_SlowProvider(0.01), store=store, stream_guard_lines=None)
+    it = orch.handle_many(_QUESTIONS, max_concurrency=3, as_completed=True)
+    assert not store.batches
+    assert sorted(r.index for r in it) == list(range(len(_QUESTIONS)))
+    assert len(store.batches[0]) == len(_QUESTIONS)
+
+
+def test_batch_is_stored_in_sqlite(tmp_path) -> None:
+    store = ConversationStore(str(tmp_path / "db.sqlite"))
+    results = Orchestrator(provider=MockLLM(), store=store).handle_many(
+        ["what is recursion?", "write the code for me"], max_concurrency=2
+    )
+    rows = store.fetch_recent(10)
+    assert sorted(r.user_text for r in rows) == ["what is recursion?", "write the code for me"]
+    assert {r.sanitized_text for r in rows} == {r.result.text for r in results}
+
+
+def test_rejects_bad_concurrency() -> None:
+    with pytest.raises(ValueError):
+        Orchestrator(provider=MockLLM(), store=_BatchStore()).handle_many(["x"], max_concurrency=0)
@@ -0,0 +1,102 @@
+# tests/test_intent_cache.py
+from __future__ import annotations
+
+import threading
+
+from edututor.core.classifiers import Intent, classify_intent
+from edututor.core.intent_cache import IntentCache, normalize_text
+from edututor.core.orchestrator import Orchestrator
+
+
+def test_normalize_text_folds_case_and_whitespace() -> None:
+    assert normalize_text("  Explain\t\tRecursion  ") == "explain recursion"
+    assert normalize_text("write it \n\n  code") == "write it\ncode"
+
+
+def test_cache_hits_on_normalized_repeats() -> None:
+    cache = IntentCache(maxsize=8)
+    first = cache("Explain recursion")
+    second = cache("  explain RECURSION ")
+    assert first == second == classify_intent("explain recursion")
+    assert second.features == classify_intent("explain recursion").features
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+    assert info.hit_rate == 0.5
+
+
+def test_cached_results_match_uncached_ones() -> None:
+    cache = IntentCache(maxsize=8)
+    near, far = "write code for me", "write" + " " * 60 + "code for me"
+    for text in (near, far, near, "  WRITE CODE for me\n", far):
+        assert cache(text) == classify_intent(text)
+        assert cache(text).features == classify_intent(text).features
+    assert cache(near) != cache(far)
+    assert cache.cache_info().currsize == 1
+
+
+def test_cache_keys_include_hint() -> None:
+    cache = IntentCache(maxsize=8)
+    assert cache("some question").intent == Intent.UNKNOWN
+    assert cache("some question", user_hint=Intent.CONCEPT).intent == Intent.CONCEPT
+    assert cache.cache_info().misses == 2
+
+
+def test_cache_evicts_lru_by_count_and_bytes() -> None:
+    cache = IntentCache(maxsize=2, max_bytes=1000)
+    cache("a")
+    cache("b")
+    cache("a")
+    cache("c")  # evicts "b"
+    cache("b")
+    assert cache.cache_info().misses == 4
+
+    small = IntentCache(maxsize=100, max_bytes=30, max_entry_bytes=20)
+    small("x" * 15)
+    small("y" * 15)  # 30 bytes total still fits
+    small("z" * 15)  # pushes out the oldest
+    assert small.cache_info().currbytes == 30
+
+
+def test_oversized_inputs_bypass_the_cache() -> None:
+    cache = IntentCache(maxsize=4, max_entry_bytes=64)
+    cache("explain recursion")
+    big = "walk me through this code " * 100
+    result = cache(big)
+    assert result == classify_intent(big)
+    assert result.features == classify_intent(big).features
+    info = cache.cache_info()
+    assert (info.bypassed, info.currsize) == (1, 1)
+
+
+def test_cache_is_thread_safe() -> None:
+    cache = IntentCache(maxsize=16)
+    prompts = [f"explain topic {i % 20}" for i in range(400)]
+
+    def worker() -> None:
+        for p in prompts:
+            assert cache(p).intent == Intent.CONCEPT
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    info = cache.cache_info()
+    assert info.hits + info.misses == 1600
+    assert info.currsize <= 16
+
+
+def test_orchestrator_uses_injected_classifier() -> None:
+    class _Provider:
+        def send(self, prompt, intent, max_tokens=None):
+            return "ok"
+
+    class _Store:
+        def save_conversation(self, **kwargs):
+            return 1
+
+    cache = IntentCache()
+    o = Orchestrator(provider=_Provider(), store=_Store(), classifier=cache)
+    o.handle_user_message("Explain recursion")
+    o.handle_user_message("explain RECURSION ")
+    assert cache.cache_info().hits == 1
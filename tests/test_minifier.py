@@ -0,0 +1,155 @@
+# tests/test_minifier.py
+from __future__ import annotations
+
+import re
+
+from edututor.core.minifier import MinifyLevel, guess_language, minify_code, minify_message
+
+_PY_SNIPPET = '''#!/usr/bin/env python3
+# Copyright (c) 2024 Example Org
+"""Word statistics.
+
+Longer description.
+"""
+import os
+import re
+import sys
+from typing import List
+
+TABLE = [
+    1, 2, 3, 4, 5, 6, 7, 8, 9, 10,
+    11, 12, 13, 14, 15, 16, 17, 18, 19, 20,
+]
+BANNER = "a banner string that is much longer than anyone needs in order to explain the code"
+
+
+def count(words: List[str]) -> int:
+    """Count characters.
+
+    Args: words
+    """
+    total = 0  # running total
+    for w in words:
+
+        total += len(w)
+    "-".join(words)
+    print(1, 2, 3, 4, 5, 6, 7)
+    return total
+'''
+
+_C_SNIPPET = """#include <stdio.h>
+/* block
+ * comment */
+int main(void) {
+    // greet
+    const char *msg = "a very very long string literal that keeps going and going and on";
+    int data[] = {
+        1, 2, 3,
+        4, 5, 6,
+        7, 8, 9,
+        1, 2, 3,
+        4, 5, 6,
+    };
+    --i;
+    printf("%s // not a comment\\n", msg);
+    return 0;
+}
+"""
+
+
+def _lines(text: str) -> dict:
+    """Map original line number -> kept content."""
+    out = {}
+    for row in text.splitlines():
+        m = re.match(r"^\s*(\d+)\| (.*)$", row)
+        assert m, row
+        out[int(m.group(1))] = m.group(2)
+    return out
+
+
+def test_guess_language() -> None:
+    assert guess_language(_PY_SNIPPET) == "python"
+    assert guess_language(_C_SNIPPET) == "generic"
+
+
+def test_light_keeps_code_and_line_numbers() -> None:
+    out = minify_code(_PY_SNIPPET, level=MinifyLevel.LIGHT)
+    kept = _lines(out.text)
+    source = _PY_SNIPPET.splitlines()
+    # every kept line is the original line, untouched apart from trailing space
+    for n, line in kept.items():
+        assert line == source[n - 1].rstrip()
+    assert 1 not in kept and 2 not in kept  # shebang, license comment
+    assert kept[4] == ""  # blank line inside the docstring is part of its value
+    assert kept[24] == "    total = 0  # running total"
+    assert 26 not in kept
+
+
+def test_normal_shortens_docstrings_literals_and_comments() -> None:
+    out = minify_code(_PY_SNIPPET, level=MinifyLevel.NORMAL)
+    kept = _lines(out.text)
+    assert kept[3] == '"""Word statistics.…"""'
+    assert 4 not in kept and 5 not in kept
+    assert kept[12] == "TABLE = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, … (20 items)]"
+    assert 13 not in kept
+    assert kept[24] == "    total = 0"
+    assert kept[29] == "    print(1, 2, 3, 4, 5, 6, 7)"  # call arguments are not data
+    assert kept[28] == '    "-".join(words)'  # not a docstring
+    assert out.minified_tokens < out.original_tokens
+
+
+def test_aggressive_drops_docstrings_and_collapses_imports() -> None:
+    out = minify_code(_PY_SNIPPET, level=MinifyLevel.AGGRESSIVE)
+    kept = _lines(out.text)
+    assert kept[7] == "# 4 imports: os, re, sys, typing"
+    assert all('"""' not in line for line in kept.values())
+    assert kept[12] == "TABLE = [1, 2, 3, 4, … (20 items)]"
+    assert kept[16] == 'BANNER = "a banner string that is …"'
+    assert kept[19] == "def count(words: List[str]) -> int:"
+
+
+def test_token_budget_escalates_then_truncates() -> None:
+    out = minify_code(_PY_SNIPPET, token_budget=70)
+    assert out.level == MinifyLevel.AGGRESSIVE
+    assert out.minified_tokens <= 70
+    assert out.truncated
+    assert re.search(r"… lines \d+-\d+ omitted …", out.text)
+    # the end of the snippet is kept
+    assert out.text.endswith("30|     return total")
+
+
+def test_generic_fallback_is_conservative() -> None:
+    kept = _lines(minify_code(_C_SNIPPET, level=MinifyLevel.AGGRESSIVE).text)
+    assert kept[1] == "#include <stdio.h>"
+    assert 2 not in kept and 3 not in kept and 5 not in kept
+    assert kept[14] == "    --i;"
+    assert kept[15] == '    printf("%s // not a comment\\n", msg);'
+    assert kept[6] == '    const char *msg = "a very very long string …";'
+    assert kept[11] == "        …" and 12 not in kept
+
+
+def test_untokenizable_python_falls_back() -> None:
+    out = minify_code('def f(:\n    s = """never closed\n', language=".py")
+    assert out.language == "generic"
+    assert _lines(out.text)[1] == "def f(:"
+
+
+def test_message_keeps_prose_and_minifies_fenced_code() -> None:
+    message = (
+        "Why does this loop forever? It's odd.\n"
+        "```js\nlet i = 0; // counter\nwhile (i < 3) {\n  // nothing\n}\n```\n"
+        "Also what's # doing in 'my' other file?"
+    )
+    out = minify_message(message)
+    assert out.language == "js"
+    assert out.text == (
+        "Why does this loop forever? It's odd.\n"
+        "```js\n1| let i = 0;\n2| while (i < 3) {\n4| }\n```\n"
+        "Also what's # doing in 'my' other file?"
+    )
+
+
+def test_message_without_code_is_unchanged() -> None:
+    message = "Can you explain what my function does? It's confusing # really"
+    out = minify_message(message)
+    assert out.text == message and out.language == ""
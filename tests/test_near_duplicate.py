@@ -0,0 +1,97 @@
+# tests/test_near_duplicate.py
+from __future__ import annotations
+
+import pytest
+
+from edututor.core.classifiers import Intent
+from edututor.core.near_duplicate import NearDuplicateCache, question_features
+from edututor.core.orchestrator import Orchestrator
+from edututor.core.response_cache import CachedReply
+from edututor.llm.mock import MockLLM
+from edututor.persistence.store import ConversationStore
+
+_REPLY = CachedReply("Recursion is a function calling itself...", {}, 12)
+
+
+class _CountingProvider:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def send(self, prompt, intent, max_tokens=None):
+        self.calls += 1
+        return MockLLM().send(prompt=prompt, intent=intent)
+
+
+def test_features_drop_filler_and_fold_plurals() -> None:
+    assert question_features("What is recursion?") == {"recursion"}
+    assert question_features("explain recursion pls") == question_features("recursion??")
+    assert question_features("explain linked lists") == {"linked", "list"}
+    assert question_features("what is this") == {"what", "is", "this"}
+
+
+def test_rephrasings_hit_and_other_topics_miss() -> None:
+    cache = NearDuplicateCache()
+    cache.put("what is recursion", Intent.CONCEPT, "s", _REPLY)
+    for q in ("explain recursion pls", "recursion??", "What is RECURSION"):
+        lookup = cache.get(q, Intent.CONCEPT, "s")
+        assert lookup.reply == _REPLY and lookup.tier == "near" and lookup.similarity == 1.0
+    assert cache.get("what is a linked list", Intent.CONCEPT, "s").reply is None
+    # another scope (provider, model or prompt prefix) never matches
+    assert cache.get("recursion??", Intent.CONCEPT, "other").reply is None
+    # errors and long pastes are not served by default
+    assert cache.get("recursion??", Intent.ERROR, "s").reply is None
+    assert cache.get("recursion " * 100, Intent.CONCEPT, "s").reply is None
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.skipped) == (3, 2, 2)
+
+
+def test_follow_up_requests_are_not_rephrasings() -> None:
+    cache = NearDuplicateCache()
+    cache.put("what is recursion?", Intent.CONCEPT, "s", _REPLY)
+    for q in (
+        "more examples of recursion please",
+        "recursion example",
+        "explain recursion again",
+        "what does recursion mean",
+    ):
+        assert cache.get(q, Intent.CONCEPT, "s").reply is None, q
+
+
+def test_index_is_bounded() -> None:
+    cache = NearDuplicateCache(maxsize=3)
+    for topic in ("stack", "queue", "heap", "trie", "graph"):
+        cache.put(f"what is a {topic}", Intent.CONCEPT, "s", _REPLY)
+    info = cache.cache_info()
+    assert info.currsize == 3 and info.buckets == 3 * cache.bands
+    assert cache.get("what is a stack", Intent.CONCEPT, "s").reply is None
+    assert cache.get("explain graphs", Intent.CONCEPT, "s").reply is not None
+    # re-answering a question replaces its entry
+    cache.put("graphs?", Intent.CONCEPT, "s", CachedReply("new", {}, 1))
+    assert cache.cache_info().currsize == 3
+    assert cache.get("what is a graph", Intent.CONCEPT, "s").reply.text == "new"
+
+
+def test_rejects_bad_parameters() -> None:
+    with pytest.raises(ValueError):
+        NearDuplicateCache(num_perm=64, bands=10)
+    with pytest.raises(ValueError):
+        NearDuplicateCache(threshold=0)
+
+
+def test_orchestrator_answers_rephrasing_from_cache(tmp_path) -> None:
+    store = ConversationStore(str(tmp_path / "db.sqlite"))
+    provider = _CountingProvider()
+    orch = Orchestrator(provider=provider, store=store, near_duplicate_cache=NearDuplicateCache())
+    first = orch.handle_user_message("what is recursion?")
+    second = orch.handle_user_message("explain recursion pls")
+    assert provider.calls == 1 and second.text == first.text
+    meta = store.fetch_recent(1)[0].metadata["cache"]
+    assert meta["hit"] and meta["tier"] == "near" and meta["similarity"] == 1.0
+
+    # a fresh process rebuilds the index from history; "recursion??" is
+    # UNKNOWN to the classifier but answered like a concept question
+    rebuilt = NearDuplicateCache()
+    assert rebuilt.rebuild(store) == 2
+    orch = Orchestrator(provider=provider, store=store, near_duplicate_cache=rebuilt)
+    assert orch.handle_user_message("recursion??").text == first.text
+    assert provider.calls == 1
@@ -12,7 +12,7 @@ class DummyProvider:
     def __init__(self, resp_text="ok"):
         self._resp_text = resp_text
 
-    def send(self, prompt, intent):
+    def send(self, prompt, intent, max_tokens=None):
         return DummyResp(self._resp_text, raw={"mock": True})
 
 
@@ -38,3 +38,134 @@ def test_orchestrator_basic(monkeypatch):
     assert len(store.rows) == 1
     saved = store.rows[0]
     assert saved["user_text"] == "Explain recursion"
+
+
+def test_orchestrator_records_input_features():
+    store = DummyStore()
+    o = Orchestrator(provider=DummyProvider("fine"), store=store)
+    o.handle_user_message("explain this\nx = f(1)")
+    meta = store.rows[0]["metadata"]
+    assert meta["input"]["line_count"] == 2
+    assert meta["input"]["byte_length"] == len("explain this\nx = f(1)")
+
+
+def test_orchestrator_compacts_error_tracebacks():
+    class RecordingProvider(DummyProvider):
+        def send(self, prompt, intent, max_tokens=None):
+            self.prompt = prompt
+            return super().send(prompt, intent)
+
+    trace = (
+        "Traceback (most recent call last):\n"
+        + "".join(
+            f'  File "/srv/site-packages/m{i}.py", line {i}, in f{i}\n    g()\n' for i in range(50)
+        )
+        + "ZeroDivisionError: division by zero"
+    )
+    provider = RecordingProvider("look at the divisor")
+    store = DummyStore()
+    Orchestrator(provider=provider, store=store).handle_user_message("I got an error\n" + trace)
+    prompt_meta = store.rows[0]["metadata"]["prompt"]
+    assert prompt_meta["reduction"] == "traceback"
+    assert prompt_meta["compacted_tokens"] < prompt_meta["original_tokens"]
+    assert "ZeroDivisionError: division by zero" in provider.prompt
+    assert len(provider.prompt) < len(trace)
+    assert store.rows[0]["user_text"].endswith(trace)
+
+
+def test_orchestrator_minifies_explain_code_snippets():
+    from edututor.core.classifiers import Intent
+
+    class RecordingProvider(DummyProvider):
+        def send(self, prompt, intent, max_tokens=None):
+            self.prompt = prompt
+            return super().send(prompt, intent)
+
+    code = "import os\n\n" + "".join(
+        f"# step {i}: a long explanatory comment nobody needs\nx{i} = {i}\n\n" for i in range(40)
+    )
+    provider = RecordingProvider("each line assigns a value")
+    store = DummyStore()
+    o = Orchestrator(provider=provider, store=store, code_token_budget=120)
+    o.handle_user_message(code, user_hint=Intent.EXPLAIN_CODE)
+    prompt_meta = store.rows[0]["metadata"]["prompt"]
+    assert prompt_meta["reduction"] == "minify"
+    assert prompt_meta["language"] == "python"
+    assert prompt_meta["compacted_tokens"] <= 120 < prompt_meta["original_tokens"]
+    assert "# step" not in provider.prompt
+    assert "  4| x0 = 0" in provider.prompt
+    assert store.rows[0]["user_text"] == code
+
+
+def test_orchestrator_records_token_estimates():
+    store = DummyStore()
+    Orchestrator(provider=DummyProvider("A short reply."), store=store).handle_user_message(
+        "what is a queue?"
+    )
+    tokens = store.rows[0]["metadata"]["tokens"]
+    assert tokens["prompt"] == tokens["prefix"] + tokens["payload"]
+    assert tokens["completion"] > 0 and not tokens["trimmed"]
+    assert tokens["prompt_budget"] is not None
+
+
+def test_orchestrator_trims_payload_to_prompt_budget():
+    from edututor.core.classifiers import classify_intent
+    from edututor.core.policy import PolicyEngine
+    from edututor.core.prompts import prompt_prefix
+
+    class _Provider(DummyProvider):
+        def send(self, prompt, intent, max_tokens=None):
+            self.prompt, self.max_tokens = prompt, max_tokens
+            return super().send(prompt, intent, max_tokens)
+
+    engine = PolicyEngine({"CONCEPT": {"prompt_tokens": 600, "completion_tokens": 100}})
+    provider, store = _Provider(), DummyStore()
+    text = "why does my recursion never stop? " * 400
+    Orchestrator(provider=provider, store=store, policy=engine).handle_user_message(text)
+    tokens = store.rows[0]["metadata"]["tokens"]
+    assert tokens["trimmed"] and tokens["prompt"] <= 600
+    assert provider.prompt.tokens == tokens["prompt"]
+    assert provider.prompt.prefix is prompt_prefix(engine(classify_intent(text)))
+    assert "tokens omitted" in provider.prompt.payload
+    assert provider.max_tokens == 100
+
+
+def test_orchestrator_minifies_only_the_code_in_a_message():
+    from edututor.core.classifiers import Intent
+
+    class RecordingProvider(DummyProvider):
+        def send(self, prompt, intent, max_tokens=None):
+            self.prompt = prompt
+            return super().send(prompt, intent)
+
+    prose = "I don't get the loop because honestly it's really confusing."
+    code = (
+        "def total(xs):\n"
+        "    # add the values up one at a time, keeping a running total in s\n"
+        "    s = 0\n    for x in xs:\n        s += x\n"
+    )
+    message = f"{prose}\n\n{code}\nAlso what's # doing?"
+    provider = RecordingProvider("it adds each value")
+    store = DummyStore()
+    Orchestrator(provider=provider, store=store).handle_user_message(
+        message, user_hint=Intent.EXPLAIN_CODE
+    )
+    assert store.rows[0]["metadata"]["prompt"]["reduction"] == "minify"
+    assert prose in provider.prompt
+    assert provider.prompt.rstrip().endswith("Also what's # doing?")
+    assert "running total" not in provider.prompt
+    assert "1| def total(xs):\n3|     s = 0" in provider.prompt
+
+
+def test_orchestrator_refuses_disallowed_without_calling_provider():
+    from edututor.core.classifiers import Intent
+
+    class NoCallProvider:
+        def send(self, prompt, intent, max_tokens=None):
+            raise AssertionError("provider called for a disallowed request")
+
+    store = DummyStore()
+    o = Orchestrator(provider=NoCallProvider(), store=store)
+    res = o.handle_user_message("write the full code for my assignment solution")
+    assert res.intent == Intent.DISALLOWED
+    assert store.rows[0]["metadata"]["decision"] == "disallowed"
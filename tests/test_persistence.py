@@ -2,6 +2,9 @@
 from __future__ import annotations
 
 import json
+import sqlite3
+
+import pytest
 
 from edututor.persistence.store import ConversationStore
 
@@ -32,3 +35,28 @@ def test_save_and_fetch_roundtrip(tmp_path) -> None:
     exported = store.export_json(limit=1)
     parsed = json.loads(exported)
     assert isinstance(parsed, list) and parsed[0]["user_text"] == "Explain recursion"
+
+
+def test_save_conversations_in_one_batch(tmp_path) -> None:
+    store = ConversationStore(db_path=str(tmp_path / "test.db"))
+    rows = [
+        dict(
+            user_text=f"q{i}", intent="CONCEPT", provider="MockLLM", llm_raw={}, sanitized_text="a"
+        )
+        for i in range(3)
+    ]
+    ids = store.save_conversations(rows)
+    assert ids == sorted(ids) and len(set(ids)) == 3
+    assert [store.fetch_by_id(i).user_text for i in ids] == ["q0", "q1", "q2"]
+    assert store.save_conversations([]) == []
+
+
+def test_failed_batch_writes_nothing(tmp_path) -> None:
+    store = ConversationStore(db_path=str(tmp_path / "test.db"))
+    rows = [
+        dict(user_text=text, intent="CONCEPT", provider="MockLLM", llm_raw={}, sanitized_text="a")
+        for text in ("q0", "q1", "q2", None)
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        store.save_conversations(rows)
+    assert store.fetch_recent(10) == []
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from edututor.core.classifiers import ClassifiedIntent, Intent
-from edututor.core.policy import decide_response
+import json
+
+import pytest
+
+from edututor.core.classifiers import ClassifiedIntent, Intent, classify_intent
+from edututor.core.policy import PolicyEngine, decide_response, read_policy, set_policy
 
 
 def _mk(intent: Intent, reason: str = "t") -> ClassifiedIntent:
@@ -30,3 +34,63 @@ def test_policy_explain_code_allows_with_scaffold() -> None:
     decision = decide_response(_mk(Intent.EXPLAIN_CODE))
     assert decision.allowed is True
     assert "walk through" in decision.scaffold.lower() or "walk" in decision.scaffold.lower()
+
+
+def test_policy_unknown_prose_defaults_to_concept() -> None:
+    decision = decide_response(classify_intent("hello there"))
+    assert "Definition" in decision.scaffold
+
+
+def test_policy_reuses_one_decision_per_intent_and_reason() -> None:
+    first = decide_response(_mk(Intent.CONCEPT, "same"))
+    assert decide_response(_mk(Intent.CONCEPT, "same")) is first
+    assert decide_response(_mk(Intent.CONCEPT, "other")).reason == "other"
+    assert decide_response(classify_intent("hello")) is decide_response(classify_intent("hey"))
+
+
+def test_policy_engine_overrides() -> None:
+    engine = PolicyEngine(
+        {"ERROR": {"question_count": 1}, Intent.CONCEPT: {"scaffold": "Plain words: {x}"}}
+    )
+    assert len(engine(_mk(Intent.ERROR)).questions) == 1
+    assert len(engine(_mk(Intent.EXPLAIN_CODE)).questions) == 2
+    assert engine(_mk(Intent.CONCEPT)).scaffold == "Plain words: {x}"
+    # unknown prose falls back to the (overridden) concept answer
+    assert engine(classify_intent("hello there")).scaffold == "Plain words: {x}"
+    assert decide_response(_mk(Intent.CONCEPT)).scaffold != "Plain words: {x}"
+
+
+def test_policy_engine_token_budgets() -> None:
+    engine = PolicyEngine({"ERROR": {"prompt_tokens": 800, "completion_tokens": None}})
+    decision = engine(_mk(Intent.ERROR))
+    assert (decision.prompt_budget, decision.completion_budget) == (800, None)
+    default = decide_response(_mk(Intent.CONCEPT))
+    assert engine(_mk(Intent.CONCEPT)).prompt_budget == default.prompt_budget
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"SOLUTION": {}},
+        {"UNKNOWN": {"question_count": 1}},
+        {"ERROR": {"allowed": True}},
+        {"ERROR": {"question_count": -1}},
+        {"ERROR": {"questions": "why?"}},
+        {"ERROR": {"prompt_tokens": 0}},
+        {"ERROR": {"completion_tokens": "400"}},
+    ],
+)
+def test_policy_engine_rejects_bad_overrides(overrides) -> None:
+    with pytest.raises(ValueError):
+        PolicyEngine(overrides)
+
+
+def test_policy_file_configures_decide_response(tmp_path) -> None:
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps({"CONCEPT": {"questions": ["Why?", "How?"], "question_count": 1}}))
+    previous = set_policy(read_policy(path))
+    try:
+        assert decide_response(_mk(Intent.CONCEPT)).questions == ("Why?",)
+    finally:
+        set_policy(previous)
+    assert decide_response(_mk(Intent.CONCEPT)).questions != ("Why?",)
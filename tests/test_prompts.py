@@ -0,0 +1,70 @@
+# tests/test_prompts.py
+from __future__ import annotations
+
+import pytest
+
+from edututor.core.classifiers import ClassifiedIntent, Intent, classify_intent
+from edututor.core.orchestrator import Orchestrator
+from edututor.core.policy import SYSTEM_PROMPT, PolicyEngine, decide_response
+from edututor.core.prompts import STATIC_PREFIX, Prompt, PromptBuilder, build_prompt
+from edututor.llm.mock import MockLLM
+
+
+def _decision(intent: Intent, reason: str = "t"):
+    return decide_response(ClassifiedIntent(intent=intent, reason=reason, user_hint=None))
+
+
+def test_prefix_is_rendered_once_and_payload_goes_last() -> None:
+    builder = PromptBuilder()
+    a = builder.build(_decision(Intent.CONCEPT, "a"), "what is a stack?")
+    b = builder.build(_decision(Intent.CONCEPT, "b"), "what is a queue?")
+    assert a.prefix is b.prefix
+    assert a.startswith(SYSTEM_PROMPT) and a.endswith("what is a stack?")
+    assert a.messages()[0] == {"role": "system", "content": a.prefix.text}
+    assert a.messages()[-1] == {"role": "user", "content": "what is a stack?"}
+    info = builder.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_prefix_hash_is_stable_and_distinguishes_decisions() -> None:
+    concept = build_prompt(_decision(Intent.CONCEPT), "x")
+    error = build_prompt(_decision(Intent.ERROR), "y")
+    assert concept.prefix_hash == PromptBuilder().prefix_for(_decision(Intent.CONCEPT)).hash
+    assert concept.prefix_hash != error.prefix_hash
+    # every prefix starts with the same static segment
+    assert concept.prefix.segments[0] == error.prefix.segments[0] == SYSTEM_PROMPT
+    fewer = PolicyEngine({"CONCEPT": {"question_count": 1}})
+    ci = ClassifiedIntent(intent=Intent.CONCEPT, reason="t", user_hint=None)
+    assert build_prompt(fewer(ci), "x").prefix_hash != concept.prefix_hash
+
+
+def test_orchestrator_sends_prompt_and_records_prefix_hash() -> None:
+    class _Provider:
+        def send(self, prompt, intent, max_tokens=None):
+            self.prompt = prompt
+            return MockLLM().send(prompt=prompt, intent=intent)
+
+    class _Store:
+        def save_conversation(self, **kwargs):
+            self.row = kwargs
+
+    provider, store = _Provider(), _Store()
+    res = Orchestrator(provider=provider, store=store).handle_user_message("what is recursion?")
+    assert isinstance(provider.prompt, Prompt)
+    assert provider.prompt.payload == "what is recursion?"
+    assert store.row["metadata"]["prompt"]["prefix_hash"] == provider.prompt.prefix_hash
+    # the mock answers the learner's text, not the instructions
+    assert "Definition" in res.text
+    assert classify_intent("what is recursion?").intent == Intent.CONCEPT
+
+
+def test_openai_payload_keeps_prefix_first() -> None:
+    pytest.importorskip("requests")
+    from edututor.llm.openai_provider import OpenAIProvider
+
+    provider = OpenAIProvider(api_key="k", api_base="http://x", model="m")
+    prompt = build_prompt(_decision(Intent.ERROR), "KeyError: 'a'")
+    assert provider._payload(prompt, Intent.ERROR, None)["messages"] == prompt.messages()
+    messages = provider._payload("plain text", Intent.ERROR, None)["messages"]
+    assert messages[0]["content"] == STATIC_PREFIX.text
+    assert messages[-1] == {"role": "user", "content": "plain text"}
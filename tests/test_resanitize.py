@@ -0,0 +1,116 @@
+# tests/test_resanitize.py
+from __future__ import annotations
+
+import json
+
+from edututor.core import templates
+from edututor.core.resanitize import main, reply_text, resanitize
+from edututor.core.sanitizer import sanitize
+from edututor.core.sanitizer_rules import read_rules
+from edututor.core.stream_guard import with_redirect
+from edututor.persistence.store import ConversationStore
+
+_CODE_REPLY = "Use a loop.\n```python\nfor x in xs:\n    print(x)\n```\nWhat does it print?"
+
+
+def _openai_raw(text: str) -> dict:
+    return {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+
+def _seed(store: ConversationStore, n: int) -> list:
+    ids = []
+    for i in range(n):
+        if i % 3 == 2:
+            # refusals and mock replies keep no reply text
+            raw: dict = {"fallback": "unknown"}
+        else:
+            raw = _openai_raw(f"  Reply {i}: {_CODE_REPLY}\n")
+        stale = "stale" if i % 3 != 1 else sanitize(f"Reply {i}: {_CODE_REPLY}")
+        ids.append(store.save_conversation("q", "CONCEPT", "OpenAIProvider", raw, stale))
+    return ids
+
+
+def test_reply_text() -> None:
+    assert reply_text(_openai_raw("  hi \n")) == "hi"
+    assert reply_text({"text": "hello"}) == "hello"
+    assert reply_text({"intent": "error"}) is None
+    assert reply_text({"choices": []}) is None
+
+
+def test_resanitize_updates_changed_rows(tmp_path) -> None:
+    store = ConversationStore(db_path=str(tmp_path / "t.db"))
+    ids = _seed(store, 9)
+
+    report = resanitize(store, workers=1, chunksize=2)
+    assert (report.rows, report.changed, report.skipped) == (6, 3, 3)
+    assert report.last_id == ids[7]
+    rec = store.fetch_by_id(ids[0])
+    assert rec is not None and rec.sanitized_text == sanitize(f"Reply 0: {_CODE_REPLY}")
+    assert "print(x)" not in rec.sanitized_text
+    # the untouchable row keeps what it had
+    rec = store.fetch_by_id(ids[2])
+    assert rec is not None and rec.sanitized_text == "stale"
+
+    # a second run finds nothing left to change
+    assert resanitize(store, workers=1).changed == 0
+
+
+def test_resanitize_resumes_from_checkpoint(tmp_path) -> None:
+    store = ConversationStore(db_path=str(tmp_path / "t.db"))
+    ids = _seed(store, 9)
+    checkpoint = tmp_path / "checkpoint"
+
+    report = resanitize(store, after_id=ids[3], workers=1, checkpoint=checkpoint)
+    assert report.rows == 3 and report.changed == 1
+    assert checkpoint.read_text() == str(ids[7])
+    rec = store.fetch_by_id(ids[0])
+    assert rec is not None and rec.sanitized_text == "stale"
+
+
+def test_resanitize_dry_run_and_pool(tmp_path) -> None:
+    store = ConversationStore(db_path=str(tmp_path / "t.db"))
+    ids = _seed(store, 30)
+
+    dry = resanitize(store, workers=1, dry_run=True)
+    assert dry.changed == 10
+    assert resanitize(store, workers=1, dry_run=True).changed == 10
+
+    report = resanitize(store, workers=2, chunksize=4, min_pool_size=5)
+    assert (report.rows, report.changed, report.last_id) == (20, 10, ids[-2])
+    assert resanitize(store, workers=1).changed == 0
+
+
+def test_resanitize_keeps_redirect_of_cut_off_replies(tmp_path) -> None:
+    store = ConversationStore(db_path=str(tmp_path / "t.db"))
+    raw = {"text": "Start here.\n```python\nfor x in xs:\n", "streamed": True, "aborted": True}
+    row_id = store.save_conversation("q", "CONCEPT", "OpenAIProvider", raw, "stale")
+
+    assert resanitize(store, workers=1).changed == 1
+    rec = store.fetch_by_id(row_id)
+    assert rec is not None and rec.sanitized_text == with_redirect(sanitize(raw["text"]))
+    assert rec.sanitized_text.endswith(templates.CODE_REDIRECT)
+
+
+def test_resanitize_applies_a_rule_file(tmp_path) -> None:
+    db = str(tmp_path / "t.db")
+    store = ConversationStore(db_path=db)
+    reply = "Step one.\nfn walk(tree) and so on\nThen stop."
+    ids = [
+        store.save_conversation(
+            "q", "CONCEPT", "OpenAIProvider", _openai_raw(reply), sanitize(reply)
+        )
+        for _ in range(6)
+    ]
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps({"code_patterns": {"line_start": [r"fn\s+\w+\("]}}))
+    stricter = read_rules(rules_file)
+    assert sanitize(reply, stricter) == "Step one.\nThen stop." != sanitize(reply)
+
+    # workers get the rules explicitly, whatever the start method
+    report = resanitize(store, workers=2, chunksize=2, min_pool_size=1, rules=stricter)
+    assert report.changed == 6
+    assert main(["--db", db, "--workers", "1", "--rules", str(rules_file)]) == 0
+    for row_id in ids:
+        rec = store.fetch_by_id(row_id)
+        assert rec is not None and rec.sanitized_text == "Step one.\nThen stop."
+    assert resanitize(store, workers=1).changed == 6
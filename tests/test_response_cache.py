@@ -0,0 +1,133 @@
+# tests/test_response_cache.py
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from edututor.core import sanitizer_rules
+from edututor.core.classifiers import Intent
+from edututor.core.near_duplicate import NearDuplicateCache
+from edututor.core.orchestrator import Orchestrator
+from edututor.core.response_cache import CachedReply, ResponseCache, cache_key
+from edututor.llm.mock import MockLLM
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _CountingProvider:
+    model = "m1"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def send(self, prompt, intent, max_tokens=None):
+        self.calls += 1
+        return MockLLM().send(prompt=prompt, intent=intent)
+
+
+class _Store:
+    def __init__(self) -> None:
+        self.rows = []
+
+    def save_conversation(self, **kwargs):
+        self.rows.append(kwargs)
+
+
+def _key(payload: str, intent: Intent = Intent.CONCEPT, **kw) -> str:
+    args = dict(provider="P", model="m", prefix_hash="h", max_tokens=400, sanitizer="s@v1")
+    args.update(kw)
+    return cache_key(payload, intent, **args)
+
+
+def test_key_normalizes_prose_but_not_code() -> None:
+    assert _key("What is  a Stack?") == _key("what is a stack?")
+    assert _key("x = 1\n  y", Intent.EXPLAIN_CODE) != _key("X = 1\n y", Intent.EXPLAIN_CODE)
+    assert _key("x = 1  \n", Intent.EXPLAIN_CODE) == _key("x = 1", Intent.EXPLAIN_CODE)
+    assert _key("a") != _key("a", Intent.ERROR)
+    assert _key("a") != _key("a", model="m2")
+    assert _key("a") != _key("a", prefix_hash="h2")
+    assert _key("a") != _key("a", provider="Q")
+    assert _key("a") != _key("a", sanitizer="s@v2")
+
+
+def test_lru_and_ttl() -> None:
+    clock = _Clock()
+    cache = ResponseCache(2, ttls={"ERROR": 10, "EXPLAIN_CODE": 0}, clock=clock)
+    reply = CachedReply("hint", {}, 3)
+    cache.put("a", Intent.ERROR, reply)
+    cache.put("b", Intent.CONCEPT, reply)
+    cache.put("skip", Intent.EXPLAIN_CODE, reply)
+    assert cache.get("skip").reply is None
+    clock.now += 11
+    assert cache.get("a").reply is None and cache.cache_info().expired == 1
+    assert cache.get("b").tier == "memory"
+    cache.put("c", Intent.CONCEPT, reply)
+    cache.put("d", Intent.CONCEPT, reply)
+    assert cache.get("b").reply is None
+    info = cache.cache_info()
+    assert (info.hits, info.currsize) == (1, 2)
+    with pytest.raises(ValueError):
+        ResponseCache(ttls={"NOPE": 1})
+
+
+def test_disk_tier_survives_restart(tmp_path) -> None:
+    path = str(tmp_path / "cache.db")
+    clock = _Clock()
+    ResponseCache(path=path, clock=clock).put("k", Intent.CONCEPT, CachedReply("hint", {"x": 1}, 3))
+    fresh = ResponseCache(path=path, clock=clock)
+    lookup = fresh.get("k")
+    assert lookup.tier == "disk" and lookup.reply == CachedReply("hint", {"x": 1}, 3)
+    assert fresh.get("k").tier == "memory"
+    clock.now += 8 * 24 * 3600
+    assert ResponseCache(path=path, clock=clock).get("k").reply is None
+    assert fresh.purge_expired() == 1
+
+
+def test_orchestrator_serves_repeats_from_cache() -> None:
+    provider, store = _CountingProvider(), _Store()
+    orch = Orchestrator(provider=provider, store=store, response_cache=ResponseCache())
+    first = orch.handle_user_message("what is recursion?")
+    second = orch.handle_user_message("What is   recursion?")
+    third = asyncio.run(orch.ahandle_user_message("what is recursion?"))
+    assert provider.calls == 1
+    assert first.text == second.text == third.text
+    metas = [row["metadata"]["cache"] for row in store.rows]
+    assert [m["hit"] for m in metas] == [False, True, True]
+    assert all(m["lookup_ms"] >= 0 for m in metas)
+    # every call still stores its own row
+    assert [row["sanitized_text"] for row in store.rows] == [first.text] * 3
+
+
+def test_orchestrator_without_cache_records_nothing() -> None:
+    store = _Store()
+    Orchestrator(provider=_CountingProvider(), store=store).handle_user_message("what is a set?")
+    assert "cache" not in store.rows[0]["metadata"]
+
+
+def test_rules_reload_invalidates_cached_replies() -> None:
+    provider, store = _CountingProvider(), _Store()
+    orch = Orchestrator(
+        provider=provider,
+        store=store,
+        response_cache=ResponseCache(),
+        near_duplicate_cache=NearDuplicateCache(),
+    )
+    orch.handle_user_message("what is recursion?")
+    orch.handle_user_message("what is recursion?")
+    assert provider.calls == 1
+    sanitizer_rules.set_rules(sanitizer_rules.compile_rules({"max_line_chars": 200}))
+    try:
+        # neither the exact nor the near-duplicate tier serves the old text
+        orch.handle_user_message("what is recursion?")
+        orch.handle_user_message("explain recursion pls")
+        assert provider.calls == 2
+    finally:
+        sanitizer_rules.reset_rules()
+    assert store.rows[0]["metadata"]["sanitizer"] != store.rows[2]["metadata"]["sanitizer"]
@@ -0,0 +1,105 @@
+# tests/test_sanitize_cache.py
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from edututor.core import sanitizer, sanitizer_rules
+from edututor.core.orchestrator import Orchestrator
+from edututor.core.sanitize_cache import SanitizeCache
+
+_REPLY = "Think about the base case.\n```py\ndef f(n):\n    return f(n - 1)\n```\nWhat stops it?"
+
+
+def test_cache_hits_on_identical_replies_only() -> None:
+    cache = SanitizeCache(maxsize=8)
+    assert cache(_REPLY) == sanitizer.sanitize(_REPLY)
+    assert cache(_REPLY) == sanitizer.sanitize(_REPLY)
+    cache(_REPLY + " ")  # any difference is a different reply
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 2, 2)
+    assert info.rules_version == sanitizer.RULES_VERSION
+
+
+def test_cache_evicts_lru_and_bypasses_large_replies() -> None:
+    cache = SanitizeCache(maxsize=2, max_entry_bytes=64)
+    cache("a")
+    cache("b")
+    cache("a")
+    cache("c")  # evicts "b"
+    cache("b")
+    cache("long reply " * 20)
+    info = cache.cache_info()
+    assert (info.misses, info.bypassed, info.currsize) == (4, 1, 2)
+
+
+def test_cache_drops_entries_from_old_rules() -> None:
+    cache = SanitizeCache()
+    cache(_REPLY)
+    rules = sanitizer_rules.compile_rules({"keywords": ["return"]}, source="test")
+    previous = sanitizer_rules.set_rules(rules)
+    try:
+        assert cache(_REPLY) == sanitizer.sanitize(_REPLY, rules)
+        info = cache.cache_info()
+        assert (info.hits, info.currsize, info.rules_version) == (0, 1, rules.version)
+    finally:
+        sanitizer_rules.set_rules(previous)
+
+
+def test_cache_is_thread_safe() -> None:
+    cache = SanitizeCache(maxsize=16)
+    replies = [f"Reply {i % 20}: think about `x`." for i in range(400)]
+
+    def worker() -> None:
+        for r in replies:
+            assert cache(r) == sanitizer.sanitize(r)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    info = cache.cache_info()
+    assert info.hits + info.misses == 1600
+    assert info.currsize <= 16
+
+
+def test_orchestrator_uses_injected_sanitizer() -> None:
+    class _Provider:
+        def send(self, prompt, intent, max_tokens=None):
+            return _REPLY
+
+    class _Store:
+        def save_conversation(self, **kwargs):
+            return 1
+
+    cache = SanitizeCache()
+    o = Orchestrator(provider=_Provider(), store=_Store(), sanitize_fn=cache)
+    first = o.handle_user_message("Explain recursion")
+    second = o.handle_user_message("What is a base case?")
+    assert first.text == second.text == sanitizer.sanitize(_REPLY)
+    assert cache.cache_info().hits == 1
+
+
+def test_orchestrator_uses_injected_sanitizer_for_streamed_replies() -> None:
+    class _StreamingProvider:
+        def stream(self, prompt, intent, max_tokens=None):
+            yield from (_REPLY[:10], _REPLY[10:])
+
+    class _Store:
+        def save_conversation(self, **kwargs):
+            return 1
+
+    cache = SanitizeCache()
+    o = Orchestrator(provider=_StreamingProvider(), store=_Store(), sanitize_fn=cache)
+    first = o.handle_user_message("Explain recursion")
+    second = o.handle_user_message("What is a base case?")
+    assert first.text == second.text == sanitizer.sanitize(_REPLY)
+    info = cache.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+    async def ask():
+        return await o.ahandle_user_message("Explain recursion")
+
+    assert asyncio.run(ask()).text == first.text
+    assert cache.cache_info().hits == 2
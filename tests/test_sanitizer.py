@@ -1,5 +1,15 @@
 # tests/test_sanitizer.py
-from edututor.core.sanitizer import strip_code_blocks
+import random
+import re
+
+import pytest
+
+from edututor.core.sanitizer import (
+    StreamingSanitizer,
+    detect_code_like,
+    sanitize,
+    strip_code_blocks,
+)
 
 
 def test_strip_code_blocks_removes_fenced_and_inline():
@@ -7,3 +17,141 @@ def test_strip_code_blocks_removes_fenced_and_inline():
     out = strip_code_blocks(s)
     assert "[code omitted" in out
     assert "[code omitted]" in out
+
+
+_REPLIES = [
+    "Here is code:\n```py\nprint('hi')\n```\nAnd inline `x = 1` end.",
+    "Recursion means a function calls itself.\n\nThink about the base case first.\nWhat stops it?",
+    "Try this:\n  for item in items:\n    total += item\nThen return total.",
+    "def f(x):\n    return x\n",
+    "``a` b` and ```` and `` c",
+    "Line one (with parens)\nLine two: colon\n\n\nLast",
+    "a\r\nb\rc\n\x85d e class A:",
+    "```unclosed fence\nprint(1)\n and more `x`",
+    "",
+    "   \n  \n",
+    "while x: y\n" * 3,
+    "A\nfor\nx\nin\ny",
+    "x" * 301 + "\nshort line\nreturn it",
+]
+
+
+def _stream(text: str, sizes: list) -> str:
+    s = StreamingSanitizer()
+    out, i = [], 0
+    for n in sizes:
+        out.append(s.feed(text[i : i + n]))
+        i += n
+    out.append(s.feed(text[i:]))
+    return "".join(out) + s.close()
+
+
+@pytest.mark.parametrize("text", _REPLIES)
+def test_streaming_matches_sanitize_for_every_split(text):
+    expected = sanitize(text)
+    assert _stream(text, [len(text)]) == expected
+    assert _stream(text, [1] * len(text)) == expected
+    for cut in range(len(text)):
+        assert _stream(text, [cut]) == expected
+
+
+def test_streaming_matches_sanitize_on_random_input():
+    pieces = ["a", " ", "\n", "`", "```", "(", "=", ":", "return ", "for x in y", "\r", "\r\n"]
+    pieces += ["def f(", "Hello", "\t", "import os", "class A:", "while a:b", " ", "\n\n"]
+    rng = random.Random(1234)
+    for _ in range(500):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 50)))
+        sizes = [rng.randint(1, 7) for _ in range(len(text))]
+        assert _stream(text, sizes) == sanitize(text), repr(text)
+
+
+def test_streaming_releases_output_before_close():
+    s = StreamingSanitizer()
+    assert s.feed("Think about the base case.\nWhat ") == "Think about the base case."
+    # a code pattern settles the reply as code-like; safe lines flow immediately
+    out = s.feed("is returned?\n    return n\nThen recurse.\n")
+    assert out == "\nWhat is returned?\nThen recurse."
+    assert s.close() == ""
+
+
+def test_streaming_hides_fences_split_across_chunks():
+    s = StreamingSanitizer()
+    out = s.feed("See `") + s.feed("x` and `") + s.feed("`") + s.feed("`py\nprint(1)\n``")
+    out += s.feed("` done.") + s.close()
+    assert out == sanitize("See `x` and ```py\nprint(1)\n``` done.")
+    assert "print" not in out
+
+
+# The original regex implementation, kept as the reference the scanner must match
+# (apart from the unterminated-fence policy: an open fence runs to the end).
+_REF_CODE_LIKE = [
+    re.compile(r"^\s*def\s+\w+\(", re.MULTILINE),
+    re.compile(r"^\s*class\s+\w+\s*:", re.MULTILINE),
+    re.compile(r"\bfor\s+\w+\s+in\s+", re.IGNORECASE),
+    re.compile(r"\bwhile\s+.*:\b", re.IGNORECASE),
+    re.compile(r"\breturn\b", re.IGNORECASE),
+]
+
+
+_FENCE = "[code omitted — EduTutor does not provide code]"
+
+
+def _ref_detect_code_like(text):
+    lines = [ln for ln in text.splitlines() if ln.strip()]
+    if not lines:
+        return False
+    punct = sum(1 for ln in lines if re.search(r"[{};()<>:=\[\]]", ln))
+    return punct / len(lines) > 0.35 or any(p.search(text) for p in _REF_CODE_LIKE)
+
+
+def _ref_sanitize(text):
+    t = re.sub(r"```.*?(?:```|\Z)", _FENCE, text, flags=re.S)
+    t = re.sub(r"`[^`]+`", "[code omitted]", t)
+    t = re.sub(r"`[^`]+`", "[code omitted]", t)
+    if _ref_detect_code_like(t):
+        safe = []
+        for ln in t.splitlines():
+            ln = ln.strip()
+            if not ln or len(ln) > 300 or re.search(r"[{};()<>=\[\]]", ln):
+                continue
+            if re.search(r"\b(return|yield|import|from|def|class)\b", ln, re.IGNORECASE):
+                continue
+            safe.append(ln)
+        t = "\n".join(safe).strip() or "[content removed: code-like output]"
+    return t.strip()
+
+
+def test_scanner_matches_regex_reference():
+    pieces = ["a", " ", "\n", "`", "``", "```", "(", "=", ":", "]", "return ", "Yield", "\r\n"]
+    pieces += ["def f(", "  class A:", "for x in y", "While a:b", "\x85", "x" * 301, "é", "\t"]
+    rng = random.Random(99)
+    corpus = _REPLIES + [
+        "".join(rng.choice(pieces) for _ in range(rng.randint(0, 60))) for _ in range(2000)
+    ]
+    for text in corpus:
+        assert sanitize(text) == _ref_sanitize(text), repr(text)
+        assert detect_code_like(text) == _ref_detect_code_like(text), repr(text)
+
+
+def test_unterminated_fence_is_hidden_to_the_end():
+    # max_tokens hit in the middle of a block
+    reply = "Sort first.\nThen compare neighbours.\nLike this\n```python\ndef f(xs):\n    return s"
+    expected = "Sort first.\nThen compare neighbours.\nLike this\n" + _FENCE
+    assert sanitize(reply) == expected
+    assert _stream(reply, [3] * 30) == expected
+
+
+_PATHOLOGICAL = {
+    "blank lines": "\n" * 5_000 + "x",
+    "indented blanks": " \n" * 2_500 + "def f(",
+    "while": "while " * 5_000 + "\n: x",
+    "stray fences": "``` ``" * 1_000,
+    "backticks": "`" * 5_000 + "a",
+    "for": "for" + " " * 5_000 + "x in y",
+}
+
+
+@pytest.mark.parametrize("text", _PATHOLOGICAL.values(), ids=_PATHOLOGICAL.keys())
+def test_pathological_input_matches_reference(text):
+    assert sanitize(text) == _ref_sanitize(text)
+    assert _stream(text, [64] * (len(text) // 64)) == sanitize(text)
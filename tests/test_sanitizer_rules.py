@@ -0,0 +1,112 @@
+# tests/test_sanitizer_rules.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+
+import pytest
+
+from edututor.core import sanitizer, sanitizer_rules
+from edututor.core.sanitizer import StreamingSanitizer, sanitize
+from edututor.core.sanitizer_rules import RulesWatcher, compile_rules
+
+_CUSTOM = {
+    "code_patterns": {
+        "line_start": [r"fn\s+\w+\("],
+        "anywhere": [{"pattern": r"\bSELECT\b", "ignore_case": False}],
+        "block_openers": ["loop"],
+    },
+    "punctuation": "{}",
+    "unsafe_punctuation": "{};",
+    "keywords": ["let"],
+    "stream_trigger": None,
+}
+
+
+@pytest.fixture(autouse=True)
+def _default_rules():
+    yield
+    sanitizer_rules.reset_rules()
+
+
+def _stream(text: str, rules, size: int) -> str:
+    s = StreamingSanitizer(rules)
+    out = [s.feed(text[i : i + size]) for i in range(0, len(text), size)]
+    return "".join(out) + s.close()
+
+
+def test_default_rules_have_a_stable_version() -> None:
+    assert compile_rules({}).version == sanitizer.RULES_VERSION
+    assert compile_rules(sanitizer_rules.DEFAULT_RULES).version == sanitizer.RULES_VERSION
+    assert compile_rules({"max_line_chars": 200}).version != sanitizer.RULES_VERSION
+
+
+def test_custom_rules_change_detection() -> None:
+    rules = compile_rules(_CUSTOM)
+    assert sanitize("Step one.\nfn walk(tree) {\nThen stop.", rules) == "Step one.\nThen stop."
+    assert sanitize("select the rows you need", rules) == "select the rows you need"
+    assert sanitize("Use SELECT here\nlet it be", rules) == "Use SELECT here"
+    assert sanitize("loop over i:n;\nok", rules) == "ok"
+    # the defaults no longer apply
+    assert sanitize("def f(x):\nreturn x", rules) == "def f(x):\nreturn x"
+
+
+def test_streaming_matches_batch_under_custom_rules() -> None:
+    rules = compile_rules(_CUSTOM)
+    rng = random.Random(0)
+    pieces = ["fn go(", "SELECT", "select", "loop ", ":a", "let", "{", ";", "x", " ", "\n", "`"]
+    for _ in range(500):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+        assert _stream(text, rules, rng.randint(1, 8)) == sanitize(text, rules), repr(text)
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"unknown": 1},
+        {"code_patterns": {"anywhere": ["("]}},
+        {"code_patterns": {"line_start": ["(?i)def"]}},
+        {"code_patterns": {"other": []}},
+        {"keywords": "return"},
+        {"punct_ratio": 2},
+        {"max_line_chars": 0},
+        {"stream_trigger": "["},
+    ],
+)
+def test_malformed_rules_are_rejected(spec) -> None:
+    with pytest.raises(ValueError):
+        compile_rules(spec)
+
+
+def test_watcher_reloads_changed_file(tmp_path, caplog) -> None:
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"keywords": ["return"]}))
+    watcher = RulesWatcher(path)
+    # a stream started under the old rules keeps them to the end
+    s = StreamingSanitizer()
+    with caplog.at_level(logging.INFO, logger="edututor.core.sanitizer_rules"):
+        assert watcher.check()
+        assert not watcher.check()  # unchanged
+    assert sanitizer.RULES_VERSION == compile_rules({"keywords": ["return"]}).version
+    assert "compiled in" in caplog.text and str(path) in caplog.text
+    text = "for x in y:\nimport os\nok"
+    assert s.feed(text) + s.close() == "for x in y:\nok"
+    assert sanitize(text) == "for x in y:\nimport os\nok"
+
+    path.write_text(json.dumps({"keywords": ["return", "import"], "max_line_chars": 100}))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert watcher.check()
+    assert sanitize(text) == "for x in y:\nok"
+
+
+def test_watcher_keeps_rules_on_bad_file(tmp_path, caplog) -> None:
+    path = tmp_path / "rules.json"
+    path.write_text("{not json")
+    version = sanitizer.RULES_VERSION
+    with caplog.at_level(logging.ERROR, logger="edututor.core.sanitizer_rules"):
+        assert not RulesWatcher(path).check()
+    assert sanitizer.RULES_VERSION == version
+    assert "keeping current rules" in caplog.text
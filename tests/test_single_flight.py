@@ -0,0 +1,120 @@
+# tests/test_single_flight.py
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from edututor.core.orchestrator import Orchestrator
+from edututor.core.single_flight import SingleFlight
+
+_ERROR = "KeyError: 'grade'"
+
+
+class _SlowProvider:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def send(self, prompt, intent, max_tokens=None):
+        self.calls += 1
+        time.sleep(0.1)
+        return "Which keys does the dict have when the lookup runs?"
+
+    async def asend(self, *, prompt, intent, max_tokens=None):
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return "Which keys does the dict have when the lookup runs?"
+
+
+class _Store:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.rows = []
+
+    def save_conversation(self, **kwargs):
+        with self.lock:
+            self.rows.append(kwargs)
+
+
+def test_threads_share_one_provider_call() -> None:
+    provider, store = _SlowProvider(), _Store()
+    orch = Orchestrator(provider=provider, store=store, single_flight=SingleFlight())
+    with ThreadPoolExecutor(20) as pool:
+        results = list(pool.map(lambda _: orch.handle_user_message(_ERROR), range(20)))
+    assert provider.calls == 1
+    assert len({r.text for r in results}) == 1
+    # every call still stores its own row
+    assert len(store.rows) == 20
+    assert sorted(row["metadata"]["coalesced"] for row in store.rows) == [False] + [True] * 19
+    assert orch.single_flight.info().in_flight == 0
+
+
+def test_coroutines_share_one_provider_call() -> None:
+    provider, store = _SlowProvider(), _Store()
+    orch = Orchestrator(provider=provider, store=store, single_flight=SingleFlight())
+
+    async def main():
+        return await asyncio.gather(*(orch.ahandle_user_message(_ERROR) for _ in range(20)))
+
+    results = asyncio.run(main())
+    assert provider.calls == 1 and len(results) == len(store.rows) == 20
+    info = orch.single_flight.info()
+    assert (info.leaders, info.shared) == (1, 19)
+
+
+def test_different_requests_are_not_coalesced() -> None:
+    provider = _SlowProvider()
+    orch = Orchestrator(provider=provider, store=_Store(), single_flight=SingleFlight())
+    with ThreadPoolExecutor(2) as pool:
+        list(pool.map(orch.handle_user_message, [_ERROR, "KeyError: 'name'"]))
+    assert provider.calls == 2
+
+
+def test_threads_wait_on_a_coroutine_leader() -> None:
+    flight = SingleFlight()
+    started = threading.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(0.1)
+        return 42
+
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(asyncio.run, flight.ado("k", work))
+        started.wait()
+        assert flight.do("k", lambda: 0) == (42, True)
+        assert leader.result() == (42, False)
+
+
+def test_errors_are_shared_and_cancellation_retries() -> None:
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("provider down")
+
+    async def shared_error():
+        return await asyncio.gather(
+            flight.ado("k", fail), flight.ado("k", fail), return_exceptions=True
+        )
+
+    assert [type(e) for e in asyncio.run(shared_error())] == [RuntimeError, RuntimeError]
+
+    async def cancelled_leader():
+        leader = asyncio.create_task(flight.ado("k", lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+
+        async def answer():
+            return "answer"
+
+        follower = asyncio.create_task(flight.ado("k", answer))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(cancelled_leader()) == ("answer", False)
@@ -0,0 +1,106 @@
+# tests/test_stream_guard.py
+from __future__ import annotations
+
+from edututor.core import templates
+from edututor.core.orchestrator import Orchestrator
+from edututor.core.sanitizer import sanitize
+from edututor.core.stream_guard import guard_stream, with_redirect
+from edututor.core.tokens import estimate_tokens
+from edututor.llm.mock import MockLLM
+
+_PROSE = "Think about what the loop should stop on.\nWhat is true after each pass?\n"
+_CODE = "".join(f"    total[{i}] = grid[{i}] + step({i})\n" for i in range(200))
+
+
+class _Stream:
+    """A provider stream that records how far it was read and whether it was closed."""
+
+    def __init__(self, text: str, size: int = 16) -> None:
+        self.pieces = [text[i : i + size] for i in range(0, len(text), size)]
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.closed or self.sent == len(self.pieces):
+            raise StopIteration
+        self.sent += 1
+        return self.pieces[self.sent - 1]
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_conceptual_reply_is_not_cut_off() -> None:
+    text = _PROSE + "```\nx = f(x)\n```\nWhy does `x` change?\n"
+    stream = _Stream(text)
+    seen = []
+    reply = guard_stream(stream, max_tokens=512, on_text=seen.append)
+    assert not reply.aborted and stream.closed
+    assert reply.text == "".join(seen) == sanitize(text)
+    assert reply.raw_text == text
+    assert reply.tokens_saved == 0
+
+
+def test_code_dump_is_cut_off() -> None:
+    text = _PROSE + "Here is the whole thing:\ndef solve(grid):\n" + _CODE
+    stream = _Stream(text)
+    reply = guard_stream(stream, max_code_lines=10, max_tokens=4096)
+    assert reply.aborted and stream.closed
+    assert stream.sent < len(stream.pieces) // 10
+    assert reply.text == with_redirect(sanitize(reply.raw_text))
+    assert reply.text.endswith(templates.CODE_REDIRECT)
+    assert "grid" not in reply.text
+    assert reply.received_tokens == estimate_tokens(reply.raw_text)
+    assert reply.tokens_saved == 4096 - reply.received_tokens
+    assert reply.code_lines == 10
+
+
+def test_open_fence_is_cut_off() -> None:
+    text = _PROSE + "```python\n" + "x = 1\n" * 500
+    reply = guard_stream(_Stream(text), max_code_lines=20)
+    assert reply.aborted and reply.tokens_saved is None
+    assert reply.text == with_redirect(sanitize(reply.raw_text))
+    assert reply.text.startswith("Think about what the loop should stop on.")
+
+
+def test_orchestrator_streams_and_records_savings() -> None:
+    class _Provider:
+        max_tokens = 1024
+
+        def __init__(self) -> None:
+            self.stream_obj = _Stream(_PROSE + "def solve(grid):\n" + _CODE)
+
+        def send(self, prompt, intent, max_tokens=None):
+            raise AssertionError("send() used although stream() exists")
+
+        def stream(self, *, prompt, intent, max_tokens=None):
+            return self.stream_obj
+
+    class _Store:
+        def __init__(self) -> None:
+            self.rows = []
+
+        def save_conversation(self, **kwargs):
+            self.rows.append(kwargs)
+
+    provider, store = _Provider(), _Store()
+    res = Orchestrator(provider=provider, store=store).handle_user_message("help with my loop")
+    assert res.text.endswith(templates.CODE_REDIRECT)
+    row = store.rows[0]
+    sent = provider.stream_obj.pieces[: provider.stream_obj.sent]
+    assert row["llm_raw"] == {"text": "".join(sent), "streamed": True, "aborted": True}
+    meta = row["metadata"]["stream"]
+    # the intent's completion budget is tighter than the provider's limit
+    limit = row["metadata"]["tokens"]["completion_budget"]
+    assert limit < 1024
+    assert meta["aborted"] and meta["tokens_saved"] == limit - meta["received_tokens"]
+
+
+def test_mock_stream_matches_send() -> None:
+    llm = MockLLM()
+    prompt = "what is recursion?"
+    streamed = "".join(llm.stream(prompt=prompt, intent=None))
+    assert streamed == llm.send(prompt=prompt, intent=None).text
@@ -0,0 +1,43 @@
+# tests/test_tokens.py
+from __future__ import annotations
+
+from edututor.core.tokens import estimate_tokens, trim_to_tokens
+
+_PROSE = (
+    "A stack is a list where the last item you put in is the first one you take out. "
+    "Think of a pile of plates: you only ever touch the one on top.\n"
+)
+_CODE = "".join(f"    total[{i}] = grid[{i}] + step({i})\n" for i in range(100))
+
+
+def test_estimate_is_close_to_bpe_counts() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("the") == 1
+    assert estimate_tokens(" the cat sat") == 3
+    # about four characters a token for English prose
+    assert 0.8 < estimate_tokens(_PROSE) / (len(_PROSE) / 4) < 1.4
+    # CJK text costs more than one token per character's worth of ASCII
+    assert estimate_tokens("递归函数") >= 4
+    assert estimate_tokens(_PROSE * 3) <= 3 * estimate_tokens(_PROSE)
+
+
+def test_trim_keeps_short_text() -> None:
+    assert trim_to_tokens(_PROSE, 1000) == _PROSE
+
+
+def test_trim_keeps_head_and_tail_within_budget() -> None:
+    text = _CODE + "IndexError: list index out of range\n"
+    trimmed = trim_to_tokens(text, 120)
+    assert estimate_tokens(trimmed) <= 120
+    assert trimmed.startswith("    total[0] = grid[0]")
+    assert trimmed.endswith("IndexError: list index out of range\n")
+    assert "tokens omitted" in trimmed
+
+
+def test_trim_below_the_marker_cost_keeps_only_the_head() -> None:
+    text = "x " * 500
+    for budget in (0, 1, 3):
+        trimmed = trim_to_tokens(text, budget)
+        assert estimate_tokens(trimmed) <= budget
+        assert text.startswith(trimmed) and "omitted" not in trimmed
+    assert trim_to_tokens(text, 3) != ""
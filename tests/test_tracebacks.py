@@ -0,0 +1,146 @@
+# tests/test_tracebacks.py
+from __future__ import annotations
+
+from edututor.core.classifiers import Intent, classify_intent
+from edututor.core.tracebacks import compact_error_text, parse_traceback
+
+_PY_TRACE = (
+    "Traceback (most recent call last):\n"
+    + "".join(
+        f'  File "/usr/lib/python3.11/site-packages/lib/m{i}.py", line {i + 1}, in f{i}\n'
+        "    call()\n"
+        for i in range(40)
+    )
+    + '  File "/home/me/app.py", line 10, in main\n'
+    "    rec(n)\n"
+    "    ^^^^^^\n"
+    '  File "/home/me/app.py", line 3, in rec\n'
+    "    return rec(n - 1)\n"
+    "  [Previous line repeated 996 more times]\n"
+    "RecursionError: maximum recursion depth exceeded\n"
+)
+
+_JAVA_TRACE = (
+    'Exception in thread "main" java.lang.IllegalStateException: load failed\n'
+    "\tat com.school.Loader.load(Loader.java:31)\n"
+    + "".join(f"\tat java.base/jdk.internal.R{i}.run(R{i}.java:{i})\n" for i in range(300))
+    + "Caused by: java.lang.NullPointerException: name is null\n"
+    "\tat com.school.Parser.parse(Parser.java:12)\n"
+    "\t... 301 more\n"
+)
+
+_JS_TRACE = (
+    "TypeError: Cannot read properties of undefined (reading 'length')\n"
+    "    at count (/app/src/words.js:4:17)\n"
+    "    at Object.<anonymous> (/app/src/main.js:9:1)\n"
+    + "".join(
+        f"    at Module._compile (node:internal/modules/cjs/loader:{i}:14)\n" for i in range(20)
+    )
+)
+
+_GCC_OUTPUT = "main.c: In function 'main':\n" + "".join(
+    f"main.c:{i}:5: error: expected ';' before '}}' token\n    {i} |     return 0\n      |     ^\n"
+    for i in range(4, 40)
+)
+
+
+def test_python_trace_keeps_exception_and_user_frames() -> None:
+    parsed = parse_traceback(_PY_TRACE)
+    assert parsed is not None and parsed.language == "python"
+    assert parsed.exc_type == "RecursionError"
+    assert parsed.frames[-1].function == "rec" and parsed.frames[-1].repeat == 997
+    assert parsed.frames[-1].source == "return rec(n - 1)"
+
+    out = compact_error_text("why does this crash?\n" + _PY_TRACE + "\nany idea?")
+    assert out.compacted and out.compacted_tokens < out.original_tokens
+    assert out.text.startswith("why does this crash?")
+    assert out.text.endswith("any idea?")
+    assert "RecursionError: maximum recursion depth exceeded" in out.text
+    assert "/home/me/app.py:3 in rec (x997)" in out.text
+
+
+def test_python_chained_trace_reports_context() -> None:
+    text = (
+        "Traceback (most recent call last):\n"
+        '  File "a.py", line 2, in <module>\n'
+        "    d['k']\n"
+        "KeyError: 'k'\n\n"
+        "During handling of the above exception, another exception occurred:\n\n" + _PY_TRACE
+    )
+    parsed = parse_traceback(text)
+    assert parsed is not None
+    assert parsed.exc_type == "RecursionError"
+    assert parsed.context == ("KeyError: 'k'",)
+
+
+def test_java_root_cause_with_shared_frames() -> None:
+    parsed = parse_traceback(_JAVA_TRACE)
+    assert parsed is not None and parsed.language == "java"
+    assert (parsed.exc_type, parsed.message) == ("java.lang.NullPointerException", "name is null")
+    # root-cause frame plus the 301 frames shared with the wrapper
+    assert len(parsed.frames) == 302
+    assert parsed.frames[-1].function == "com.school.Parser.parse"
+
+    out = compact_error_text(_JAVA_TRACE)
+    assert "Chained with: java.lang.IllegalStateException: load failed" in out.text
+    assert "Parser.java:12 in com.school.Parser.parse" in out.text
+    assert "... 301 more\n" not in out.text
+    assert out.compacted_tokens * 5 < out.original_tokens
+
+
+def test_javascript_trace() -> None:
+    parsed = parse_traceback(_JS_TRACE)
+    assert parsed is not None and parsed.language == "javascript"
+    assert parsed.exc_type == "TypeError"
+    assert parsed.frames[-1].location() == "/app/src/words.js:4 in count"
+    out = compact_error_text(_JS_TRACE)
+    assert "Innermost frames in the learner's code:" in out.text
+    assert "/app/src/main.js:9 in Object.<anonymous>" in out.text
+
+
+def test_compiler_diagnostics_are_deduplicated() -> None:
+    out = compact_error_text(_GCC_OUTPUT + "how do I fix this?")
+    assert out.compacted
+    assert out.parsed is not None and out.parsed.exc_type == "compiler error"
+    assert "expected ';' before '}' token [main.c:4, main.c:5, main.c:6 (+33 more)]" in out.text
+    assert "In function" not in out.text and "|" not in out.text
+    assert out.text.endswith("how do I fix this?")
+
+
+def test_linker_error() -> None:
+    parsed = parse_traceback("main.c:(.text+0x5): undefined reference to `area'\n")
+    assert parsed is not None and parsed.message == "undefined reference to area"
+
+
+def test_unrecognized_or_short_text_is_unchanged() -> None:
+    for text in ("my loop never ends, what is wrong?", "ValueError: bad value"):
+        out = compact_error_text(text)
+        assert not out.compacted
+        assert out.text == text
+        assert out.original_tokens == out.compacted_tokens
+
+
+def test_compaction_uses_classifier_span() -> None:
+    text = "  I get this when running:\n" + _JAVA_TRACE + "thanks  "
+    ci = classify_intent(text)
+    assert ci.intent == Intent.ERROR and ci.features is not None
+    out = compact_error_text(text.strip(), ci.features.traceback_span)
+    assert out.text == compact_error_text(text.strip()).text
+    assert out.text.startswith("I get this when running:")
+
+
+def test_python_trace_ending_in_a_non_error_exception() -> None:
+    trace = "Traceback (most recent call last):\n" + "".join(
+        f'  File "/srv/lib/m{i}.py", line {i + 1}, in f{i}\n    nxt = next(it)\n'
+        for i in range(200)
+    )
+    for exc in ("StopIteration", "KeyboardInterrupt", "SystemExit: 2"):
+        text = f"why does this stop?\n{trace}{exc}\nthanks"
+        ci = classify_intent(text)
+        assert ci.features is not None
+        out = compact_error_text(text, ci.features.traceback_span)
+        assert out.compacted and out.parsed is not None
+        assert out.parsed.exc_type == exc.split(":")[0]
+        assert out.parsed.frames[-1].source == "nxt = next(it)"
+        assert out.text.endswith("m199.py:200 in f199\n\nthanks")
+        assert "m100.py" not in out.text and 'File "' not in out.text
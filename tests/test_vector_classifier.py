@@ -0,0 +1,94 @@
+# tests/test_vector_classifier.py
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from edututor.core.classifiers import Intent, classify_intent, classify_intents_batch  # noqa: E402
+from edututor.core.vector_classifier import (  # noqa: E402
+    HashingVectorizer,
+    VectorIntentClassifier,
+)
+from edututor.persistence.store import ConversationStore  # noqa: E402
+
+_CORPUS = [
+    "write the code for quicksort",
+    "please implement a linked list class for me",
+    "generate a script that parses csv",
+    "explain recursion in simple words",
+    "what is a hash table",
+    "teach me about big o notation",
+    "what does this traceback mean",
+    "i got a segmentation fault in my loop",
+    "ValueError: invalid literal for int()",
+    "walk me through this function",
+    "what does this snippet do",
+    "annotate my method please",
+]
+
+
+def _labeled(n: int = 20):
+    texts = [f"{t} {i}" for i in range(n) for t in _CORPUS]
+    return texts, [classify_intent(t).intent for t in texts]
+
+
+def test_vectorizer_is_deterministic_and_per_row() -> None:
+    v = HashingVectorizer(n_features=256)
+    x = v.transform(["abc def", "", "abc def"])
+    assert x.shape == (3, 256)
+    assert np.array_equal(x[0], x[2])
+    assert not x[1].any()
+    # rows do not leak into each other
+    assert np.array_equal(v.transform(["abc def"])[0], x[0])
+
+
+def test_fit_and_classify_agree_with_heuristic_labels() -> None:
+    texts, labels = _labeled()
+    model = VectorIntentClassifier(HashingVectorizer(n_features=2**12), batch_size=64)
+    model.fit(texts, labels)
+    out = model.classify_batch(texts)
+    agree = sum(ci.intent == lab for ci, lab in zip(out, labels)) / len(labels)
+    assert agree > 0.95
+    assert out[0].reason.startswith("Vector model score")
+
+
+def test_hints_follow_heuristic_rules() -> None:
+    texts, labels = _labeled(5)
+    model = VectorIntentClassifier(HashingVectorizer(n_features=2**12)).fit(texts, labels)
+    refused, hinted, empty = model.classify_batch(
+        ["write the code for quicksort", "tell me things", "  "],
+        [Intent.CONCEPT, Intent.ERROR, None],
+    )
+    assert refused.intent == Intent.DISALLOWED
+    assert hinted.intent == Intent.ERROR
+    assert empty.intent == Intent.UNKNOWN
+
+
+def test_fit_from_store_and_roundtrip(tmp_path) -> None:
+    store = ConversationStore(db_path=str(tmp_path / "c.db"))
+    texts, labels = _labeled(3)
+    for t, lab in zip(texts, labels):
+        store.save_conversation(
+            user_text=t, intent=lab.name, provider="x", llm_raw={}, sanitized_text=""
+        )
+    model = VectorIntentClassifier(HashingVectorizer(n_features=2**10)).fit_from_store(store)
+    assert set(model.classes) == set(labels)
+
+    path = tmp_path / "model.npz"
+    model.save(path)
+    loaded = VectorIntentClassifier.load(path)
+    assert np.allclose(loaded.scores(texts[:5]), model.scores(texts[:5]))
+
+
+def test_selectable_per_call_in_batch_api() -> None:
+    texts, labels = _labeled(2)
+    model = VectorIntentClassifier(HashingVectorizer(n_features=2**12)).fit(texts, labels)
+    via_batch = list(classify_intents_batch(texts, backend=model, chunksize=7))
+    assert via_batch == model.classify_batch(texts)
+    assert list(classify_intents_batch(texts[:3])) == [classify_intent(t) for t in texts[:3]]
+
+
+def test_unfitted_model_raises() -> None:
+    with pytest.raises(RuntimeError):
+        VectorIntentClassifier().scores(["x"])
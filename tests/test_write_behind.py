@@ -0,0 +1,199 @@
+# tests/test_write_behind.py
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from edututor.core.orchestrator import Orchestrator
+from edututor.llm.mock import MockLLM
+from edututor.persistence.store import ConversationStore
+from edututor.persistence.write_behind import WriteBehindStore
+
+
+def _row(i: int):
+    return dict(
+        user_text=f"q{i}", intent="CONCEPT", provider="Mock", llm_raw={}, sanitized_text="a"
+    )
+
+
+class _GatedStore:
+    """Records batches; writes wait until the gate opens."""
+
+    def __init__(self) -> None:
+        self.gate = threading.Event()
+        self.gate.set()
+        self.batches = []
+
+    def save_conversations(self, rows):
+        self.gate.wait()
+        self.batches.append([r["user_text"] for r in rows])
+        return list(range(len(rows)))
+
+
+def test_rows_are_group_committed_in_order(tmp_path) -> None:
+    store = ConversationStore(str(tmp_path / "db.sqlite"))
+    wb = WriteBehindStore(store, batch_size=50, flush_interval=10)
+    try:
+        for i in range(120):
+            assert wb.save_conversation(**_row(i)) == 0
+        assert wb.flush(timeout=5)
+        info = wb.info()
+        assert (info.enqueued, info.written, info.depth) == (120, 120, 0)
+        # two full batches, and the rest when flushed
+        assert info.flushes == 3 and info.max_flush_ms >= info.last_flush_ms > 0
+        # reads go to the wrapped store
+        assert [r.user_text for r in wb.iter_conversations()] == [f"q{i}" for i in range(120)]
+    finally:
+        wb.close()
+
+
+def test_flushes_after_interval_and_on_close() -> None:
+    store = _GatedStore()
+    wb = WriteBehindStore(store, batch_size=100, flush_interval=0.05)
+    wb.save_conversation(**_row(0))
+    deadline = time.monotonic() + 5
+    while not store.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.batches == [["q0"]]
+    wb.save_conversation(**_row(1))
+    wb.close()
+    assert store.batches == [["q0"], ["q1"]]
+    with pytest.raises(RuntimeError):
+        wb.save_conversation(**_row(2))
+
+
+def test_drop_when_full() -> None:
+    store = _GatedStore()
+    store.gate.clear()
+    wb = WriteBehindStore(store, maxsize=4, batch_size=2, flush_interval=0, on_full="drop")
+    try:
+        wb.save_conversations([_row(i) for i in range(20)])
+        info = wb.info()
+        assert info.dropped > 0 and info.enqueued + info.dropped == 20
+        assert wb.queue_depth <= 4 + 2
+    finally:
+        store.gate.set()
+        wb.close()
+
+
+def test_spill_when_full_and_replay(tmp_path) -> None:
+    spill = str(tmp_path / "spill.jsonl")
+    store = _GatedStore()
+    store.gate.clear()
+    wb = WriteBehindStore(
+        store, maxsize=2, batch_size=1, flush_interval=0, on_full="spill", spill_path=spill
+    )
+    wb.save_conversations([_row(i) for i in range(10)])
+    spilled = wb.info().spilled
+    assert spilled >= 10 - 3
+    store.gate.set()
+    wb.close()
+    assert wb.replay_spill() == spilled
+    written = [q for batch in store.batches for q in batch]
+    assert sorted(written, key=lambda q: int(q[1:])) == [f"q{i}" for i in range(10)]
+
+
+def test_block_waits_for_room() -> None:
+    store = _GatedStore()
+    store.gate.clear()
+    wb = WriteBehindStore(store, maxsize=1, batch_size=1, flush_interval=0)
+    try:
+        wb.save_conversation(**_row(0))
+        wb.save_conversation(**_row(1))
+        timer = threading.Timer(0.1, store.gate.set)
+        timer.start()
+        started = time.monotonic()
+        wb.save_conversation(**_row(2))
+        assert time.monotonic() - started >= 0.05
+    finally:
+        store.gate.set()
+        wb.close()
+    assert wb.info().written == 3 and wb.info().dropped == 0
+
+
+def test_block_timeout_drops() -> None:
+    store = _GatedStore()
+    store.gate.clear()
+    wb = WriteBehindStore(store, maxsize=1, batch_size=1, flush_interval=0, block_timeout=0.05)
+    try:
+        for i in range(3):
+            wb.save_conversation(**_row(i))
+        assert wb.info().dropped == 1
+    finally:
+        store.gate.set()
+        wb.close()
+
+
+def test_rejects_bad_policy() -> None:
+    with pytest.raises(ValueError):
+        WriteBehindStore(_GatedStore(), on_full="ignore")
+    with pytest.raises(ValueError):
+        WriteBehindStore(_GatedStore(), on_full="spill")
+
+
+def test_orchestrator_with_write_behind(tmp_path) -> None:
+    wb = WriteBehindStore(ConversationStore(str(tmp_path / "db.sqlite")))
+    try:
+        res = Orchestrator(provider=MockLLM(), store=wb).handle_user_message("what is recursion?")
+        wb.flush()
+        assert wb.fetch_recent(1)[0].sanitized_text == res.text
+    finally:
+        wb.close()
+
+
+class _FlakyStore(_GatedStore):
+    """Fails the ``fail_on``-th write (1-based) once."""
+
+    def __init__(self, fail_on: int) -> None:
+        super().__init__()
+        self.calls = 0
+        self.fail_on = fail_on
+
+    def save_conversations(self, rows):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise sqlite3.OperationalError("database is locked")
+        return super().save_conversations(rows)
+
+
+def test_failed_replay_keeps_unwritten_rows(tmp_path) -> None:
+    spill = tmp_path / "spill.jsonl"
+    spill.write_text("".join(json.dumps(_row(i)) + "\n" for i in range(6)))
+    store = _FlakyStore(fail_on=2)
+    # the failure is logged, not raised from the constructor
+    wb = WriteBehindStore(store, batch_size=2, on_full="spill", spill_path=str(spill))
+    assert store.batches == [["q0", "q1"]]
+    # rows spilled meanwhile do not overwrite the ones still waiting
+    spill.write_text(json.dumps(_row(6)) + "\n")
+    assert wb.replay_spill() == 5
+    wb.close()
+    written = [q for batch in store.batches for q in batch]
+    assert written == [f"q{i}" for i in range(7)]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_bad_rows_are_set_aside_and_good_ones_written_once(tmp_path) -> None:
+    spill = tmp_path / "spill.jsonl"
+    store = ConversationStore(str(tmp_path / "db.sqlite"))
+    bad = dict(_row(3), user_text=None)
+    wb = WriteBehindStore(store, batch_size=10, flush_interval=10, spill_path=str(spill))
+    wb.save_conversations([_row(0), _row(1), _row(2), bad, _row(4)])
+    assert wb.flush(timeout=5)
+    info = wb.info()
+    assert (info.written, info.rejected, info.spilled) == (4, 1, 0)
+    wb.close()
+
+    # a spill file holding the same mix replays the good rows exactly once
+    spill.write_text("".join(json.dumps(r) + "\n" for r in (_row(5), bad, _row(6))))
+    for _ in range(3):
+        wb = WriteBehindStore(store, batch_size=10, spill_path=str(spill))
+        wb.close()
+    texts = [r.user_text for r in store.iter_conversations()]
+    assert texts == ["q0", "q1", "q2", "q4", "q5", "q6"]
+    rejected = (tmp_path / "spill.jsonl.rejected").read_text().splitlines()
+    assert [json.loads(line)["user_text"] for line in rejected] == [None, None]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["db.sqlite", "spill.jsonl.rejected"]